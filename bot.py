@@ -3,20 +3,20 @@ from discord.ext import commands
 import os
 import json
 import asyncio
+import time
+
+STARTED_AT = time.perf_counter()
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-# Load config
-try:
-    config = json.loads(os.environ.get("CONFIG_JSON"))
-except (TypeError, json.JSONDecodeError):
-    with open("config.json") as f:
-        config = json.load(f)
+# Load config (parsed and validated once; see utils/config)
+from utils import config
 
-TOKEN = config["token"]
+settings = config.get()
+TOKEN = settings.token
 PREFIX = "/"
-GUILD_ID = 1166441420643639348
+GUILD_ID = settings.guild_id
 
 INTENTS = discord.Intents.default()
 INTENTS.message_content = True
@@ -26,14 +26,25 @@ INTENTS.reactions = True
 INTENTS.messages = True
 INTENTS.dm_messages = True
 
-bot = commands.Bot(command_prefix=PREFIX, intents=INTENTS)
-extensions_loaded = False
+from utils import outbound
+
+bot = commands.Bot(command_prefix=PREFIX, intents=INTENTS, http_trace=outbound.trace_config())
 
+from handlers.component_router import setup_component_router
+from handlers.reaction_dispatcher import setup_reaction_dispatcher
 from handlers.reaction_handler import setup_reaction_handler
+from utils.dm_registry import setup_dm_registry
+from utils.deferred import start_deferred_actions
 from tasks.reminder_task import start_reminder_task
+from tasks.catalog_watcher import start_catalog_watcher
+from tasks.session_sweeper import start_session_sweeper
 from tasks.explosives_scanner import ExplosiveScanner  # ✅ New
+from utils import catalog, command_sync, order_lifecycle
 
+setup_component_router(bot)
+setup_reaction_dispatcher(bot)
 setup_reaction_handler(bot)
+setup_dm_registry(bot)
 
 TRADER_STATS_FILE = os.path.join("data", "trader_stats.json")
 
@@ -57,10 +68,8 @@ async def announce_trader_of_the_week():
         with open(TRADER_STATS_FILE, "w") as f:
             json.dump({}, f)
 
-        channel_id = int(config["trader_of_the_week_channel_id"])
-        channel = bot.get_channel(channel_id)
-        if channel:
-            await channel.send(
+        if settings.trader_of_the_week_channel_id:
+            await config.channel(bot, settings.trader_of_the_week_channel_id).send(
                 f"🏆 {top_admin.mention} was **Trader of the Week** with {count} confirmed orders!\n"
                 "Be sure to thank them for supplying all your needs!"
             )
@@ -68,33 +77,37 @@ async def announce_trader_of_the_week():
     except Exception as e:
         print(f"[TOTW Error] {e}")
 
-@bot.event
-async def on_ready():
-    global extensions_loaded
-    print(f"[TraderBot] Logged in as {bot.user} (ID: {bot.user.id})")
-
-    if not extensions_loaded:
-        for file in os.listdir("./commands"):
-            if file.endswith(".py"):
-                print(f"[TraderBot] Attempting to load: {file}")
-                try:
-                    await bot.load_extension(f"commands.{file[:-3]}")
-                    print(f"[TraderBot] Loaded extension: {file}")
-                except Exception as e:
-                    print(f"[TraderBot] Failed to load {file}: {type(e).__name__} - {e}")
-        extensions_loaded = True
-        print("[TraderBot] All command modules loaded.")
+def _elapsed_ms() -> int:
+    return round((time.perf_counter() - STARTED_AT) * 1000)
+
+# Runs once per process, after login and before the gateway connects; reconnects never repeat it.
+async def setup_hook():
+    # In-flight orders are indexed before any cog or handler looks one up
+    await order_lifecycle.preload()
+
+    for file in sorted(os.listdir("./commands")):
+        if file.endswith(".py"):
+            print(f"[TraderBot] Attempting to load: {file}")
+            try:
+                await bot.load_extension(f"commands.{file[:-3]}")
+                print(f"[TraderBot] Loaded extension: {file}")
+            except Exception as e:
+                print(f"[TraderBot] Failed to load {file}: {type(e).__name__} - {e}")
+    print("[TraderBot] All command modules loaded.")
+
+    # Compile the price lists now (off the event loop) rather than in the first interaction
+    await catalog.preload()
 
     try:
-        synced = await bot.tree.sync()
-        print(f"[TraderBot] Synced {len(synced)} global slash command(s).")
-        guild = discord.Object(id=GUILD_ID)
-        guild_synced = await bot.tree.sync(guild=guild)
-        print(f"[TraderBot] Synced {len(guild_synced)} guild slash command(s).")
+        await command_sync.sync_if_changed(bot, discord.Object(id=GUILD_ID))
     except Exception as e:
         print(f"[TraderBot] Slash command sync failed: {type(e).__name__} - {e}")
 
+    # Background loops wait for the ready event themselves; deferred deletions need no cache
+    start_deferred_actions(bot)
     start_reminder_task(bot)
+    start_catalog_watcher(bot)
+    start_session_sweeper(bot)
 
     # ✅ Trader of the Week Scheduler (every Sunday at 12 PM EST)
     scheduler = AsyncIOScheduler()
@@ -108,6 +121,19 @@ async def on_ready():
     # ✅ Start Explosives Scanner Loop
     ExplosiveScanner(bot)
     print("[ExplosiveScanner] Active - scanning every 5 minutes.")
+    print(f"[TraderBot] Setup finished {_elapsed_ms()} ms after start.")
+
+bot.setup_hook = setup_hook
+
+@bot.event
+async def on_ready():
+    print(f"[TraderBot] Logged in as {bot.user} (ID: {bot.user.id}), {_elapsed_ms()} ms after start.")
+
+async def _first_interaction(interaction: discord.Interaction):
+    bot.remove_listener(_first_interaction, "on_interaction")
+    print(f"[TraderBot] First interaction received {_elapsed_ms()} ms after start.")
+
+bot.add_listener(_first_interaction, "on_interaction")
 
 @bot.event
 async def on_disconnect():
@@ -120,13 +146,23 @@ async def on_resumed():
 @bot.command()
 async def forcesync(ctx):
     try:
-        synced = await bot.tree.sync()
-        guild = discord.Object(id=GUILD_ID)
-        guild_synced = await bot.tree.sync(guild=guild)
-        await ctx.send(f"Slash commands synced! {len(synced)} global, {len(guild_synced)} guild.")
+        synced, guild_synced = await command_sync.sync(bot, discord.Object(id=GUILD_ID))
+        await ctx.send(f"Slash commands synced! {synced} global, {guild_synced} guild.")
     except Exception as e:
         await ctx.send(f"Failed to sync: {type(e).__name__} - {e}")
 
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def reloadconfig(ctx):
+    try:
+        applied, needs_restart = config.reload()
+    except config.ConfigError as e:
+        return await ctx.send(f"Config not reloaded: {e}")
+    lines = [f"Applied: {', '.join(applied)}." if applied else "No reloadable settings changed."]
+    if needs_restart:
+        lines.append(f"Changed but only applied on restart: {', '.join(needs_restart)}.")
+    await ctx.send("\n".join(lines))
+
 if __name__ == "__main__":
     try:
         print("[TraderBot] Starting up...")
@@ -4,9 +4,105 @@ from discord import app_commands, ui
 import json
 import os
 import asyncio
+import time
 
-config = json.loads(os.environ.get("CONFIG_JSON"))
-TRADER_ORDERS_CHANNEL_ID = config["trader_orders_channel_id"]
+from utils import config, deferred, dm_registry, outbound
+
+TRADER_ORDERS_CHANNEL_ID = config.get().trader_orders_channel_id
+
+PAGE_SIZE = 100                      # messages per history page and per bulk delete
+BULK_MAX_AGE = 14 * 24 * 3600 - 60  # Discord refuses bulk deletes of older messages
+PROGRESS_INTERVAL = 3                # seconds between status edits
+STATUS_LINGER = 10                   # seconds the final status stays up
+
+# channel_id -> running clear job
+_JOBS = {}
+
+
+async def _delete_old(queue: asyncio.Queue, counts: dict):
+    """Deletes old messages one at a time; discord.py waits out the delete rate limit."""
+    while True:
+        message = await queue.get()
+        try:
+            if message is None:
+                return
+            await message.delete()
+            counts["single"] += 1
+        except discord.NotFound:
+            counts["single"] += 1  # already gone
+        except discord.HTTPException as e:
+            counts["failed"] += 1
+            print(f"[CLEAR] Could not delete {message.id}: {e}")
+        finally:
+            queue.task_done()
+
+
+async def _clear_channel(channel: discord.TextChannel, status: discord.Message):
+    """
+    Clears everything posted in `channel` before `status`, editing `status` with progress.
+    Pages through history with a before= cursor; messages younger than 14 days go
+    in bulk deletes of up to 100, older ones through a single-delete queue.
+    """
+    counts = {"bulk": 0, "single": 0, "failed": 0, "queued": 0}
+    old = asyncio.Queue()
+    single_deleter = asyncio.create_task(_delete_old(old, counts))
+    last_report = 0.0
+
+    def report(done=False):
+        nonlocal last_report
+        now = time.monotonic()
+        if not done and now - last_report < PROGRESS_INTERVAL:
+            return
+        last_report = now
+        removed = counts["bulk"] + counts["single"]
+        if done:
+            text = f"🧹 Cleared {removed} message(s) ({counts['bulk']} in bulk, {counts['single']} one by one)."
+        else:
+            waiting = counts["queued"] - counts["single"] - counts["failed"]
+            text = f"🧹 Clearing... {removed} message(s) removed so far, {waiting} older one(s) queued."
+        if counts["failed"]:
+            text += f" {counts['failed']} could not be deleted."
+        outbound.edit(status, content=text)
+
+    try:
+        cursor = status
+        while True:
+            page = [m async for m in channel.history(limit=PAGE_SIZE, before=cursor)]
+            if not page:
+                break
+            cursor = page[-1]
+            now = time.time()
+            recent = [m for m in page if now - m.created_at.timestamp() < BULK_MAX_AGE]
+            for m in page:
+                if now - m.created_at.timestamp() >= BULK_MAX_AGE:
+                    old.put_nowait(m)
+                    counts["queued"] += 1
+            if len(recent) == 1:
+                old.put_nowait(recent[0])
+                counts["queued"] += 1
+            elif recent:
+                try:
+                    await channel.delete_messages(recent)
+                    counts["bulk"] += len(recent)
+                except discord.HTTPException as e:
+                    print(f"[CLEAR] Bulk delete failed, deleting one by one: {e}")
+                    for m in recent:
+                        old.put_nowait(m)
+                    counts["queued"] += len(recent)
+            report()
+        old.put_nowait(None)
+        while not single_deleter.done():
+            await asyncio.wait({single_deleter}, timeout=PROGRESS_INTERVAL)
+            report()
+        report(done=True)
+        print(f"[CLEAR] #{channel.name} cleared: {counts}")
+        await deferred.delete_later(status, STATUS_LINGER)
+    except Exception as e:
+        single_deleter.cancel()
+        print(f"[CLEAR ERROR] {e}")
+        outbound.edit(status, content=f"❌ Clear stopped after {counts['bulk'] + counts['single']} message(s): {e}")
+    finally:
+        _JOBS.pop(channel.id, None)
 
 class ClearChat(commands.Cog):
     def __init__(self, bot):
@@ -26,23 +122,19 @@ class ClearChat(commands.Cog):
                 if i.user.id != user.id:
                     return await i.response.send_message("This button isn’t for you.", ephemeral=True)
 
+                running = _JOBS.get(channel.id)
+                if running is not None and not running.done():
+                    return await i.response.edit_message(content="🧹 A clear is already running in this channel.", view=None)
+
                 await i.response.edit_message(content="🧹 Clearing...", view=None)
 
                 try:
                     if isinstance(channel, discord.DMChannel):
-                        # Proven working logic
-                        await asyncio.sleep(1)
-                        dm_channel = i.user.dm_channel or await i.user.create_dm()
-                        async for msg in dm_channel.history(limit=100):
-                            if msg.author == i.client.user:
-                                try:
-                                    await msg.delete()
-                                except:
-                                    pass
-                        print("[CLEAR] Bot messages cleared from DM.")
+                        removed = await dm_registry.cleanup(i.client, i.user.id)
+                        print(f"[CLEAR] {removed} bot message(s) cleared from DM.")
                     elif channel.id == TRADER_ORDERS_CHANNEL_ID:
-                        await channel.purge(limit=200, check=lambda m: True)
-                        print("[CLEAR] trader-orders channel wiped.")
+                        # Runs in the background; the prompt becomes its status message
+                        _JOBS[channel.id] = asyncio.create_task(_clear_channel(channel, i.message))
                 except Exception as e:
                     print(f"[CLEAR ERROR] {e}")
 
@@ -4,22 +4,20 @@ from discord import app_commands, ui
 import json
 import os
 import asyncio
-from utils import session_manager, variant_utils
+from utils import config, session_manager, session_start, variant_utils, catalog, order_lifecycle, trader_logger, deferred, outbound
+from handlers import component_router
+from utils.cart_render import CartMessageScheduler
+from utils.search_index import get_search_index, suggest
 
 import re
 
-# Load config
-try:
-    config = json.loads(os.environ.get("CONFIG_JSON"))
-except:
-    with open("config.json") as f:
-        config = json.load(f)
+settings = config.get()
 
 TRADER_TIMEOUT_SECONDS = 259200  # 3 days
+ORDER_TYPE = "selltrader"
 
-PRICE_FILE = os.path.join("data", "Final price list.json")
-with open(PRICE_FILE, "r") as f:
-    PRICE_DATA = json.load(f)["categories"]
+def _cart_line(line):
+    return f"• {line.item} ({line.variant}) x{line.quantity} = ${line.subtotal:,}"
 
 # --- Helper Functions ---
 def extract_label_and_emoji(text):
@@ -30,57 +28,6 @@ def extract_label_and_emoji(text):
         return label, emoji
     return text, None
 
-def get_categories():
-    return list(PRICE_DATA.keys())
-
-def get_subcategories(category):
-    sub_data = PRICE_DATA.get(category, {})
-    return [key for key, val in sub_data.items() if isinstance(val, dict)]
-
-def get_items_in_subcategory(category, subcategory):
-    if subcategory:
-        sub_data = PRICE_DATA.get(category, {}).get(subcategory, {})
-    else:
-        sub_data = PRICE_DATA.get(category, {})
-
-    item_list = []
-    for key, val in sub_data.items():
-        if isinstance(val, dict):
-            if all(isinstance(v, (int, float)) for v in val.values()):
-                item_list.append(key)
-            else:
-                for nested_key, nested_val in val.items():
-                    if isinstance(nested_val, dict) and all(isinstance(v, (int, float)) for v in nested_val.values()):
-                        item_list.append(nested_key)
-    return item_list
-
-def get_variants(category, subcategory, item):
-    try:
-        entry = PRICE_DATA[category]
-        if subcategory:
-            entry = entry[subcategory]
-        if item in entry:
-            return [k for k, v in entry[item].items() if isinstance(v, (int, float))]
-        else:
-            for parent_key, val in entry.items():
-                if isinstance(val, dict) and item in val:
-                    return [k for k, v in val[item].items() if isinstance(v, (int, float))]
-        return []
-    except (KeyError, TypeError):
-        return []
-
-def get_price(category, subcategory, item, variant):
-    try:
-        entry = PRICE_DATA[category]
-        if subcategory:
-            entry = entry[subcategory]
-        entry = entry.get(item, {})
-        if isinstance(entry, dict):
-            return entry.get(variant)
-        return None
-    except (KeyError, TypeError):
-        return None
-        
 class QuantityModal(ui.Modal, title="Enter Quantity"):
     quantity = ui.TextInput(label="Quantity", placeholder="e.g. 2", max_length=3)
 
@@ -93,7 +40,7 @@ class QuantityModal(ui.Modal, title="Enter Quantity"):
         self.item = item
         self.variant = variant
         self.view_ref = view_ref
-        self.price = get_price(category, subcategory, item, variant)
+        self.price = view_ref.catalog.sell_price(category, subcategory, item, variant)
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
@@ -103,7 +50,7 @@ class QuantityModal(ui.Modal, title="Enter Quantity"):
         except ValueError:
             return await interaction.response.send_message("Invalid quantity.", ephemeral=True)
 
-        subtotal = round((self.price / 3) * quantity)
+        subtotal = round(self.price * quantity)
         item_data = {
             "category": self.category,
             "subcategory": self.subcategory,
@@ -113,53 +60,32 @@ class QuantityModal(ui.Modal, title="Enter Quantity"):
             "subtotal": subtotal
         }
 
-        session_manager.add_item(self.user_id, item_data)
-
-        items = session_manager.get_session_items(self.user_id)
-        cart_total = sum(item["subtotal"] for item in items)
-        lines = [f"• {item['item']} ({item['variant']}) x{item['quantity']} = ${item['subtotal']:,}" for item in items]
-        summary = "\n".join(lines) + f"\n\n🛒 Cart Total: ${cart_total:,}"
+        async with self.view_ref.lock:
+            session_manager.add_item(self.user_id, item_data)
+            self.view_ref.update_cart_message()
 
-        await interaction.response.defer()
+            await interaction.response.defer()
 
-        # Close any old dropdowns
-        if self.view_ref.ui_message:
-            try:
-                await self.view_ref.ui_message.edit(view=None)
-            except Exception as e:
-                print(f"[Dropdown Cleanup Error] {e}")
-
-        # Clean up previous dropdown message
-        if hasattr(self.view_ref, "dropdown_message") and self.view_ref.dropdown_message:
-            try:
-                await self.view_ref.dropdown_message.delete()
-                self.view_ref.dropdown_message = None
-            except Exception as e:
-                print(f"[Dropdown Cleanup Error] {e}")
+            # Close any old dropdowns
+            if self.view_ref.ui_message:
+                try:
+                    await self.view_ref.ui_message.edit(view=None)
+                except Exception as e:
+                    print(f"[Dropdown Cleanup Error] {e}")
 
-        # Send or update cart message
-        try:
-            if self.view_ref.cart_message:
-                await self.view_ref.cart_message.edit(content=summary)
-            else:
-                self.view_ref.cart_message = await interaction.followup.send(content=summary)
-        except Exception as e:
-            print(f"[Cart Display Error] {e}")
-            self.view_ref.cart_message = await interaction.followup.send(content=summary)
+            # Clean up previous dropdown message
+            if hasattr(self.view_ref, "dropdown_message") and self.view_ref.dropdown_message:
+                try:
+                    await self.view_ref.dropdown_message.delete()
+                    self.view_ref.dropdown_message = None
+                except Exception as e:
+                    print(f"[Dropdown Cleanup Error] {e}")
 
         # Show separate "added to cart" confirmation
         confirm_msg = await interaction.followup.send(
             content=f"📦 Added: **{self.item} ({self.variant})** x{quantity}", ephemeral=False
         )
-        
-        async def cleanup():
-            await asyncio.sleep(5)
-            try:
-                await confirm_msg.delete()
-            except Exception as e:
-                print(f"[Add Confirmation Cleanup Error] {e}")
-        
-        asyncio.create_task(cleanup())
+        await deferred.delete_later(confirm_msg, 5)
             
 class BackButton(discord.ui.Button):
     def __init__(self, bot, user_id, current_stage, selected, view_ref):
@@ -206,27 +132,42 @@ class DynamicDropdown(ui.Select):
         super().__init__(placeholder=placeholder, options=options)
 
     def get_options(self):
+        # Option lists only depend on the catalog snapshot and the path so far, so they
+        # are built once per snapshot and reused on every stage change / Back press.
+        if self.stage == "category":
+            path = ()
+        elif self.stage == "subcategory":
+            path = (self.selected.get("category"),)
+        elif self.stage == "item":
+            path = (self.selected.get("category"), self.selected.get("subcategory"))
+        else:
+            path = (self.selected.get("category"), self.selected.get("subcategory"), self.selected.get("item"))
+        key = ("selltrader", self.stage) + path
+        return list(self.view_ref.catalog.cached(key, lambda: tuple(self._build_options())))
+
+    def _build_options(self):
+        cat = self.view_ref.catalog
         if self.stage == "category":
-            return [discord.SelectOption(label=extract_label_and_emoji(c)[0], value=c, emoji=extract_label_and_emoji(c)[1]) for c in get_categories()[:25]]
+            return [discord.SelectOption(label=extract_label_and_emoji(c)[0], value=c, emoji=extract_label_and_emoji(c)[1]) for c in cat.categories()[:25]]
         if self.stage == "subcategory":
-            return [discord.SelectOption(label=s, value=s) for s in get_subcategories(self.selected["category"])[:25]]
+            return [discord.SelectOption(label=s, value=s) for s in cat.subcategories(self.selected["category"])[:25]]
         if self.stage == "item":
-            items = get_items_in_subcategory(self.selected["category"], self.selected.get("subcategory"))
+            items = cat.items(self.selected["category"], self.selected.get("subcategory"))
             options = []
             for i in items[:25]:
-                variants = get_variants(self.selected["category"], self.selected.get("subcategory"), i)
+                variants = cat.variants(self.selected["category"], self.selected.get("subcategory"), i)
                 if len(variants) == 1 and variants[0] == "Default":
-                    price = get_price(self.selected["category"], self.selected.get("subcategory"), i, "Default") or 0
+                    price = cat.buy_price(self.selected["category"], self.selected.get("subcategory"), i, "Default") or 0
                     label = f"{i} (${price:,})"
                     options.append(discord.SelectOption(label=label, value=json.dumps({"item": i, "variant": "Default"})))
                 else:
                     options.append(discord.SelectOption(label=f"{i} (select variant...)", value=json.dumps({"item": i, "variant": None})))
             return options
         if self.stage == "variant":
-            variants = get_variants(self.selected["category"], self.selected.get("subcategory"), self.selected["item"])
+            variants = cat.variants(self.selected["category"], self.selected.get("subcategory"), self.selected["item"])
             options = []
             for v in variants[:25]:
-                price = get_price(self.selected['category'], self.selected.get('subcategory'), self.selected['item'], v) or 0
+                price = cat.buy_price(self.selected['category'], self.selected.get('subcategory'), self.selected['item'], v) or 0
                 label_text = v.split("<")[0].strip()
                 emoji = None
                 if "<" in v and ">" in v:
@@ -278,14 +219,46 @@ class DynamicDropdown(ui.Select):
         except Exception as e:
             print(f"[Dropdown Tracking Error] {e}")
 
-class SellTraderView(ui.View):
+class SellTraderView(session_manager.TracksSessionMessages, ui.View):
     def __init__(self, bot, user_id):
         super().__init__(timeout=TRADER_TIMEOUT_SECONDS)
         self.bot = bot
         self.user_id = user_id
+        self.catalog = catalog.get_catalog()  # pinned: this cart keeps its prices across reloads
+        self.lock = session_manager.session_lock(user_id)
+        self.cart_updates = CartMessageScheduler(self._cart_text, self._write_cart)
         self.cart_message = None
         self.ui_message = None
 
+    async def add_entry(self, entry, quantity):
+        """Adds a catalog row straight to the cart (used by /selltrader-add)."""
+        async with self.lock:
+            session_manager.add_item(self.user_id, {
+                "category": entry.category,
+                "subcategory": entry.subcategory,
+                "item": entry.item,
+                "variant": entry.variant,
+                "quantity": quantity,
+                "subtotal": round(entry.sell * quantity)
+            })
+            self.update_cart_message()
+
+    def update_cart_message(self):
+        """Queue a cart refresh; quick successive changes are written as one edit."""
+        self.cart_updates.schedule()
+
+    def _cart_text(self):
+        items = session_manager.get_session_items(self.user_id)
+        if not items:
+            return "🛒 Cart is now empty."
+        return items.render(_cart_line) + f"\n\n🛒 Cart Total: ${items.total:,}"
+
+    async def _write_cart(self, text):
+        if self.cart_message:
+            await self.cart_message.edit(content=text)
+        elif self.ui_message:
+            self.cart_message = await self.ui_message.channel.send(content=text)
+
     @ui.button(label="Add Item", style=discord.ButtonStyle.primary)
     async def add_item(self, interaction: discord.Interaction, button: discord.ui.Button):
         if interaction.user.id != self.user_id:
@@ -302,45 +275,29 @@ class SellTraderView(ui.View):
     
         await interaction.response.defer()  # Prevents interaction timeout
     
-        items = session_manager.get_session_items(self.user_id)
-        if not items:
-            return await interaction.followup.send("Your cart is already empty.", ephemeral=True)
-    
-        removed = items.pop()
-        session_manager.set_session_items(self.user_id, items)
-    
-        # Update cart first
-        summary = "\n".join([
-            f"• {i['item']} ({i['variant']}) x{i['quantity']} = ${i['subtotal']:,}"
-            for i in items
-        ])
-        total = sum(i["subtotal"] for i in items)
-        summary += f"\n\n🛒 Cart Total: ${total:,}" if items else "\n🛒 Cart is now empty."
+        async with self.lock:
+            items = session_manager.get_session_items(self.user_id)
+            if not items:
+                return await interaction.followup.send("Your cart is already empty.", ephemeral=True)
     
-        if self.cart_message:
-            await self.cart_message.edit(content=summary)
+            removed = session_manager.remove_last_item(self.user_id)
+            self.update_cart_message()
     
         # 🧾 Send removal confirmation message
         confirm_msg = await interaction.followup.send(
-            content=f"🗑️ Removed: **{removed['item']} ({removed['variant']})** x{removed['quantity']}",
+            content=f"🗑️ Removed: **{removed.item} ({removed.variant})** x{removed.quantity}",
             ephemeral=False
         )
-    
-        async def cleanup():
-            await asyncio.sleep(5)
-            try:
-                await confirm_msg.delete()
-            except Exception as e:
-                print(f"[Remove Confirmation Cleanup Error] {e}")
-    
-        asyncio.create_task(cleanup())
+        await deferred.delete_later(confirm_msg, 5)
 
     @ui.button(label="Cancel Order", style=discord.ButtonStyle.danger)
     async def cancel_order(self, interaction: discord.Interaction, button: discord.ui.Button):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("Not your session.", ephemeral=True)
     
-        session_manager.end_session(self.user_id)
+        async with self.lock:
+            self.cart_updates.cancel()
+            session_manager.end_session(self.user_id)
     
         msg = await interaction.response.send_message("❌ Order cancelled. This session will auto-close in 10 seconds...", ephemeral=False)
     
@@ -352,20 +309,10 @@ class SellTraderView(ui.View):
                 pass
     
         # Run the deletion in background after 10 seconds
-        async def cleanup_dm():
-            await asyncio.sleep(10)
-            try:
-                dm_channel = interaction.user.dm_channel or await interaction.user.create_dm()
-                async for m in dm_channel.history(limit=50):  # Adjust limit as needed
-                    if m.author == interaction.client.user:
-                        try:
-                            await m.delete()
-                        except Exception as e:
-                            print(f"[DM Cleanup Error] {e}")
-            except Exception as e:
-                print(f"[DM Fetch Error] {e}")
-    
-        asyncio.create_task(cleanup_dm())
+        try:
+            await deferred.cleanup_dms_later(interaction.user.id, 10)
+        except Exception as e:
+            print(f"[DM Cleanup Error] {e}")
 
     @ui.button(label="Submit Order", style=discord.ButtonStyle.success)
     async def submit_order(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -373,123 +320,163 @@ class SellTraderView(ui.View):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("Not your session.", ephemeral=True)
     
-        items = session_manager.get_session_items(self.user_id)
-        if not items:
-            return await interaction.response.send_message("Your cart is empty.", ephemeral=True)
-    
-        total = sum(i["subtotal"] for i in items)
-        summary = "\n".join([
-            f"• {i['item']} ({i['variant']}) x{i['quantity']} = ${i['subtotal']:,}"
-            for i in items
-        ])
-        summary += f"\n\n💰 **Total Payout: ${total:,}**"
-    
-        trader_channel = self.bot.get_channel(config["trader_orders_channel_id"])
-        if not trader_channel:
-            return await interaction.response.send_message("Trader channel not found.")
-    
-        # ✅ Admin alert message
-        alert_msg = await trader_channel.send(
-            f"<@&{config['trader_role_id']}> {interaction.user.mention} **has submitted an order to approve for sale!\n"
-            f"Please send payment (/economy amoney user + copy/paste-below ) here in this channel and confirm with the button below once done!**"
-        )
+        async with self.lock:
+            items = session_manager.get_session_items(self.user_id)
+            if not items:
+                return await interaction.response.send_message("Your cart is empty.", ephemeral=True)
+
+            total = items.total
+            summary = items.render(_cart_line) + f"\n\n💰 **Total Payout: ${total:,}**"
+
+            trader_channel = config.channel(self.bot, settings.trader_orders_channel_id)
+
+            if session_manager.claim_submission(self.user_id) is None:
+                return await interaction.response.send_message("This order has already been submitted.", ephemeral=True)
+
+            # ✅ Admin alert message
+            try:
+                alert_msg = await outbound.send(
+                    trader_channel, outbound.CRITICAL,
+                    content=(
+                        f"{config.role_mention(self.bot, settings.trader_role_id)} {interaction.user.mention} **has submitted an order to approve for sale!\n"
+                        f"Please send payment (/economy amoney user + copy/paste-below ) here in this channel and confirm with the button below once done!**"
+                    )
+                )
+            except Exception:
+                session_manager.release_submission(self.user_id)
+                raise
+            order = await order_lifecycle.open_order(
+                self.user_id, ORDER_TYPE, alert_msg, final_status=order_lifecycle.PAID,
+                total=total, items=items.to_items()
+            )
+            # The order is posted; the rest below works from the snapshot taken above.
+            self.cart_updates.cancel()
+            session_manager.end_session(self.user_id)
         
         # ✅ Proper payout command for admin use
         admin_payout_line = f"give user:{interaction.user.id} amount:{total} account:cash"
-        await trader_channel.send(f"{admin_payout_line}")
+        await outbound.send(trader_channel, outbound.CRITICAL, content=f"{admin_payout_line}")
     
-        # (ConfirmSellView and rest of the method continue below...)
-
-        class ConfirmSellView(ui.View):
-            def __init__(self, buyer, alert_msg):
-                super().__init__(timeout=None)
-                self.buyer = buyer
-                self.alert_msg = alert_msg
-
-            @ui.button(label="✅ Confirm Payout", style=discord.ButtonStyle.success)
-            async def confirm(self, i: discord.Interaction, button: discord.ui.Button):
-                if not i.user.guild_permissions.manage_messages:
-                    return await i.response.send_message("You do not have permission.", ephemeral=True)
-            
-                if self.alert_msg.id in self.bot.get_cog("SellTraderCommand").confirmed_payouts:
-                    return await i.response.send_message("This order has already been confirmed.", ephemeral=True)
-                
-                self.bot.get_cog("SellTraderCommand").confirmed_payouts.add(self.alert_msg.id)
-                await self.alert_msg.edit(content=self.alert_msg.content + f"\n\n✅ Confirmed by {i.user.mention}")
-            
-                # ✅ Log trader confirmation
-                from utils import trader_logger
-                log_data = trader_logger.load_reaction_log()
-                admin_id = str(i.user.id)
-                log_data[admin_id] = log_data.get(admin_id, 0) + 1
-                trader_logger.save_reaction_log(log_data)
-            
-                # ✅ Send DM to buyer
-                try:
-                    await self.buyer.send(
-                        "https://cdn.discordapp.com/attachments/1351365150287855739/1374120175049248940/ezgif.com-resize_2.gif"
-                    )
-                    await self.buyer.send(
-                        f"✅ **The payment for your used wares has been sent to <#{config['economy_channel_id']}>! Thanks for using Trader! Stay frosty survivor!**❄️"
-                    )
-                    await asyncio.sleep(1)
-                    await self.buyer.send(
-                        "https://cdn.discordapp.com/attachments/1351365150287855739/1373723922809491476/Trader2-ezgif.com-video-to-gif-converter.gif"
-                    )
-                except:
-                    pass
-            
-                await i.response.send_message("✅ Payout confirmed.", ephemeral=True)
-            
-                # 🧹 Begin 60-second DM cleanup for buyer
-                async def cleanup_dm():
-                    await asyncio.sleep(60)
-                    try:
-                        dm_channel = self.buyer.dm_channel or await self.buyer.create_dm()
-                        async for m in dm_channel.history(limit=50):
-                            if m.author == i.client.user:
-                                try:
-                                    await m.delete()
-                                except Exception as e:
-                                    print(f"[DM Cleanup Error] {e}")
-                    except Exception as e:
-                        print(f"[DM Cleanup Fetch Error] {e}")
-            
-                asyncio.create_task(cleanup_dm())
-
-        await trader_channel.send(summary, view=ConfirmSellView(interaction.user, alert_msg))
+        await outbound.send(trader_channel, outbound.CRITICAL, content=summary, view=_payout_view(order["order_id"]))
         await interaction.response.send_message("✅ **Your Sell order has been submitted and sent to the trader channel. Please stand by...**", ephemeral=False)
-        session_manager.end_session(self.user_id)
         if self.ui_message:
             await self.ui_message.edit(view=None)
 
+def _payout_view(order_id):
+    return component_router.layout(ui.Button(
+        label="✅ Confirm Payout",
+        style=discord.ButtonStyle.success,
+        custom_id=component_router.custom_id("payout", order_id)
+    ))
+
+async def on_payout_confirmed(i: discord.Interaction, order_id: str):
+    if not i.user.guild_permissions.manage_messages:
+        return await i.response.send_message("You do not have permission.", ephemeral=True)
+
+    # Acknowledge first; the writes, edits and DMs below can take longer than Discord waits
+    await i.response.defer(ephemeral=True, thinking=True)
+
+    # The lifecycle state is the duplicate guard, and it survives restarts.
+    order = order_lifecycle.get(order_id)
+    if order is None or await order_lifecycle.advance(order, order_lifecycle.CONFIRMED, confirmed_by=i.user.id) is None:
+        return await i.followup.send("This order has already been confirmed.", ephemeral=True)
+    await order_lifecycle.advance(order, order_lifecycle.PAID)
+    await order_lifecycle.append_text(i.client, order, order_lifecycle.ORDER_POST, f"\n\n✅ Confirmed by {i.user.mention}")
+
+    # ✅ Log trader confirmation
+    log_data = trader_logger.load_reaction_log()
+    admin_id = str(i.user.id)
+    log_data[admin_id] = log_data.get(admin_id, 0) + 1
+    trader_logger.save_reaction_log(log_data)
+
+    # ✅ Send DM to buyer
+    buyer = i.client.get_user(order["user_id"]) or await i.client.fetch_user(order["user_id"])
+    try:
+        await buyer.send(
+            "https://cdn.discordapp.com/attachments/1351365150287855739/1374120175049248940/ezgif.com-resize_2.gif"
+        )
+        await buyer.send(
+            f"✅ **The payment for your used wares has been sent to <#{settings.economy_channel_id}>! Thanks for using Trader! Stay frosty survivor!**❄️"
+        )
+        await asyncio.sleep(1)
+        await buyer.send(
+            "https://cdn.discordapp.com/attachments/1351365150287855739/1373723922809491476/Trader2-ezgif.com-video-to-gif-converter.gif"
+        )
+    except:
+        pass
+
+    await i.followup.send("✅ Payout confirmed.", ephemeral=True)
+
+    # 🧹 Begin 60-second DM cleanup for buyer
+    try:
+        await deferred.cleanup_dms_later(buyer.id, 60)
+    except Exception as e:
+        print(f"[DM Cleanup Error] {e}")
+
 class SellTraderCommand(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.dropdown_message = None
-        self.confirmed_payouts = set()  # ✅ prevent duplicate payout confirms
   
+    async def cog_load(self):
+        component_router.route("payout", on_payout_confirmed)
+
+        # Reattach carts restored from the session store to their DM messages
+        for user_id, session in session_manager.restored_sessions("selltrader"):
+            view = SellTraderView(self.bot, user_id)
+            view.ui_message = session_manager.message_ref(self.bot, session, "ui_message")
+            view.cart_message = session_manager.message_ref(self.bot, session, "cart_message")
+            try:
+                await view.ui_message.edit(view=view)
+                session_manager.attach_view(user_id, view)
+            except Exception as e:
+                print(f"[SellTrader Restore] Dropping session for {user_id}: {e}")
+                session_manager.end_session(user_id)
+
     @app_commands.command(name="selltrader", description="Start a selling session with the trader.")
     async def selltrader(self, interaction: discord.Interaction):
-        if interaction.channel.id != config["economy_channel_id"]:
+        if interaction.channel.id != settings.economy_channel_id:
             return await interaction.response.send_message("This command must be used in the economy channel.", ephemeral=True)
         try:
-            gif_msg = await interaction.user.send("https://cdn.discordapp.com/attachments/1371698983604326440/1373359533304582237/ezgif.com-optimize.gif")
-            start_msg = await interaction.user.send(
-                "┏━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "💰 **SELLING SESSION STARTED!**\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━┛\n"
-                "**Use the buttons below to add/remove items,\nsubmit, or cancel your sell order.**"
-            )
+            session_manager.start_session(interaction.user.id, kind="selltrader")
             view = SellTraderView(self.bot, interaction.user.id)
-            ui_msg = await interaction.user.send(view=view)
-            view.ui_message = ui_msg
-            view.start_message = start_msg
-            session_manager.start_session(interaction.user.id)
-            await interaction.response.send_message("📬 Sell session moved to your DMs.", ephemeral=False)
+            view.ui_message = await session_start.open_dm(
+                interaction,
+                "💰 **SELLING SESSION STARTED!**",
+                "**Use the buttons below to add/remove items,\nsubmit, or cancel your sell order.**",
+                view
+            )
+            session_manager.attach_view(interaction.user.id, view)
+            await session_start.reply(interaction, "📬 Sell session moved to your DMs.")
         except Exception as e:
             print(f"[SellTrader DM Error] {e}")
-            await interaction.response.send_message("❌ Failed to start sell session in DMs.", ephemeral=False)
+            await session_start.reply(interaction, "❌ Failed to start sell session in DMs.")
+
+    @app_commands.command(name="selltrader-add", description="Add an item to your open /selltrader cart by name.")
+    @app_commands.describe(item="Start typing an item or variant name", qty="How many to sell")
+    async def selltrader_add(self, interaction: discord.Interaction, item: str, qty: app_commands.Range[int, 1, 999]):
+        view = session_manager.get_view(interaction.user.id)
+        if not isinstance(view, SellTraderView):
+            return await interaction.response.send_message("Start a session with /selltrader first.", ephemeral=True)
+
+        index = get_search_index(view.catalog)
+        entry = index.resolve(item)
+        if entry is None or entry.sell is None:
+            return await interaction.response.send_message(index.no_match(item), ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await view.add_entry(entry, qty)
+        except Exception as e:
+            print(f"[SellTrader Add Error] {e}")
+            return await interaction.followup.send("❌ Could not add that item, please try again.", ephemeral=True)
+        await interaction.followup.send(f"📦 Added: **{entry.item} ({entry.variant})** x{qty}", ephemeral=True)
+
+    @selltrader_add.autocomplete("item")
+    async def selltrader_add_autocomplete(self, interaction: discord.Interaction, current: str):
+        view = session_manager.get_view(interaction.user.id)
+        cat = view.catalog if isinstance(view, SellTraderView) else catalog.get_catalog()
+        return [app_commands.Choice(name=name, value=value) for name, value in suggest(cat, current, lambda e: e.sell)]
 
 async def setup(bot):
     await bot.add_cog(SellTraderCommand(bot))
@@ -8,62 +8,35 @@ import time
 import asyncio
 from typing import Dict, Any, Optional, List, Tuple
 
-from utils import session_manager
+from utils import config, session_manager, catalog, order_lifecycle, deferred, outbound
+from handlers import reaction_dispatcher
+from utils.cart import Cart, CartLine
+from utils.catalog import Catalog
+from utils.search_index import get_search_index, suggest
 
-# --- Config (ENV first, then file) ---
-def _load_config() -> Dict[str, Any]:
-    try:
-        raw = os.environ.get("CONFIG_JSON")
-        if raw:
-            return json.loads(raw)
-    except Exception as e:
-        print(f"[tradepost] CONFIG_JSON parse error: {e}")
-    with open("config.json", "r", encoding="utf-8") as f:
-        return json.load(f)
-
-CONFIG = _load_config()
-
-ECONOMY_CHANNEL_ID = int(CONFIG["economy_channel_id"])
-ADMIN_ROLE_IDS: List[int] = [int(x) for x in CONFIG.get("admin_role_ids", [])]  # optional
-TRADER_ROLE_ID: Optional[int] = int(CONFIG.get("trader_role_id", 0)) or None
-
-# Accept both keys and include your hard-coded fallback for tradepost orders
-def _resolve_tradepost_channel_id(cfg: Dict[str, Any]) -> int:
-    cand = cfg.get("tradepost_orders_channel_id")
-    if not cand:
-        cand = cfg.get("tradepost_order_channel_id")  # legacy key in your config.json
-    try:
-        return int(cand)
-    except Exception:
-        return 1417541688133419118  # fallback as requested
-
-TRADEPOST_ORDERS_CHANNEL_ID: int = _resolve_tradepost_channel_id(CONFIG)
+# --- Config (utils/config; the orders channel accepts the legacy key, payouts fall back to it) ---
+settings = config.get()
 
-# Payouts channel for SELL flow (falls back to orders channel if not provided)
-PAYOUTS_CHANNEL_ID: int = int(CONFIG.get("payouts_channel_id", TRADEPOST_ORDERS_CHANNEL_ID))
+ECONOMY_CHANNEL_ID = settings.economy_channel_id
+ADMIN_ROLE_IDS = settings.admin_role_ids  # optional
+TRADEPOST_ORDERS_CHANNEL_ID: int = settings.tradepost_orders_channel_id
+PAYOUTS_CHANNEL_ID: int = settings.payouts_channel_id
+TRADEPOST_CATALOG_PATH = settings.tradepost_catalog_path
 
-TRADEPOST_CATALOG_PATH = CONFIG.get("tradepost_catalog_path", "data/tradepost_catalog.json")
-SESSION_TIMEOUT_SECONDS = int(CONFIG.get("session_timeout_minutes", 15)) * 60
+# Order types recorded in the order store
+ORDER_TYPE_BUY = "tradepost"
+ORDER_TYPE_SELL = "tradepost_sell"
 
 IRONFANG_GIF = ("https://cdn.discordapp.com/attachments/1351365150287855739/"
                 "1417598686728421547/Ironfang.gif?ex=68cb1128&is=68c9bfa8&"
                 "hm=b0ee86a58198b29c6cd8de30bbf18c1b7be6b2fd881cbb4039514848ad26eedb&")
 
-# --- Catalog lazy loader ---
-_CATALOG_CACHE: Optional[Dict[str, Any]] = None  # {"categories": {...}}
+# --- Catalog (compiled snapshot, hot-reloaded by tasks/catalog_watcher) ---
+catalog.register_source(catalog.TRADEPOST, TRADEPOST_CATALOG_PATH, catalog.tradepost_pricing)
 
-def _load_catalog() -> Optional[Dict[str, Any]]:
-    global _CATALOG_CACHE
-    if _CATALOG_CACHE is not None:
-        return _CATALOG_CACHE
+def _load_catalog() -> Optional[Catalog]:
     try:
-        with open(TRADEPOST_CATALOG_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict) or "categories" not in data:
-                print("[tradepost] Catalog missing 'categories' root")
-                return None
-            _CATALOG_CACHE = data
-            return _CATALOG_CACHE
+        return catalog.get_catalog(catalog.TRADEPOST)
     except FileNotFoundError:
         print(f"[tradepost] Catalog file not found: {TRADEPOST_CATALOG_PATH}")
         return None
@@ -74,55 +47,33 @@ def _load_catalog() -> Optional[Dict[str, Any]]:
         print(f"[tradepost] Catalog load error: {e}")
         return None
 
-# --- Helpers operating on catalog dict ---
-def tp_get_categories(cat: Dict[str, Any]) -> List[str]:
-    return list(cat.get("categories", {}).keys())
-
-def tp_get_items(cat: Dict[str, Any], category: str) -> List[str]:
-    sub = cat.get("categories", {}).get(category, {})
-    return [k for k, v in sub.items() if isinstance(v, dict)]
+# --- Helpers operating on a compiled catalog ---
+def tp_get_categories(cat: Catalog) -> List[str]:
+    return list(cat.categories())
 
-def tp_get_item_data(cat: Dict[str, Any], category: str, item: str) -> Dict[str, Any]:
-    return cat.get("categories", {}).get(category, {}).get(item, {}) or {}
+def tp_get_items(cat: Catalog, category: str) -> List[str]:
+    return list(cat.items(category))
 
-def tp_get_price_for_mode(item_data: dict, mode: str) -> Optional[int]:
-    # item_data like {"Buy": 100, "Sell": 50} or {"Default": 200}
-    if not isinstance(item_data, dict):
+def tp_get_price_for_mode(cat: Catalog, category: str, item: str, mode: str) -> Optional[int]:
+    # Each item compiles to a single "Default" row carrying its Buy and Sell prices
+    entry = cat.entry(category, None, item, "Default")
+    if entry is None:
         return None
-    if mode in item_data:
-        return int(item_data[mode])
-    if "Default" in item_data:
-        return int(item_data["Default"])
-    return None
+    price = entry.sell if mode == "Sell" else entry.buy
+    return int(price) if price is not None else None
 
 def _fmt_price(n: int) -> str:
     return f"{n:,}"
 
-def fmt_cart(items: List[dict], mode: str) -> Tuple[str, int]:
-    """
-    Accepts either Trader-style items:
-      {"item","variant","quantity","subtotal", ...}
-    or TradePost-style items:
-      {"item","qty","unit","total", ...}
-    """
-    lines = [f"**Mode:** {mode}"]
-    total = 0
-
-    for it in items:
-        if "subtotal" in it:  # trader schema
-            qty = it.get("quantity", 1)
-            unit = int(it["subtotal"]) // max(qty, 1)
-            lines.append(f"• {it['item']} x{qty} — ${_fmt_price(it['subtotal'])} (unit ${_fmt_price(unit)})")
-            total += int(it["subtotal"])
-        else:  # legacy tradepost schema
-            qty = it.get("qty", 1)
-            unit = it.get("unit", 0)
-            tot = it.get("total", unit * qty)
-            lines.append(f"• {it['item']} x{qty} — ${_fmt_price(tot)} (unit ${_fmt_price(unit)})")
-            total += int(tot)
-
-    lines.append(f"\n**Cart Total:** ${_fmt_price(total)}")
-    return "\n".join(lines), total
+def _fmt_line(line: CartLine) -> str:
+    unit = int(line.subtotal) // max(line.quantity, 1)
+    return f"• {line.item} x{line.quantity} — ${_fmt_price(line.subtotal)} (unit ${_fmt_price(unit)})"
+
+def fmt_cart(cart: Cart, mode: str) -> Tuple[str, int]:
+    """Cart body for the DM embed and the order post. Legacy qty/unit/total items are converted when the Cart is built."""
+    total = int(cart.total)
+    body = f"**Mode:** {mode}\n{cart.render(_fmt_line)}\n\n**Cart Total:** ${_fmt_price(total)}"
+    return body, total
 
 # ---------- UI ----------
 class QuantityModal(ui.Modal, title="Quantity"):
@@ -145,15 +96,26 @@ class QuantityModal(ui.Modal, title="Quantity"):
 
         # Update cart + then ack (DMs don't support ephemerals; delete after 5s)
         await interaction.response.defer()
-        await self.view_ref.add_current_selection(q)
+        async with self.view_ref.lock:
+            await self.view_ref.add_current_selection(q)
         msg = await interaction.followup.send("Item added to cart", wait=True)
-        async def _cleanup():
-            await asyncio.sleep(5)
-            try:
-                await msg.delete()
-            except Exception:
-                pass
-        asyncio.create_task(_cleanup())
+        await deferred.delete_later(msg, 5)
+
+def _build_options(cat: Catalog, level: str, mode: str, category: Optional[str]) -> List[discord.SelectOption]:
+    if level == "mode":
+        return [discord.SelectOption(label="Buy"), discord.SelectOption(label="Sell")]
+    if level == "category":
+        return [discord.SelectOption(label=c) for c in tp_get_categories(cat)]
+    # item — show price for the selected mode in the option description
+    opts = []
+    if category:
+        for item in tp_get_items(cat, category):
+            price = tp_get_price_for_mode(cat, category, item, mode)
+            if price is not None:
+                opts.append(discord.SelectOption(label=item, description=f"{mode}: ${_fmt_price(price)}"))
+            else:
+                opts.append(discord.SelectOption(label=item))
+    return opts
 
 class DynamicDropdown(ui.Select):
     """
@@ -166,27 +128,19 @@ class DynamicDropdown(ui.Select):
         self.view_ref = view_ref
 
         cat = self.view_ref.catalog  # guaranteed present
+        mode = self.view_ref.state.get("mode", "Buy")
+        category = self.view_ref.state.get("category")
 
         if level == "mode":
-            opts = [discord.SelectOption(label="Buy"), discord.SelectOption(label="Sell")]
             ph = "Choose Buy or Sell"
         elif level == "category":
-            opts = [discord.SelectOption(label=c) for c in tp_get_categories(cat)]
             ph = "Choose a category"
         else:
-            # item — show price for the selected mode in the option description
-            opts = []
             ph = "Choose an item"
-            mode = self.view_ref.state.get("mode", "Buy")
-            category = self.view_ref.state.get("category")
-            if category:
-                for item in tp_get_items(cat, category):
-                    item_data = tp_get_item_data(cat, category, item)
-                    price = tp_get_price_for_mode(item_data, mode)
-                    if price is not None:
-                        opts.append(discord.SelectOption(label=item, description=f"{mode}: ${_fmt_price(price)}"))
-                    else:
-                        opts.append(discord.SelectOption(label=item))
+
+        # Prebuilt per catalog snapshot; a reload starts a fresh cache
+        key = ("tradepost", level, mode if level == "item" else None, category if level == "item" else None)
+        opts = list(cat.cached(key, lambda: tuple(_build_options(cat, level, mode, category))))
         super().__init__(placeholder=ph, options=opts, min_values=1, max_values=1, row=0)
 
     async def callback(self, interaction: discord.Interaction):
@@ -210,12 +164,15 @@ class DynamicDropdown(ui.Select):
             self.view_ref.state["category"] = choice
             await self.view_ref.refresh(next_level="item")
 
-class TradePostView(ui.View):
-    def __init__(self, bot, user_id: int, catalog: Dict[str, Any]):
-        super().__init__(timeout=SESSION_TIMEOUT_SECONDS)
+class TradePostView(session_manager.TracksSessionMessages, ui.View):
+    tracked_messages = ("msg",)  # recorded in the session so the view can be reattached after a restart
+
+    def __init__(self, bot, user_id: int, catalog: Catalog):
+        super().__init__(timeout=config.get().session_timeout)
         self.bot = bot
         self.user_id = user_id
-        self.catalog = catalog
+        self.catalog = catalog  # pinned snapshot; reloads only affect new sessions
+        self.lock = session_manager.session_lock(user_id)  # hold around cart mutations
         self.state = {}  # keys: mode, category, item
         self.start_ts = time.time()
         self.msg: Optional[discord.Message] = None  # DM message we keep editing
@@ -226,15 +183,21 @@ class TradePostView(ui.View):
     def attach_message(self, msg: discord.Message):
         self.msg = msg
 
-    async def add_current_selection(self, qty: int):
+    async def add_entry(self, entry, qty: int) -> bool:
+        # Typed add via /tradepost-add: jump straight to the item, keeping the current mode
+        async with self.lock:
+            self.state = {"mode": self.state.get("mode", "Buy"), "category": entry.category, "item": entry.item}
+            return await self.add_current_selection(qty)
+
+    async def add_current_selection(self, qty: int) -> bool:
+        # Callers hold self.lock. Returns False if the item has no price in this mode.
         mode = self.state.get("mode")            # "Buy" / "Sell"
         c = self.state.get("category")
         i = self.state.get("item")
-        item_data = tp_get_item_data(self.catalog, c, i)
-        unit = tp_get_price_for_mode(item_data, mode or "Buy")
+        unit = tp_get_price_for_mode(self.catalog, c, i, mode or "Buy")
         if unit is None:
             await self.refresh(next_level="item")
-            return
+            return False
 
         # Use Trader-style schema for compatibility with your session_manager helpers
         subtotal = unit * qty
@@ -249,8 +212,12 @@ class TradePostView(ui.View):
 
         session_manager.add_item(self.user_id, item_payload)  # do not restart session here
         await self.refresh(next_level="item")
+        return True
 
     async def refresh(self, next_level: str):
+        if session_manager.is_session_active(self.user_id):
+            session_manager.update_session(self.user_id, {"tradepost_state": dict(self.state)})
+
         # Remove only existing selects; keep the buttons (defined via @ui.button)
         for c in list(self.children):
             if isinstance(c, discord.ui.Select):
@@ -265,7 +232,7 @@ class TradePostView(ui.View):
             self.add_item(DynamicDropdown(self.bot, self.user_id, next_level, self))
 
         # Cart summary (no session restart here)
-        items = session_manager.get_session_items(self.user_id) or []
+        items = session_manager.get_session_items(self.user_id)
         mode = self.state.get("mode", "Buy")
 
         title = f"Trade Post — {mode}"
@@ -301,42 +268,58 @@ class TradePostView(ui.View):
             return await interaction.response.send_message("Not your session.", ephemeral=True)
         await interaction.response.defer()
 
-        items = session_manager.get_session_items(self.user_id) or []
-        if not items:
-            return await interaction.followup.send("Your cart is empty.")
-
-        mode = self.state.get("mode", "Buy")
-        body, total = fmt_cart(items, mode)
-
-        if mode.lower() == "sell":
-            # SELL -> post to payouts channel with staff confirmation instructions
-            order_text = (
-                f"**Trade Post Order — Sell**\n"
-                f"**Customer:** {interaction.user.mention}\n\n"
-                f"{body}\n\n"
-                f"Please use the **/pay** command in <#{ECONOMY_CHANNEL_ID}> "
-                f"and **staff should confirm here with a ✅ when the payout is complete**."
-            )
-            ch_id = PAYOUTS_CHANNEL_ID
-        else:
-            # BUY -> normal orders channel + staff confirm flow
-            order_text = (
-                f"**Trade Post Order — {mode}**\n"
-                f"**Customer:** {interaction.user.mention}\n\n"
-                f"{body}\n\n"
-                f"_please confirm this message with a ✅ when the order is ready_"
-            )
-            ch_id = TRADEPOST_ORDERS_CHANNEL_ID
-
-        ch = interaction.client.get_channel(ch_id)
-        if not ch:
-            return await interaction.followup.send("Trade Post orders channel not found.")
-
-        msg = await ch.send(order_text)
-        await msg.add_reaction("🔴")  # baseline behavior
-
-        session_manager.log(f"[TradePost] mode={mode} user={interaction.user.id} total={total}")
-        session_manager.end_session(self.user_id)
+        async with self.lock:
+            items = session_manager.get_session_items(self.user_id)
+            if not items:
+                return await interaction.followup.send("Your cart is empty.")
+
+            mode = self.state.get("mode", "Buy")
+            body, total = fmt_cart(items, mode)
+
+            if mode.lower() == "sell":
+                # SELL -> post to payouts channel with staff confirmation instructions
+                order_text = (
+                    f"**Trade Post Order — Sell**\n"
+                    f"**Customer:** {interaction.user.mention}\n\n"
+                    f"{body}\n\n"
+                    f"Please use the **/pay** command in <#{ECONOMY_CHANNEL_ID}> "
+                    f"and **staff should confirm here with a ✅ when the payout is complete**."
+                )
+                ch_id = PAYOUTS_CHANNEL_ID
+            else:
+                # BUY -> normal orders channel + staff confirm flow
+                order_text = (
+                    f"**Trade Post Order — {mode}**\n"
+                    f"**Customer:** {interaction.user.mention}\n\n"
+                    f"{body}\n\n"
+                    f"_please confirm this message with a ✅ when the order is ready_"
+                )
+                ch_id = TRADEPOST_ORDERS_CHANNEL_ID
+
+            ch = config.channel(interaction.client, ch_id)
+
+            if session_manager.claim_submission(self.user_id) is None:
+                return await interaction.followup.send("This order has already been submitted.")
+            try:
+                msg = await outbound.send(ch, outbound.CRITICAL, content=order_text)
+            except Exception:
+                session_manager.release_submission(self.user_id)
+                raise
+            outbound.add_reaction(msg, "🔴")  # baseline behavior
+            if mode.lower() == "sell":
+                await order_lifecycle.open_order(
+                    self.user_id, ORDER_TYPE_SELL, msg, final_status=order_lifecycle.PAID,
+                    total=total, items=items.to_items()
+                )
+            else:
+                # A BUY is done once staff confirm it is waiting at the pickup point.
+                await order_lifecycle.open_order(
+                    self.user_id, ORDER_TYPE_BUY, msg, final_status=order_lifecycle.STORED,
+                    total=total, items=items.to_items()
+                )
+
+            session_manager.log(f"[TradePost] mode={mode} user={interaction.user.id} total={total}")
+            session_manager.end_session(self.user_id)
 
         await interaction.followup.send("📦 Your Trade Post order has been placed!")
         self.stop()
@@ -347,242 +330,174 @@ class TradePostView(ui.View):
             return await interaction.response.send_message("Not your session.", ephemeral=True)
         await interaction.response.defer()
 
-        items = session_manager.get_session_items(self.user_id) or []
-        if not items:
+        async with self.lock:
+            removed = session_manager.remove_last_item(self.user_id)
+            if removed:
+                await self.refresh(next_level="item" if self.state.get("category") else "category")
+
+        if not removed:
             msg = await interaction.followup.send("Your cart is empty.")
-            async def _cleanup():
-                await asyncio.sleep(5)
-                try:
-                    await msg.delete()
-                except Exception:
-                    pass
-            asyncio.create_task(_cleanup())
+            await deferred.delete_later(msg, 5)
             return
 
-        items.pop()
-        session_manager.set_session_items(self.user_id, items)
-        await self.refresh(next_level="item" if self.state.get("category") else "category")
-
         msg = await interaction.followup.send("Item removed from cart")
-        async def _cleanup():
-            await asyncio.sleep(5)
-            try:
-                await msg.delete()
-            except Exception:
-                pass
-        asyncio.create_task(_cleanup())
+        await deferred.delete_later(msg, 5)
 
     @ui.button(label="Cancel", style=discord.ButtonStyle.danger, custom_id="tp_cancel", row=3)
     async def _cancel(self, interaction: discord.Interaction, _: discord.ui.Button):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("Not your session.", ephemeral=True)
         await interaction.response.defer()
-        session_manager.end_session(self.user_id)
+        async with self.lock:
+            session_manager.end_session(self.user_id)
         await interaction.followup.send("❌ Trade Post session canceled.")
         self.stop()
 
 class TradePostCommand(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # map: dm_payment_message_id -> {"player": Member/User, "admin_id": int}
-        self.awaiting_payment: Dict[int, Dict[str, Any]] = {}
-        # track completion messages in orders channel that still need staff ✅
-        self.awaiting_final_confirm: Dict[int, Dict[str, Any]] = {}
-        # simple dedupe
-        self._handled_messages: set[int] = set()
-
-    # ✅ Reaction handler (orders + payouts + DM confirms)
-    @commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+
+    async def cog_load(self):
+        reaction_dispatcher.on_order_message(ORDER_TYPE_BUY, order_lifecycle.ORDER_POST, "✅", self._confirm_buy)
+        reaction_dispatcher.on_order_message(ORDER_TYPE_BUY, order_lifecycle.PAYMENT_DM, "✅", self._confirm_payment)
+        reaction_dispatcher.on_order_message(ORDER_TYPE_BUY, order_lifecycle.PAYMENT_NOTICE, "✅", self._complete_buy)
+        reaction_dispatcher.on_order_message(ORDER_TYPE_SELL, order_lifecycle.ORDER_POST, "✅", self._confirm_sell)
+
+        # Reattach carts restored from the session store to their DM messages
+        restored = session_manager.restored_sessions("tradepost")
+        tp_catalog = _load_catalog() if restored else None
+        for user_id, session in restored:
+            msg = session_manager.message_ref(self.bot, session, "msg")
+            if tp_catalog is None or msg is None:
+                session_manager.end_session(user_id)
+                continue
+            view = TradePostView(self.bot, user_id, tp_catalog)
+            view.state = dict(session.get("tradepost_state") or {})
+            view.attach_message(msg)
+            session_manager.attach_view(user_id, view)
+            await view.refresh(next_level="item" if view.state.get("category") else "category")
+
+    def _is_staff(self, member: Optional[discord.Member]) -> bool:
+        if not member or member.bot:
+            return False
+        return not ADMIN_ROLE_IDS or any(r.id in ADMIN_ROLE_IDS for r in member.roles)
+
+    async def _player(self, order) -> discord.User:
+        return self.bot.get_user(order["user_id"]) or await self.bot.fetch_user(order["user_id"])
+
+    # ✅ Reaction routes (orders + payouts + DM confirms), registered in cog_load
+
+    # Case A1: staff reacts ✅ on the original BUY order post
+    async def _confirm_buy(self, payload: discord.RawReactionActionEvent, order):
+        member = payload.member
+        if not self._is_staff(member):
+            return
+        if await order_lifecycle.advance(order, order_lifecycle.CONFIRMED, confirmed_by=member.id) is None:
+            return
+        message = order_lifecycle.message_ref(self.bot, order, order_lifecycle.ORDER_POST)
+        outbound.clear_reaction(message, "🔴")
+        outbound.add_reaction(message, "✅")
+        await order_lifecycle.append_text(self.bot, order, order_lifecycle.ORDER_POST, f"\n\nOrder confirmed by {member.mention}")
+
+        # DM the customer requesting payment
         try:
-            # -------------------------
-            # Case A: staff reacts ✅ in orders channel to confirm a BUY order
-            # -------------------------
-            if payload.guild_id and payload.channel_id == TRADEPOST_ORDERS_CHANNEL_ID and str(payload.emoji.name) == "✅":
-                guild = self.bot.get_guild(payload.guild_id)
-                if not guild:
-                    return
-                member = guild.get_member(payload.user_id)
-                if not member or member.bot:
-                    return
-                if ADMIN_ROLE_IDS and not any(r.id in ADMIN_ROLE_IDS for r in member.roles):
-                    return
-
-                channel = self.bot.get_channel(payload.channel_id)
-                message = await channel.fetch_message(payload.message_id)
-                content_lower = message.content.lower()
-
-                # A1: first confirm on the original order post (BUY)
-                if "trade post order — buy" in content_lower and "please confirm this message with a ✅" in content_lower and "order confirmed by" not in content_lower:
-                    try:
-                        await message.clear_reaction("🔴")
-                    except Exception:
-                        pass
-                    try:
-                        await message.add_reaction("✅")
-                    except Exception:
-                        pass
-
-                    new_text = f"{message.content}\n\nOrder confirmed by {member.mention}"
-                    await message.edit(content=new_text)
-
-                    # DM the customer requesting payment
-                    if message.mentions:
-                        player = message.mentions[0]
-                        total_line = None
-                        for line in message.content.splitlines():
-                            if "cart total:" in line.lower():
-                                total_line = line
-                                break
-                        total_amount = None
-                        if total_line:
-                            total_amount = total_line.split(":")[-1].strip().lstrip("$")
-
-                        try:
-                            dm = await player.send(
-                                "📦 **Your Trade Post order is ready!**\n\n"
-                                f"Please make a payment to {member.mention} for **${total_amount or 'the total'}**.\n"
-                                f"Make sure to send payment in <#{ECONOMY_CHANNEL_ID}> (use /pay command and enter the amount total).\n\n"
-                                "**Once paid, react to this message with a ✅ to confirm.**"
-                            )
-                            await dm.add_reaction("⚠️")
-                            self.awaiting_payment[dm.id] = {
-                                "player": player,
-                                "admin_id": member.id
-                            }
-                        except Exception as e:
-                            print(f"[tradepost] Failed to DM player payment prompt: {e}")
-                    return
-
-                # A2: staff reacts on the "payment confirmed" follow-up to finalize BUY
-                if payload.message_id in self.awaiting_final_confirm and "✅" == str(payload.emoji.name):
-                    if payload.message_id in self._handled_messages:
-                        return
-                    self._handled_messages.add(payload.message_id)
-
-                    data = self.awaiting_final_confirm.pop(payload.message_id)
-                    follow_msg = await channel.fetch_message(payload.message_id)
-                    try:
-                        await follow_msg.clear_reaction("🔴")
-                    except Exception:
-                        pass
-                    try:
-                        await follow_msg.add_reaction("✅")
-                    except Exception:
-                        pass
-
-                    player = data.get("player")
-                    # Final DM to customer with pickup coordinates + GIF
-                    try:
-                        embed = discord.Embed(
-                            description=(
-                                "✅ **Your order is ready for pick up!**\n"
-                                "Location: 📍 **(0.24, 0.36)**\n\n"
-                                "Ironfang thanks you for your business!"
-                            ),
-                            color=0x70a0f0
-                        )
-                        embed.set_image(url=IRONFANG_GIF)
-                        await player.send(embed=embed)
-                    except Exception as e:
-                        print(f"[tradepost] Final DM failed: {e}")
-                    return
-
-            # -------------------------
-            # Case B: **staff** reacts ✅ in PAYOUTS channel to confirm the SELL payout
-            # -------------------------
-            if payload.guild_id and payload.channel_id == PAYOUTS_CHANNEL_ID and str(payload.emoji.name) == "✅":
-                guild = self.bot.get_guild(payload.guild_id)
-                if not guild:
-                    return
-                member = guild.get_member(payload.user_id)
-                if not member or member.bot:
-                    return
-                if ADMIN_ROLE_IDS and not any(r.id in ADMIN_ROLE_IDS for r in member.roles):
-                    return
-
-                channel = self.bot.get_channel(payload.channel_id)
-                message = await channel.fetch_message(payload.message_id)
-                content_lower = message.content.lower()
-
-                # Only act on our SELL posts in payouts
-                if "trade post order — sell" in content_lower and "confirm here" in content_lower:
-                    try:
-                        await message.clear_reaction("🔴")
-                    except Exception:
-                        pass
-                    try:
-                        await message.add_reaction("✅")
-                    except Exception:
-                        pass
-                    try:
-                        await message.edit(content=message.content + f"\n\nPayout confirmed by {member.mention}")
-                    except Exception:
-                        pass
-
-                    # Final DM to seller confirming payout with GIF
-                    try:
-                        if message.mentions:
-                            player = message.mentions[0]
-                            embed = discord.Embed(
-                                description=(
-                                    "✅ **You have been properly paid for your wares!**\n"
-                                    "Ironfang thanks you for your business!"
-                                ),
-                                color=0x70a0f0
-                            )
-                            embed.set_image(url=IRONFANG_GIF)
-                            await player.send(embed=embed)
-                    except Exception as e:
-                        print(f"[tradepost] Sell final DM failed: {e}")
-                    return
-
-            # -------------------------
-            # Case C: customer reacts ✅ in DM to the BUY payment prompt
-            # -------------------------
-            if payload.guild_id is None and str(payload.emoji.name) == "✅":
-                # fetch the DM message
-                channel = await self.bot.fetch_channel(payload.channel_id)
-                if not isinstance(channel, (discord.DMChannel, discord.PartialMessageable)):
-                    return
-                try:
-                    msg = await channel.fetch_message(payload.message_id)
-                except Exception:
-                    return
-                if msg.author.id != self.bot.user.id:
-                    return  # only handle our own payment prompt msgs
-                if payload.message_id not in self.awaiting_payment:
-                    return
-
-                data = self.awaiting_payment.pop(payload.message_id)
-                player = data["player"]
-
-                # acknowledge in the DM thread
-                try:
-                    await msg.add_reaction("✅")
-                    await msg.edit(content=msg.content + "\n\n✅ Payment confirmed! Please stand by.")
-                except Exception:
-                    pass
-
-                # notify orders channel for final staff confirm (BUY)
-                orders_ch = self.bot.get_channel(TRADEPOST_ORDERS_CHANNEL_ID)
-                if orders_ch is None:
-                    try:
-                        orders_ch = await self.bot.fetch_channel(TRADEPOST_ORDERS_CHANNEL_ID)
-                    except Exception:
-                        orders_ch = None
-
-                if orders_ch:
-                    mention_role = f"<@&{TRADER_ROLE_ID}>" if TRADER_ROLE_ID else ""
-                    notice = await orders_ch.send(
-                        f"{mention_role} {player.mention} **has confirmed payment.** 💵\n"
-                        "React with ✅ to complete the order and notify the customer."
-                    )
-                    await notice.add_reaction("🔴")
-                    self.awaiting_final_confirm[notice.id] = {"player": player}
-            # done
+            player = await self._player(order)
+            dm = await player.send(
+                "📦 **Your Trade Post order is ready!**\n\n"
+                f"Please make a payment to {member.mention} for **${_fmt_price(order['total'])}**.\n"
+                f"Make sure to send payment in <#{ECONOMY_CHANNEL_ID}> (use /pay command and enter the amount total).\n\n"
+                "**Once paid, react to this message with a ✅ to confirm.**"
+            )
+            await dm.add_reaction("⚠️")
+            await order_lifecycle.link(order, order_lifecycle.PAYMENT_DM, dm)
         except Exception as e:
-            print(f"[tradepost] on_raw_reaction_add error: {e}")
+            print(f"[tradepost] Failed to DM player payment prompt: {e}")
+
+    # Case C: customer reacts ✅ in DM to the BUY payment prompt
+    async def _confirm_payment(self, payload: discord.RawReactionActionEvent, order):
+        if payload.user_id != order["user_id"]:
+            return
+        if await order_lifecycle.advance(order, order_lifecycle.PAID) is None:
+            return
+        player = await self._player(order)
+
+        # acknowledge in the DM thread
+        try:
+            outbound.add_reaction(order_lifecycle.message_ref(self.bot, order, order_lifecycle.PAYMENT_DM), "✅")
+            await order_lifecycle.append_text(self.bot, order, order_lifecycle.PAYMENT_DM, "\n\n✅ Payment confirmed! Please stand by.")
+        except Exception:
+            pass
+
+        # notify orders channel for final staff confirm (BUY)
+        orders_ch = config.channel(self.bot, TRADEPOST_ORDERS_CHANNEL_ID)
+        if orders_ch:
+            notice = await outbound.send(
+                orders_ch, outbound.CRITICAL,
+                content=(
+                    f"{config.role_mention(self.bot, settings.trader_role_id)} {player.mention} **has confirmed payment.** 💵\n"
+                    "React with ✅ to complete the order and notify the customer."
+                )
+            )
+            outbound.add_reaction(notice, "🔴")
+            await order_lifecycle.link(order, order_lifecycle.PAYMENT_NOTICE, notice)
+
+    # Case A2: staff reacts ✅ on the "payment confirmed" follow-up to finalize BUY
+    async def _complete_buy(self, payload: discord.RawReactionActionEvent, order):
+        member = payload.member
+        if not self._is_staff(member):
+            return
+        if await order_lifecycle.advance(order, order_lifecycle.STORED, handled_by=member.id) is None:
+            return
+        follow_msg = order_lifecycle.message_ref(self.bot, order, order_lifecycle.PAYMENT_NOTICE)
+        outbound.clear_reaction(follow_msg, "🔴")
+        outbound.add_reaction(follow_msg, "✅")
+
+        # Final DM to customer with pickup coordinates + GIF
+        try:
+            embed = discord.Embed(
+                description=(
+                    "✅ **Your order is ready for pick up!**\n"
+                    "Location: 📍 **(0.24, 0.36)**\n\n"
+                    "Ironfang thanks you for your business!"
+                ),
+                color=0x70a0f0
+            )
+            embed.set_image(url=IRONFANG_GIF)
+            await (await self._player(order)).send(embed=embed)
+        except Exception as e:
+            print(f"[tradepost] Final DM failed: {e}")
+
+    # Case B: staff reacts ✅ on the SELL post in payouts
+    async def _confirm_sell(self, payload: discord.RawReactionActionEvent, order):
+        member = payload.member
+        if not self._is_staff(member):
+            return
+        # One staff ✅ both confirms the sale and records the payout.
+        if await order_lifecycle.advance(order, order_lifecycle.CONFIRMED, confirmed_by=member.id) is None:
+            return
+        await order_lifecycle.advance(order, order_lifecycle.PAID)
+
+        message = order_lifecycle.message_ref(self.bot, order, order_lifecycle.ORDER_POST)
+        outbound.clear_reaction(message, "🔴")
+        outbound.add_reaction(message, "✅")
+        try:
+            await order_lifecycle.append_text(self.bot, order, order_lifecycle.ORDER_POST, f"\n\nPayout confirmed by {member.mention}")
+        except Exception:
+            pass
+
+        # Final DM to seller confirming payout with GIF
+        try:
+            embed = discord.Embed(
+                description=(
+                    "✅ **You have been properly paid for your wares!**\n"
+                    "Ironfang thanks you for your business!"
+                ),
+                color=0x70a0f0
+            )
+            embed.set_image(url=IRONFANG_GIF)
+            await (await self._player(order)).send(embed=embed)
+        except Exception as e:
+            print(f"[tradepost] Sell final DM failed: {e}")
 
     @app_commands.command(name="tradepost", description="Open the Trade Post menu (economy channel only).")
     async def tradepost(self, interaction: discord.Interaction):
@@ -593,8 +508,8 @@ class TradePostCommand(commands.Cog):
             )
 
         # Load catalog lazily & safely
-        catalog = _load_catalog()
-        if not catalog:
+        tp_catalog = _load_catalog()
+        if not tp_catalog:
             print("[tradepost] Cannot open UI — catalog failed to load.")
             return await interaction.response.send_message(
                 "Trade Post catalog is unavailable right now. Please try again later.", ephemeral=True
@@ -608,9 +523,10 @@ class TradePostCommand(commands.Cog):
         # 2) Open the DM session with interactive view
         try:
             # Start the session ONCE here (do not restart it inside the view)
-            session_manager.start_session(interaction.user.id)
+            session_manager.start_session(interaction.user.id, kind="tradepost")
 
-            view = TradePostView(self.bot, interaction.user.id, catalog)
+            view = TradePostView(self.bot, interaction.user.id, tp_catalog)
+            session_manager.attach_view(interaction.user.id, view)
             embed = discord.Embed(
                 title="Ironfang Trade Post",
                 description=(
@@ -637,6 +553,40 @@ class TradePostCommand(commands.Cog):
                 "Something went wrong opening your DM session.", ephemeral=True
             )
 
+    @app_commands.command(name="tradepost-add", description="Add an item to your open Trade Post cart by name.")
+    @app_commands.describe(item="Start typing an item name", qty="How many")
+    async def tradepost_add(self, interaction: discord.Interaction, item: str, qty: app_commands.Range[int, 1, 999999]):
+        view = session_manager.get_view(interaction.user.id)
+        if not isinstance(view, TradePostView):
+            return await interaction.response.send_message("Start a session with /tradepost first.", ephemeral=True)
+
+        index = get_search_index(view.catalog)
+        entry = index.resolve(item)
+        if entry is None:
+            return await interaction.response.send_message(index.no_match(item), ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            added = await view.add_entry(entry, qty)
+        except Exception as e:
+            print(f"[tradepost] Typed add failed: {e}")
+            added = False
+        if not added:
+            return await interaction.followup.send(f"❌ Could not add **{entry.item}** to your cart.", ephemeral=True)
+        await interaction.followup.send(f"Added **{entry.item}** x{qty} to your cart.", ephemeral=True)
+
+    @tradepost_add.autocomplete("item")
+    async def tradepost_add_autocomplete(self, interaction: discord.Interaction, current: str):
+        view = session_manager.get_view(interaction.user.id)
+        if isinstance(view, TradePostView):
+            cat, mode = view.catalog, view.state.get("mode", "Buy")
+        else:
+            cat, mode = _load_catalog(), "Buy"
+        if cat is None:
+            return []
+        price_of = (lambda e: e.sell) if mode == "Sell" else (lambda e: e.buy)
+        return [app_commands.Choice(name=name, value=value) for name, value in suggest(cat, current, price_of)]
+
 async def setup(bot):
     await bot.add_cog(TradePostCommand(bot))
     print("[tradepost] Cog loaded and command registered")
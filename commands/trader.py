@@ -4,8 +4,11 @@ from discord import app_commands, ui
 import json
 import os
 import asyncio
-from utils import session_manager, variant_utils
-from utils import trader_logger
+from utils import session_manager, session_start, variant_utils, catalog
+from utils import config, trader_logger, order_utils, order_lifecycle, deferred, outbound
+from handlers import component_router, reaction_dispatcher
+from utils.cart_render import CartMessageScheduler
+from utils.search_index import get_search_index, suggest
 
 import re
 
@@ -17,76 +20,12 @@ def extract_label_and_emoji(text):
         return label, emoji
     return text, None
     
-config = json.loads(os.environ.get("CONFIG_JSON"))
+settings = config.get()
 
 TRADER_TIMEOUT_SECONDS = 259200  # 3 days
 
-PRICE_FILE = os.path.join("data", "Final price list.json")
-with open(PRICE_FILE, "r") as f:
-    PRICE_DATA = json.load(f)["categories"]
-
-def get_categories():
-    return list(PRICE_DATA.keys())
-
-def get_subcategories(category):
-    """
-    Returns first-level subcategories under a category.
-    Handles nested structures like Clothes > Backpacks > Assault Bag.
-    """
-    sub_data = PRICE_DATA.get(category, {})
-    return [key for key, val in sub_data.items() if isinstance(val, dict)]
-
-def get_items_in_subcategory(category, subcategory):
-    """
-    Returns a list of actual item names from a subcategory.
-    Handles deeply nested structures (e.g. Clothes > Backpacks > Assault Bag).
-    """
-    if subcategory:
-        sub_data = PRICE_DATA.get(category, {}).get(subcategory, {})
-    else:
-        sub_data = PRICE_DATA.get(category, {})
-
-    item_list = []
-    for key, val in sub_data.items():
-        if isinstance(val, dict):
-            # Direct item with prices
-            if all(isinstance(v, (int, float)) for v in val.values()):
-                item_list.append(key)
-            # Nested items (e.g., variants)
-            else:
-                for nested_key, nested_val in val.items():
-                    if isinstance(nested_val, dict) and all(isinstance(v, (int, float)) for v in nested_val.values()):
-                        item_list.append(nested_key)
-    return item_list
-
-def get_variants(category, subcategory, item):
-    try:
-        entry = PRICE_DATA[category]
-        if subcategory:
-            entry = entry[subcategory]
-        if item in entry:
-            # Direct variant dict (e.g., {"Default": 500})
-            return [k for k, v in entry[item].items() if isinstance(v, (int, float))]
-        else:
-            # Handle nested dict (e.g., Clothes > Backpacks > Assault Bag > Black)
-            for parent_key, val in entry.items():
-                if isinstance(val, dict) and item in val:
-                    return [k for k, v in val[item].items() if isinstance(v, (int, float))]
-        return []
-    except (KeyError, TypeError):
-        return []
-
-def get_price(category, subcategory, item, variant):
-    try:
-        entry = PRICE_DATA[category]
-        if subcategory:
-            entry = entry[subcategory]
-        entry = entry.get(item, {})
-        if isinstance(entry, dict):
-            return entry.get(variant)
-        return None
-    except (KeyError, TypeError):
-        return None
+def _cart_line(line):
+    return f"• {line.item} ({line.variant}) x{line.quantity} = ${line.subtotal:,}"
 
 class QuantityModal(ui.Modal, title="Enter Quantity"):
     quantity = ui.TextInput(label="Quantity", placeholder="e.g. 2", max_length=3)
@@ -100,7 +39,7 @@ class QuantityModal(ui.Modal, title="Enter Quantity"):
         self.item = item
         self.variant = variant
         self.view_ref = view_ref
-        self.price = get_price(category, subcategory, item, variant)
+        self.price = view_ref.catalog.buy_price(category, subcategory, item, variant)
 
     async def on_submit(self, interaction: discord.Interaction):  # ← THIS MUST BE INDENTED INSIDE
         try:
@@ -120,28 +59,16 @@ class QuantityModal(ui.Modal, title="Enter Quantity"):
             "subtotal": subtotal
         }
 
-        session_manager.add_item(self.user_id, item_data)
-
-        try:
-            await interaction.message.delete()
-        except Exception:
-            pass
-
-        await interaction.response.defer()
+        async with self.view_ref.lock:
+            session_manager.add_item(self.user_id, item_data)
 
-        items = session_manager.get_session_items(self.user_id)
-        lines = [f"• {item['item']} ({item['variant']}) x{item['quantity']} = ${item['subtotal']:,}" for item in items]
-        cart_total = sum(item["subtotal"] for item in items)
-        summary = "\n".join(lines)
-        summary += f"\n\n🛒 Cart Total: ${cart_total:,}"
+            try:
+                await interaction.message.delete()
+            except Exception:
+                pass
 
-        try:
-            if self.view_ref and self.view_ref.cart_message:
-                await self.view_ref.cart_message.edit(content=summary)
-            else:
-                self.view_ref.cart_message = await interaction.followup.send(content=summary)
-        except Exception:
-            self.view_ref.cart_message = await interaction.followup.send(content=summary)
+            await interaction.response.defer()
+            self.view_ref.update_cart_message()
 
         # 📦 Send item added confirmation
         confirm_msg = await interaction.followup.send(
@@ -150,14 +77,41 @@ class QuantityModal(ui.Modal, title="Enter Quantity"):
         )
         
         # 🧹 Clean up message after 5 seconds
-        async def cleanup():
-            await asyncio.sleep(5)
-            try:
-                await confirm_msg.delete()
-            except Exception as e:
-                print(f"[Add Confirmation Cleanup Error] {e}")
-        
-        asyncio.create_task(cleanup())
+        await deferred.delete_later(confirm_msg, 5)
+
+class BulkOrderModal(ui.Modal, title="Bulk Order"):
+    order = ui.TextInput(
+        label="One item per line",
+        style=discord.TextStyle.paragraph,
+        placeholder="Ammo1:22LR x3\nAssault Bag:Black x1\n9x19 x10",
+        max_length=4000
+    )
+
+    def __init__(self, view_ref):
+        super().__init__()
+        self.view_ref = view_ref
+
+    async def on_submit(self, interaction: discord.Interaction):
+        view = self.view_ref
+        result, errors = order_utils.parse_order_lines(self.order.value, mode="buy", cat=view.catalog)
+        items = (result or {}).get("items", [])
+
+        lines = []
+        if items:
+            lines.append(f"📦 Added {len(items)} line(s) for ${result['total']:,}.")
+        if errors:
+            lines.append(f"⚠️ {len(errors)} line(s) skipped:")
+            lines.extend(f"• {e}" for e in errors)
+        text = "\n".join(lines) or "Nothing to add."
+        await interaction.response.send_message(text[:2000], ephemeral=True)
+
+        if items:
+            async with view.lock:
+                session_manager.add_items(view.user_id, [
+                    {k: i[k] for k in ("category", "subcategory", "item", "variant", "quantity", "subtotal")}
+                    for i in items
+                ])
+                view.update_cart_message()
 
 class BackButton(discord.ui.Button):
     def __init__(self, bot, user_id, current_stage, selected, view_ref):
@@ -204,32 +158,47 @@ class DynamicDropdown(discord.ui.Select):
                 super().__init__(placeholder=placeholder, options=options)
 
             def get_options(self):
+                # Option lists only depend on the catalog snapshot and the path so far, so they
+                # are built once per snapshot and reused on every stage change / Back press.
+                if self.stage == "category":
+                    path = ()
+                elif self.stage == "subcategory":
+                    path = (self.selected.get("category"),)
+                elif self.stage == "item":
+                    path = (self.selected.get("category"), self.selected.get("subcategory"))
+                else:
+                    path = (self.selected.get("category"), self.selected.get("subcategory"), self.selected.get("item"))
+                key = ("trader", self.stage) + path
+                return list(self.view_ref.catalog.cached(key, lambda: tuple(self._build_options())))
+
+            def _build_options(self):
+                cat = self.view_ref.catalog
                 if self.stage == "category":
                     options = []
-                    for c in get_categories()[:25]:
+                    for c in cat.categories()[:25]:
                         label, emoji = extract_label_and_emoji(c)
                         options.append(discord.SelectOption(label=label, value=c, emoji=emoji))
                     return options
                 if self.stage == "subcategory":
-                    subcats = get_subcategories(self.selected["category"])
+                    subcats = cat.subcategories(self.selected["category"])
                     return [discord.SelectOption(label=s, value=s) for s in subcats[:25]]
                 if self.stage == "item":
-                    items = get_items_in_subcategory(self.selected["category"], self.selected.get("subcategory"))
+                    items = cat.items(self.selected["category"], self.selected.get("subcategory"))
                     options = []
                     for i in items[:25]:
-                        variants = get_variants(self.selected["category"], self.selected.get("subcategory"), i)
+                        variants = cat.variants(self.selected["category"], self.selected.get("subcategory"), i)
                         if len(variants) == 1 and variants[0] == "Default":
-                            price = get_price(self.selected["category"], self.selected.get("subcategory"), i, "Default") or 0
+                            price = cat.buy_price(self.selected["category"], self.selected.get("subcategory"), i, "Default") or 0
                             label = f"{i} (${price:,})"
                             options.append(discord.SelectOption(label=label, value=json.dumps({"item": i, "variant": "Default"})))
                         else:
                             options.append(discord.SelectOption(label=f"{i} (select variant...)", value=json.dumps({"item": i, "variant": None})))
                     return options
                 if self.stage == "variant":
-                    variants = get_variants(self.selected["category"], self.selected.get("subcategory"), self.selected["item"])
+                    variants = cat.variants(self.selected["category"], self.selected.get("subcategory"), self.selected["item"])
                     options = []
                     for v in variants[:25]:
-                        price = get_price(self.selected['category'], self.selected.get('subcategory'), self.selected['item'], v) or 0
+                        price = cat.buy_price(self.selected['category'], self.selected.get('subcategory'), self.selected['item'], v) or 0
                         label_text = v.split("<")[0].strip()
                         emoji = None
                         if "<" in v and ">" in v:
@@ -284,29 +253,45 @@ class DynamicDropdown(discord.ui.Select):
                     new_view.add_item(BackButton(self.bot, self.user_id, dropdown.stage, self.selected, self.view_ref))
                 await select_interaction.response.edit_message(content="Select an option:", view=new_view)
 
-class TraderView(discord.ui.View):
+class TraderView(session_manager.TracksSessionMessages, discord.ui.View):
     def __init__(self, bot, user_id):
         super().__init__(timeout=TRADER_TIMEOUT_SECONDS)
         self.bot = bot
         self.user_id = user_id
+        self.catalog = catalog.get_catalog()  # pinned: this cart keeps its prices across reloads
+        self.lock = session_manager.session_lock(user_id)
+        self.cart_updates = CartMessageScheduler(self._cart_text, self._write_cart)
         self.cart_message = None
         self.ui_message = None
 
-    async def update_cart_message(self, interaction):
+    async def add_entry(self, entry, quantity):
+        """Adds a catalog row straight to the cart (used by /trader-add)."""
+        async with self.lock:
+            session_manager.add_item(self.user_id, {
+                "category": entry.category,
+                "subcategory": entry.subcategory,
+                "item": entry.item,
+                "variant": entry.variant,
+                "quantity": quantity,
+                "subtotal": entry.buy * quantity
+            })
+            self.update_cart_message()
+
+    def update_cart_message(self):
+        """Queue a cart refresh; quick successive changes are written as one edit."""
+        self.cart_updates.schedule()
+
+    def _cart_text(self):
         items = session_manager.get_session_items(self.user_id)
         if not items:
-            text = "Your cart is currently empty."
-        else:
-            total = sum(item['subtotal'] for item in items)
-            lines = [f"• {item['item']} ({item['variant']}) x{item['quantity']} = ${item['subtotal']:,}" for item in items]
-            summary = "\n".join(lines)
-            summary += f"\n\nTotal: ${total:,}"
-            text = summary
+            return "Your cart is currently empty."
+        return items.render(_cart_line) + f"\n\n🛒 Cart Total: ${items.total:,}"
 
+    async def _write_cart(self, text):
         if self.cart_message:
             await self.cart_message.edit(content=text)
-        else:
-            self.cart_message = await interaction.followup.send(content=text)
+        elif self.ui_message:
+            self.cart_message = await self.ui_message.channel.send(content=text)
 
     @discord.ui.button(label="Add Item", style=discord.ButtonStyle.primary)
     async def handle_add_item(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -322,52 +307,20 @@ class TraderView(discord.ui.View):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("Not your session.")
 
-        items = session_manager.get_session_items(self.user_id)
-        if not items:
-            return await interaction.response.send_message("Cart is already empty.")
-
-        removed_item = items.pop()
-        session_manager.set_session_items(self.user_id, items)  # update the session
-
-        # Update cart display
-        if not items:
-            message = "🗑️ Your cart is now empty."
-            try:
-                if self.cart_message:
-                    await self.cart_message.edit(content=message)
-                else:
-                    self.cart_message = await interaction.followup.send(content=message)
-            except:
-                self.cart_message = await interaction.followup.send(content=message)
-
-            await interaction.response.send_message(f"🗑️ Removed {removed_item['item']}.")
-            try:
-                await asyncio.sleep(5)
-                deletion_target = await interaction.original_response()
-                await deletion_target.delete()
-            except Exception as e:
-                print(f"[Remove Empty Cart Msg Cleanup Fail] {e}")
-            return
-
-        lines = [f"• {item['item']} ({item['variant']}) x{item['quantity']} = ${item['subtotal']:,}" for item in items]
-        cart_total = sum(item["subtotal"] for item in items)
-        summary = "\n".join(lines) + f"\n\n🛒 Cart Total: ${cart_total:,}"
+        async with self.lock:
+            items = session_manager.get_session_items(self.user_id)
+            if not items:
+                return await interaction.response.send_message("Cart is already empty.")
 
-        await interaction.response.send_message(f"🗑️ Removed {removed_item['item']}.")  # respond ONCE
+            removed_item = session_manager.remove_last_item(self.user_id)
+            self.update_cart_message()
 
-        try:
-            if self.cart_message:
-                await self.cart_message.edit(content=summary)
-            else:
-                self.cart_message = await interaction.followup.send(content=summary)
-        except:
-            self.cart_message = await interaction.followup.send(content=summary)
+        await interaction.response.send_message(f"🗑️ Removed {removed_item.item}.")  # respond ONCE
 
         # Schedule delete of removal notice (the response message)
         try:
-            await asyncio.sleep(6)
             deletion_target = await interaction.original_response()
-            await deletion_target.delete()
+            await deferred.delete_later(deletion_target, 6)
         except Exception as e:
             print(f"[Remove Item Msg Cleanup Fail] {e}")
 
@@ -376,44 +329,55 @@ class TraderView(discord.ui.View):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("Mind your own order!")
 
-        items = session_manager.get_session_items(self.user_id)
-        if not items:
-            return await interaction.response.send_message("Your cart is empty.")
+        async with self.lock:
+            items = session_manager.get_session_items(self.user_id)
+            if not items:
+                return await interaction.response.send_message("Your cart is empty.")
 
-        total = sum(item["subtotal"] for item in items)
-        lines = [f"• {item['item']} ({item['variant']}) x{item['quantity']} = ${item['subtotal']:,}" for item in items]
-        summary = "\n".join(lines) + f"\n\nTotal: ${total:,}"
+            summary = items.render(_cart_line) + f"\n\nTotal: ${items.total:,}"
 
-        trader_channel = self.bot.get_channel(config["trader_orders_channel_id"])
-        if not trader_channel:
-            return await interaction.response.send_message("Trader channel not found.")
+            trader_channel = config.channel(self.bot, settings.trader_orders_channel_id)
 
-        order_message = await trader_channel.send(
-            f"<@&{config['trader_role_id']}> **a new order is ready to be processed!**\n\n"
-            f"{interaction.user.mention} has submitted a new order:\n\n"
-            f"{summary}\n\n"
-            f"Please confirm this message with a ✅ when the order is ready"
-        )
-        await order_message.add_reaction("🔴")
+            if session_manager.claim_submission(self.user_id) is None:
+                return await interaction.response.send_message("This order has already been submitted.")
+
+            try:
+                order_message = await outbound.send(
+                    trader_channel, outbound.CRITICAL,
+                    content=(
+                        f"{config.role_mention(self.bot, settings.trader_role_id)} **a new order is ready to be processed!**\n\n"
+                        f"{interaction.user.mention} has submitted a new order:\n\n"
+                        f"{summary}\n\n"
+                        f"Please confirm this message with a ✅ when the order is ready"
+                    )
+                )
+            except Exception:
+                session_manager.release_submission(self.user_id)
+                raise
+            outbound.add_reaction(order_message, "🔴")
+            await order_lifecycle.open_order(
+                self.user_id, "trader", order_message, total=items.total, items=items.to_items()
+            )
 
-        await interaction.response.send_message("✅ **Your order has been submitted to the trader channel. Please stand by...**")
+            await interaction.response.send_message("✅ **Your order has been submitted to the trader channel. Please stand by...**")
 
-        try:
-            await interaction.message.delete()
-        except:
-            pass
-        session = session_manager.get_session(interaction.user.id)
-        for msg_id in session.get("cart_messages", [])[1:]:
+            self.cart_updates.cancel()
+            session = session_manager.get_session(interaction.user.id)
+            cart_messages = session.get("cart_messages", [])
+            session_manager.clear_session(interaction.user.id)
+            session_manager.end_session(self.user_id)
+
+        # The button's own message is also the first recorded one; delete each message once
+        stale = dict.fromkeys([interaction.message.id, *cart_messages])
+        for msg_id in stale:
             try:
-                msg = await interaction.channel.fetch_message(msg_id)
-                await msg.delete()
+                await interaction.channel.get_partial_message(msg_id).delete()
             except:
                 continue
-        session_manager.clear_session(interaction.user.id)
-        session_manager.end_session(self.user_id)
 
+        # Only a view left on a message that still exists needs detaching
         try:
-            if self.ui_message:
+            if self.ui_message and self.ui_message.id not in stale:
                 await self.ui_message.edit(view=None)
         except Exception as e:
             print(f"[UI Cleanup - Submit] {e}")
@@ -423,298 +387,316 @@ class TraderView(discord.ui.View):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("Mind your own order!")
 
-        session_manager.end_session(self.user_id)
+        async with self.lock:
+            self.cart_updates.cancel()
+            session_manager.end_session(self.user_id)
         await interaction.response.send_message("❌ Order canceled. This session will auto-close in 10 seconds...")
 
-        # ⏳ Wait before cleanup
-        await asyncio.sleep(10)
-
-        # ✅ Wipe all bot messages in DM
+        # ✅ Wipe all bot messages in DM after 10 seconds
         try:
-            user_dm = await interaction.user.create_dm()
-            async for msg in user_dm.history(limit=100):
-                if msg.author == self.bot.user:
-                    try:
-                        await msg.delete()
-                    except:
-                        pass
+            await deferred.cleanup_dms_later(interaction.user.id, 10)
         except Exception as e:
             print(f"[Full DM Wipe Error - Cancel Order] {e}")
 
         session_manager.clear_session(interaction.user.id)
 
+# Phase 2/3: staff pick where a paid order was left
+STORAGE_OPTIONS = [discord.SelectOption(label=f"Shed {i}", value=f"shed{i}") for i in range(1, 5)] + \
+                  [discord.SelectOption(label=f"Container {i}", value=f"container{i}") for i in range(1, 7)] + \
+                  [discord.SelectOption(label="Skip", value="skip")]
+
+
+def _storage_view(order_id):
+    return component_router.layout(ui.Select(
+        custom_id=component_router.custom_id("storage", order_id),
+        placeholder="Select a storage unit or skip",
+        options=STORAGE_OPTIONS
+    ))
+
+
+def _pickup_view(order_id):
+    return component_router.layout(ui.Button(
+        label="✅ Confirm Pickup",
+        style=discord.ButtonStyle.success,
+        custom_id=component_router.custom_id("pickup", order_id)
+    ))
+
+
+async def on_storage_selected(interaction: discord.Interaction, order_id: str):
+    bot = interaction.client
+    order = order_lifecycle.get(order_id)
+    if order is None or order["status"] != order_lifecycle.PAID:
+        return await interaction.response.send_message("This order has already been handled.", ephemeral=True)
+
+    choice = interaction.data["values"][0]
+    print(f"[PHASE 2/3] Storage option selected: {choice}")
+
+    if choice != "skip":
+        return await interaction.response.send_modal(ComboInputModal(order_id, choice))
+
+    # Acknowledge first, then record the skip and edit the notice through the interaction
+    await interaction.response.defer()
+    if await order_lifecycle.advance(order, order_lifecycle.PICKED_UP, storage=None, handled_by=interaction.user.id) is None:
+        return await interaction.followup.send("This order has already been handled.", ephemeral=True)
+    try:
+        await interaction.edit_original_response(
+            content=interaction.message.content + f"\n\n✅ Payment confirmed by {interaction.user.mention}",
+            view=None
+        )
+    except Exception as e:
+        print(f"[PHASE 2/3] Could not update confirmation message: {e}")
+    await interaction.followup.send("✅ Skip acknowledged.", ephemeral=True)
+
+    try:
+        player = bot.get_user(order["user_id"]) or await bot.fetch_user(order["user_id"])
+        await player.send(
+            content=(
+                "https://cdn.discordapp.com/attachments/1351365150287855739/1373723922809491476/"
+                "Trader2-ezgif.com-video-to-gif-converter.gif\n\n"
+                "📦 **Your order has been completed, no storage was assigned this time.**\n"
+                "**Thanks for using Trader! Stay frosty survivor!**❄️"
+            )
+        )
+        await deferred.cleanup_dms_later(player.id, 60)
+    except Exception as e:
+        print(f"[PHASE 2/3] Skip DM Cleanup Error: {e}")
+
+
+class ComboInputModal(ui.Modal, title="Enter 4-digit Combo"):
+    combo = ui.TextInput(label="4-digit combo", placeholder="e.g. 1234", max_length=4, min_length=4)
+
+    def __init__(self, order_id, unit):
+        super().__init__()
+        self.order_id = order_id
+        self.unit = unit
+
+    async def on_submit(self, interaction: discord.Interaction):
+        bot = interaction.client
+        order = order_lifecycle.get(self.order_id)
+        if order is None or order["status"] != order_lifecycle.PAID:
+            return await interaction.response.send_message("This order has already been handled.", ephemeral=True)
+        try:
+            player = bot.get_user(order["user_id"]) or await bot.fetch_user(order["user_id"])
+            dm = await player.send(
+                f"{player.mention}, 📦**your order is ready for pick up!**\n"
+                f"Please proceed to **{self.unit.upper()}** and use code **{self.combo.value}** to unlock.\n"
+                f"**Please leave the lock with the same code when done!**🔐\n",
+                view=_pickup_view(self.order_id)
+            )
+            await order_lifecycle.advance(order, order_lifecycle.STORED, storage=self.unit, handled_by=interaction.user.id)
+            await order_lifecycle.link(order, order_lifecycle.PICKUP_DM, dm)
+            await interaction.response.send_message("✅ **Combo submitted. Player has been notified.**🔒")
+        except Exception as e:
+            print(f"[PHASE 2/3] Combo DM Error: {e}")
+            return await interaction.response.send_message("❌ Failed to notify player.", ephemeral=True)
+
+        try:
+            await outbound.edit(
+                interaction.message,
+                content=interaction.message.content + f"\n\n✅ Payment confirmed by {interaction.user.mention}",
+                view=None
+            )
+        except Exception as e:
+            print(f"[PHASE 2/3] Could not update confirmation message: {e}")
+
+
+# Phase 4: Player confirms pickup complete (now using button instead of reaction)
+async def on_pickup_confirmed(interaction: discord.Interaction, order_id: str):
+    bot = interaction.client
+    order = order_lifecycle.get(order_id)
+    if order is None:
+        return await interaction.response.send_message("This pickup has already been confirmed.", ephemeral=True)
+    if interaction.user.id != order["user_id"]:
+        return await interaction.response.send_message("You're not the assigned player.", ephemeral=True)
+
+    # Acknowledge first; the state write and the messages below follow through the interaction
+    await interaction.response.defer()
+    if await order_lifecycle.advance(order, order_lifecycle.PICKED_UP) is None:
+        return await interaction.followup.send("This pickup has already been confirmed.", ephemeral=True)
+    unit = order.get("storage") or ""
+
+    # ✅ Edit the original DM message to show confirmation with GIF
+    try:
+        await interaction.edit_original_response(
+            content=(
+                "https://cdn.discordapp.com/attachments/1351365150287855739/1373723922809491476/"
+                "Trader2-ezgif.com-video-to-gif-converter.gif\n\n"
+                "✅ All set, thanks for using Trader! Stay frosty survivor!❄️"
+            ),
+            view=None
+        )
+    except Exception as e:
+        print(f"[PHASE 4] Failed to edit message: {e}")
+
+    # ✅ Send message to trader_orders_channel_id (NOT payout)
+    try:
+        orders_channel = config.channel(bot, settings.trader_orders_channel_id)
+        await outbound.send(
+            orders_channel,
+            content=f"{config.role_mention(bot, settings.trader_role_id)} {interaction.user.mention} cleared **{unit.upper()}**!🔓"
+        )
+        print(f"[PHASE 4] ✅ Trader Orders message sent.")
+    except Exception as e:
+        print(f"[PHASE 4] Failed to notify trader orders channel: {e}")
+
+    # ✅ Acknowledge to user
+    await interaction.followup.send("✅ **Thanks! Your pickup has been confirmed.**")
+
+    # ⏳ Delay cleanup to ensure visibility
+    try:
+        await deferred.cleanup_dms_later(interaction.user.id, 12)
+    except Exception as e:
+        print(f"[PHASE 4] DM Cleanup Error: {e}")
+
+
 class TraderCommand(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.awaiting_payment = {}
-        self.awaiting_storage = {}
-        self.awaiting_pickup = {}
-        self.confirmed_orders = set()
-        self.confirmed_payments = set()
-
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        print(f"[Reaction Detected] emoji={reaction.emoji} message_id={reaction.message.id} user={user}")
-    
-        if user.bot or not reaction.message:
+
+    # Phase 1: Admin confirms order
+    async def _confirm_order(self, payload: discord.RawReactionActionEvent, order):
+        admin = payload.member
+        if not admin or admin.bot:
             return
-    
-        message = reaction.message
-        emoji = str(reaction.emoji)
-    
-        # Phase 1: Admin confirms order
-        if message.channel.id == config["trader_orders_channel_id"] and emoji == "✅":
-            if (
-                "Please confirm this message with a ✅ when the order is ready" in message.content
-                and message.id not in self.awaiting_payment
-                and message.id not in self.confirmed_orders
-            ):
-                self.confirmed_orders.add(message.id)
-                await message.clear_reaction("🔴")
-                await message.add_reaction("✅")
-                new_content = f"{message.content}\n\nOrder confirmed by {user.mention}"
-                await message.edit(content=new_content)
-    
-                mentioned_users = message.mentions
-                total = None
-                for line in message.content.splitlines():
-                    if "Total:" in line:
-                        total = line.split("$")[-1].replace(",", "")
-                        break
-    
-                if mentioned_users:
-                    player = mentioned_users[0]
-                    dm = await player.send(
-                        f"📦 **Your order has been processed!**\n\n"
-                        f"Please make a payment to {user.mention} for **${total}**.\n"
-                        f"Make sure to send payment in <#{config['economy_channel_id']}> (use /pay + copy/paste command below).\n\n"
-                        f"**Once paid, react to this message with a** ✅ **to confirm.**"
-                    )
-                    await dm.add_reaction("⚠️")
-                    self.awaiting_payment[dm.id] = {
-                        "player": player,
-                        "admin": user,
-                        "total": total,
-                        "original_message": message
-                    }
-    
-                    await user.send(f"user:{user.id} amount:{total}")
-    
-                    log_data = trader_logger.load_reaction_log()
-                    admin_id = str(user.id)
-                    log_data[admin_id] = log_data.get(admin_id, 0) + 1
-                    trader_logger.save_reaction_log(log_data)
-    
-        # Phase 2: Player confirms payment
-        elif emoji == "✅" and reaction.message.id in self.awaiting_payment:
-            if reaction.message.id in self.confirmed_payments:
-                return  # Already confirmed
-            self.confirmed_payments.add(reaction.message.id)
-    
-            print(f"[✅ Payment Reaction] Player {user} reacted to message {reaction.message.id}")
-            data = self.awaiting_payment.pop(reaction.message.id)
-    
-            try:
-                if not isinstance(reaction.message.channel, discord.DMChannel):
-                    await reaction.message.clear_reaction("🔴")
-            except discord.Forbidden:
-                pass
-    
-            await reaction.message.add_reaction("✅")
-            await reaction.message.edit(content=reaction.message.content + "\n\n✅ Payment confirmed! Please stand by.")
-    
-            trader_channel = self.bot.get_channel(config["trader_orders_channel_id"])
-    
-            # Step 1: Send MP4 (Ka-Ching)
-            await trader_channel.send("https://cdn.discordapp.com/attachments/1351365150287855739/1374120175049248940/ezgif.com-resize_2.gif")
-    
-            # Step 2: Confirm message with trader role mention
-            payment_notice = await trader_channel.send(
-                content=(
-                    f"<@&{config['trader_role_id']}> {data['player'].mention} **has confirmed payment.** 💵\n"
-                    "**Please select a storage unit below:**"
-                )
-            )
-    
-            print(f"[PHASE 2] Posted payment confirmation message with ID: {payment_notice.id}")
-    
-            class StorageSelect(ui.Select):
-                def __init__(self, bot, player, confirm_message):
-                    options = [discord.SelectOption(label=f"Shed {i}", value=f"shed{i}") for i in range(1, 5)] + \
-                              [discord.SelectOption(label=f"Container {i}", value=f"container{i}") for i in range(1, 7)] + \
-                              [discord.SelectOption(label="Skip", value="skip")]
-                    super().__init__(placeholder="Select a storage unit or skip", options=options)
-                    self.bot = bot
-                    self.player = player
-                    self.confirm_message = confirm_message
-    
-                async def callback(self, interaction: discord.Interaction):
-                    choice = self.values[0]
-                    print(f"[PHASE 2/3] Storage option selected: {choice}")
-                    try:
-                        await self.confirm_message.edit(
-                            content=self.confirm_message.content + f"\n\n✅ Payment confirmed by {interaction.user.mention}",
-                            view=None
-                        )
-                    except Exception as e:
-                        print(f"[PHASE 2/3] Could not update confirmation message: {e}")
-    
-                    if choice == "skip":
-                        try:
-                            msg = await self.player.send(
-                                content=(
-                                    "https://cdn.discordapp.com/attachments/1351365150287855739/1373723922809491476/"
-                                    "Trader2-ezgif.com-video-to-gif-converter.gif\n\n"
-                                    "📦 **Your order has been completed, no storage was assigned this time.**\n"
-                                    "**Thanks for using Trader! Stay frosty survivor!**❄️"
-                                )
-                            )
-                            await asyncio.sleep(60)
-                            async for m in self.player.dm_channel.history(limit=100):
-                                if m.author == self.bot.user:
-                                    await m.delete()
-                        except Exception as e:
-                            print(f"[PHASE 2/3] Skip DM Cleanup Error: {e}")
-                        return await interaction.response.send_message("✅ Skip acknowledged.", ephemeral=True)
-    
-                    await interaction.response.send_modal(ComboInputModal(self.bot, self.player, choice))
-    
-            try:
-                dropdown = StorageSelect(self.bot, data["player"], payment_notice)
-                view = ui.View(timeout=TRADER_TIMEOUT_SECONDS)
-                view.add_item(dropdown)
-                await payment_notice.edit(view=view)
-                print(f"[PHASE 2/3] Dropdown view attached to message ID: {payment_notice.id}")
-            except Exception as e:
-                print("[PHASE 2/3 DROPDOWN ERROR]")
-                import traceback
-                traceback.print_exc()
-        
-            class ComboInputModal(ui.Modal, title="Enter 4-digit Combo"):
-                combo = ui.TextInput(label="4-digit combo", placeholder="e.g. 1234", max_length=4, min_length=4)
-        
-                def __init__(self, bot, player, unit):
-                    super().__init__()
-                    self.bot = bot
-                    self.player = player
-                    self.unit = unit
-        
-                async def on_submit(self, interaction: discord.Interaction):
-                    try:
-                        dm = await self.player.send(
-                            f"{self.player.mention}, 📦**your order is ready for pick up!**\n"
-                            f"Please proceed to **{self.unit.upper()}** and use code **{self.combo.value}** to unlock.\n"
-                            f"**Please leave the lock with the same code when done!**🔐\n"
-                        )
-                        view = PickupConfirmView(self.bot, self.player, self.unit, dm)
-                        await dm.edit(view=view)
-                        self.bot.get_cog("TraderCommand").awaiting_pickup[dm.id] = {
-                            "player": self.player,
-                            "unit": self.unit
-                        }
-                        await interaction.response.send_message("✅ **Combo submitted. Player has been notified.**🔒")
-                    except Exception as e:
-                        print(f"[PHASE 2/3] Combo DM Error: {e}")
-                        await interaction.response.send_message("❌ Failed to notify player.", ephemeral=True)
-        
+        if await order_lifecycle.advance(order, order_lifecycle.CONFIRMED, confirmed_by=admin.id) is None:
+            return
+
+        message = order_lifecycle.message_ref(self.bot, order, order_lifecycle.ORDER_POST)
+        outbound.clear_reaction(message, "🔴")
+        outbound.add_reaction(message, "✅")
+        await order_lifecycle.append_text(self.bot, order, order_lifecycle.ORDER_POST, f"\n\nOrder confirmed by {admin.mention}")
+
+        total = order["total"]
+        player = self.bot.get_user(order["user_id"]) or await self.bot.fetch_user(order["user_id"])
+        dm = await player.send(
+            f"📦 **Your order has been processed!**\n\n"
+            f"Please make a payment to {admin.mention} for **${total}**.\n"
+            f"Make sure to send payment in <#{settings.economy_channel_id}> (use /pay + copy/paste command below).\n\n"
+            f"**Once paid, react to this message with a** ✅ **to confirm.**"
+        )
+        await dm.add_reaction("⚠️")
+        await order_lifecycle.link(order, order_lifecycle.PAYMENT_DM, dm)
+
+        await admin.send(f"user:{admin.id} amount:{total}")
+
+        log_data = trader_logger.load_reaction_log()
+        admin_id = str(admin.id)
+        log_data[admin_id] = log_data.get(admin_id, 0) + 1
+        trader_logger.save_reaction_log(log_data)
+
+    # Phase 2: Player confirms payment
+    async def _confirm_payment(self, payload: discord.RawReactionActionEvent, order):
+        if payload.user_id != order["user_id"]:
+            return
+        if await order_lifecycle.advance(order, order_lifecycle.PAID) is None:
+            return  # Already confirmed
+        print(f"[✅ Payment Reaction] Player {order['user_id']} confirmed order {order['order_id']}")
+
+        outbound.add_reaction(order_lifecycle.message_ref(self.bot, order, order_lifecycle.PAYMENT_DM), "✅")
+        await order_lifecycle.append_text(self.bot, order, order_lifecycle.PAYMENT_DM, "\n\n✅ Payment confirmed! Please stand by.")
+
+        trader_channel = config.channel(self.bot, settings.trader_orders_channel_id)
+
+        # Step 1: Send MP4 (Ka-Ching). It heads the notice below, so it goes at the notice's
+        # priority and is awaited: queued concurrently, the notice could overtake it.
+        try:
+            await outbound.send(trader_channel, outbound.CRITICAL, content="https://cdn.discordapp.com/attachments/1351365150287855739/1374120175049248940/ezgif.com-resize_2.gif")
+        except Exception as e:
+            print(f"[PHASE 2] Ka-Ching GIF failed: {e}")
+
+        # Step 2: Confirm message with trader role mention, carrying the storage dropdown
+        payment_notice = await outbound.send(
+            trader_channel, outbound.CRITICAL,
+            content=(
+                f"{config.role_mention(self.bot, settings.trader_role_id)} <@{order['user_id']}> **has confirmed payment.** 💵\n"
+                "**Please select a storage unit below:**"
+            ),
+            view=_storage_view(order["order_id"])
+        )
+        await order_lifecycle.link(order, order_lifecycle.PAYMENT_NOTICE, payment_notice)
+        print(f"[PHASE 2] Posted payment confirmation message with ID: {payment_notice.id}")
+
+    async def cog_load(self):
+        reaction_dispatcher.on_order_message("trader", order_lifecycle.ORDER_POST, "✅", self._confirm_order)
+        reaction_dispatcher.on_order_message("trader", order_lifecycle.PAYMENT_DM, "✅", self._confirm_payment)
+        component_router.route("storage", on_storage_selected)
+        component_router.route("pickup", on_pickup_confirmed)
+
+        # Reattach carts restored from the session store to their DM messages
+        for user_id, session in session_manager.restored_sessions("trader"):
+            view = TraderView(self.bot, user_id)
+            view.ui_message = session_manager.message_ref(self.bot, session, "ui_message")
+            view.cart_message = session_manager.message_ref(self.bot, session, "cart_message")
             try:
-                dropdown = StorageSelect(self.bot, data["player"], payment_notice)
-                view = ui.View(timeout=TRADER_TIMEOUT_SECONDS)
-                view.add_item(dropdown)
-                await payment_notice.edit(view=view)
-                print(f"[PHASE 2/3] Dropdown view attached to message ID: {payment_notice.id}")
+                await view.ui_message.edit(view=view)
+                session_manager.attach_view(user_id, view)
             except Exception as e:
-                print("[PHASE 2/3 DROPDOWN ERROR]")
-                import traceback
-                traceback.print_exc()
-        
-        # Phase 4: Player confirms pickup complete (now using button instead of reaction)
-        class PickupConfirmView(ui.View):
-            def __init__(self, bot, player, unit, message_to_cleanup):
-                super().__init__(timeout=TRADER_TIMEOUT_SECONDS)
-                self.bot = bot
-                self.player = player
-                self.unit = unit
-                self.message_to_cleanup = message_to_cleanup
-        
-            @ui.button(label="✅ Confirm Pickup", style=discord.ButtonStyle.success)
-            async def confirm_pickup(self, interaction: discord.Interaction, button: discord.ui.Button):
-                if interaction.user.id != self.player.id:
-                    return await interaction.response.send_message("You're not the assigned player.", ephemeral=True)
-            
-                # ✅ Edit the original DM message to show confirmation with GIF
-                try:
-                    await self.message_to_cleanup.edit(
-                        content=(
-                            "https://cdn.discordapp.com/attachments/1351365150287855739/1373723922809491476/"
-                            "Trader2-ezgif.com-video-to-gif-converter.gif\n\n"
-                            "✅ All set, thanks for using Trader! Stay frosty survivor!❄️"
-                        ),
-                        view=None
-                    )
-                except Exception as e:
-                    print(f"[PHASE 4] Failed to edit message: {e}")
-            
-                # ✅ Send message to trader_orders_channel_id (NOT payout)
-                try:
-                    orders_channel = self.bot.get_channel(config["trader_orders_channel_id"])
-                    if orders_channel is None:
-                        print("[PHASE 4] get_channel returned None, trying fetch_channel...")
-                        orders_channel = await self.bot.fetch_channel(config["trader_orders_channel_id"])
-            
-                    await orders_channel.send(
-                        f"<@&{config['trader_role_id']}> {self.player.mention} cleared **{self.unit.upper()}**!🔓"
-                    )
-                    print(f"[PHASE 4] ✅ Trader Orders message sent.")
-                except Exception as e:
-                    print(f"[PHASE 4] Failed to notify trader orders channel: {e}")
-            
-                # ✅ Acknowledge to user
-                await interaction.response.send_message("✅ **Thanks! Your pickup has been confirmed.**")
-            
-                # ⏳ Delay cleanup to ensure visibility
-                await asyncio.sleep(12)
-                try:
-                    async for m in self.player.dm_channel.history(limit=100):
-                        if m.author == self.bot.user:
-                            await m.delete()
-                    print(f"[PHASE 4] Cleaned up bot DMs.")
-                except Exception as e:
-                    print(f"[PHASE 4] DM Cleanup Error: {e}")
+                print(f"[Trader Restore] Dropping session for {user_id}: {e}")
+                session_manager.end_session(user_id)
 
     @app_commands.command(name="trader", description="Start a buying session with the trader.")
     async def trader(self, interaction: discord.Interaction):
-        if interaction.channel.id != config["economy_channel_id"]:
+        if interaction.channel.id != settings.economy_channel_id:
             return await interaction.response.send_message("You must use this command in the #economy channel.")
 
         try:
-            # Step 1: Send the animated GIF
-            gif_msg = await interaction.user.send("https://cdn.discordapp.com/attachments/1371698983604326440/1373359533304582237/ezgif.com-optimize.gif")
-
-            # Step 2: Send boxed session start message
-            start_msg = await interaction.user.send(
-                "┏━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "🛒 **BUYING SESSION STARTED!**\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━┛\n"
-                "**Use the buttons below to add/remove items,\nsubmit, or cancel your order.**"
-            )
+            # Start the session first so the view's messages are recorded in it as they are sent
+            session_manager.start_session(interaction.user.id, kind="trader")
 
-            # Step 3: Send the interactive UI
+            # GIF, banner and buttons go out as one DM, after the command is acknowledged
             view = TraderView(self.bot, interaction.user.id)
-            ui_msg = await interaction.user.send(view=view)
+            ui_msg = await session_start.open_dm(
+                interaction,
+                "🛒 **BUYING SESSION STARTED!**",
+                "**Use the buttons below to add/remove items,\nsubmit, or cancel your order.**",
+                view
+            )
             view.ui_message = ui_msg
-            view.start_message = start_msg  # Optional if still used in cleanup
 
-            # Step 4: Track all messages for cleanup
-            session_manager.start_session(interaction.user.id)
-            session = session_manager.get_session(interaction.user.id)
-            session["cart_messages"] = [gif_msg.id, start_msg.id, ui_msg.id]
-            session["start_msg_id"] = start_msg.id
+            # Track the session message for cleanup
+            session_manager.attach_view(interaction.user.id, view)
+            session_manager.update_session(interaction.user.id, {
+                "cart_messages": [ui_msg.id],
+                "start_msg_id": ui_msg.id
+            })
 
-            await interaction.response.send_message("📬Trader session moved to your DMs.")
+            await session_start.reply(interaction, "📬Trader session moved to your DMs.")
         except Exception as e:
             print(f"[Trader DM Start Error] {e}")
-            await interaction.response.send_message("📬Trader session moved to your DMs.")
+            await session_start.reply(interaction, "📬Trader session moved to your DMs.")
+
+    @app_commands.command(name="trader-add", description="Add an item to your open /trader cart by name.")
+    @app_commands.describe(item="Start typing an item or variant name", qty="How many to add")
+    async def trader_add(self, interaction: discord.Interaction, item: str, qty: app_commands.Range[int, 1, 999]):
+        view = session_manager.get_view(interaction.user.id)
+        if not isinstance(view, TraderView):
+            return await interaction.response.send_message("Start a session with /trader first.", ephemeral=True)
+
+        index = get_search_index(view.catalog)
+        entry = index.resolve(item)
+        if entry is None or entry.buy is None:
+            return await interaction.response.send_message(index.no_match(item), ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await view.add_entry(entry, qty)
+        except Exception as e:
+            print(f"[Trader Add Error] {e}")
+            return await interaction.followup.send("❌ Could not add that item, please try again.", ephemeral=True)
+        await interaction.followup.send(f"📦 Added: **{entry.item} ({entry.variant})** x{qty}", ephemeral=True)
+
+    @app_commands.command(name="trader-bulk", description="Paste a multi-line order into your open /trader cart.")
+    async def trader_bulk(self, interaction: discord.Interaction):
+        view = session_manager.get_view(interaction.user.id)
+        if not isinstance(view, TraderView):
+            return await interaction.response.send_message("Start a session with /trader first.", ephemeral=True)
+        await interaction.response.send_modal(BulkOrderModal(view))
+
+    @trader_add.autocomplete("item")
+    async def trader_add_autocomplete(self, interaction: discord.Interaction, current: str):
+        view = session_manager.get_view(interaction.user.id)
+        cat = view.catalog if isinstance(view, TraderView) else catalog.get_catalog()
+        return [app_commands.Choice(name=name, value=value) for name, value in suggest(cat, current, lambda e: e.buy)]
 
 async def setup(bot):
     await bot.add_cog(TraderCommand(bot))
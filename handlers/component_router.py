@@ -0,0 +1,63 @@
+# handlers/component_router.py
+"""
+custom_id routing for buttons and selects that have to outlive the process.
+
+These components carry a custom_id of the form "<route>:<argument>"
+(usually an order ID). A single on_interaction listener splits off the
+route and calls the handler registered for it, so a press is one dict
+lookup, and presses on messages sent before a restart still work.
+
+Views built with layout() only describe the components. They are stopped
+before they are sent, which keeps discord.py from holding a View object
+per message for them.
+"""
+
+from typing import Awaitable, Callable, Dict
+
+import discord
+from discord import ui
+
+SEPARATOR = ":"
+MAX_CUSTOM_ID = 100  # Discord's limit
+
+Handler = Callable[[discord.Interaction, str], Awaitable[None]]
+
+_ROUTES: Dict[str, Handler] = {}
+
+
+def route(name: str, handler: Handler):
+    """Send presses on components whose custom_id starts with "<name>:" to handler(interaction, argument)."""
+    _ROUTES[name] = handler
+
+
+def custom_id(name: str, argument) -> str:
+    value = f"{name}{SEPARATOR}{argument}"
+    if len(value) > MAX_CUSTOM_ID:
+        raise ValueError(f"custom_id too long: {value}")
+    return value
+
+
+def layout(*items: ui.Item) -> ui.View:
+    """A view holding `items`, for sending only; presses are dispatched by route()."""
+    view = ui.View(timeout=None)
+    for item in items:
+        view.add_item(item)
+    view.stop()
+    return view
+
+
+async def dispatch(interaction: discord.Interaction):
+    if interaction.type is not discord.InteractionType.component:
+        return
+    name, _, argument = (interaction.data or {}).get("custom_id", "").partition(SEPARATOR)
+    handler = _ROUTES.get(name)
+    if handler is None:
+        return
+    try:
+        await handler(interaction, argument)
+    except Exception as e:
+        print(f"[Components] {name} failed for {argument}: {type(e).__name__} - {e}")
+
+
+def setup_component_router(bot):
+    bot.add_listener(dispatch, "on_interaction")
@@ -0,0 +1,99 @@
+# handlers/reaction_dispatcher.py
+"""
+Single entry point for reaction events.
+
+Handlers register a route once, and every raw reaction is resolved to at
+most one of them. Messages recorded against an order (see
+utils/order_lifecycle) are routed by message ID on (order type, message
+role, emoji); anything else falls back to (channel_id, emoji) routes.
+The bot's own reactions are dropped before any lookup. Each route counts
+its calls, errors and time spent.
+"""
+
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import discord
+
+from utils import order_lifecycle
+
+OrderHandler = Callable[[discord.RawReactionActionEvent, dict], Awaitable[None]]
+ChannelHandler = Callable[[discord.RawReactionActionEvent], Awaitable[None]]
+
+
+class Route:
+    __slots__ = ("name", "handler", "calls", "errors", "total", "slowest")
+
+    def __init__(self, name: str, handler):
+        self.name = name
+        self.handler = handler
+        self.calls = self.errors = 0
+        self.total = self.slowest = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.calls * 1000, 2) if self.calls else 0.0,
+            "max_ms": round(self.slowest * 1000, 2)
+        }
+
+
+_ORDER_ROUTES: Dict[Tuple[str, str, str], Route] = {}
+_CHANNEL_ROUTES: Dict[Tuple[int, str], Route] = {}
+_TOTALS = {"events": 0, "unrouted": 0}
+
+
+def on_order_message(order_type: str, role: str, emoji: str, handler: OrderHandler, name: Optional[str] = None):
+    """Route `emoji` on an order's `role` message (e.g. the payment DM) to handler(payload, order)."""
+    _ORDER_ROUTES[(order_type, role, emoji)] = Route(name or f"{order_type}:{role}", handler)
+
+
+def on_channel(channel_id: int, emoji: str, handler: ChannelHandler, name: Optional[str] = None):
+    """Route `emoji` on any other message in `channel_id` to handler(payload)."""
+    _CHANNEL_ROUTES[(channel_id, emoji)] = Route(name or f"channel:{channel_id}", handler)
+
+
+def stats() -> Dict[str, dict]:
+    """Per-route counters plus the number of events seen and left unrouted."""
+    result = {route.name: route.as_dict() for route in (*_ORDER_ROUTES.values(), *_CHANNEL_ROUTES.values())}
+    result["_totals"] = dict(_TOTALS)
+    return result
+
+
+async def dispatch(bot, payload: discord.RawReactionActionEvent):
+    _TOTALS["events"] += 1
+    if payload.user_id == bot.user.id:
+        return
+
+    emoji = str(payload.emoji)
+    found = order_lifecycle.lookup(payload.message_id)
+    if found is not None:
+        order, role = found
+        route = _ORDER_ROUTES.get((order["type"], role, emoji))
+        args = (payload, order)
+    else:
+        route = _CHANNEL_ROUTES.get((payload.channel_id, emoji))
+        args = (payload,)
+    if route is None:
+        _TOTALS["unrouted"] += 1
+        return
+
+    started = time.perf_counter()
+    try:
+        await route.handler(*args)
+    except Exception as e:
+        route.errors += 1
+        print(f"[Reactions] {route.name} failed on message {payload.message_id}: {type(e).__name__} - {e}")
+    finally:
+        elapsed = time.perf_counter() - started
+        route.calls += 1
+        route.total += elapsed
+        if elapsed > route.slowest:
+            route.slowest = elapsed
+
+
+def setup_reaction_dispatcher(bot):
+    @bot.event
+    async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
+        await dispatch(bot, payload)
@@ -0,0 +1,22 @@
+# tasks/catalog_watcher.py
+
+from discord.ext import tasks
+
+from utils import catalog
+
+CATALOG_POLL_SECONDS = 30
+
+
+def start_catalog_watcher(bot):
+    """Polls every registered catalog file and hot-swaps a new snapshot when one changes."""
+    @tasks.loop(seconds=CATALOG_POLL_SECONDS)
+    async def watch_catalogs():
+        for name in catalog.sources():
+            await catalog.reload_if_changed(name)
+
+    @watch_catalogs.before_loop
+    async def before_watch():
+        await bot.wait_until_ready()
+
+    if not watch_catalogs.is_running():
+        watch_catalogs.start()
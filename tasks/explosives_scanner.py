@@ -3,18 +3,42 @@
 import discord
 import json
 import asyncio
+import os
+import time
 from discord.ext import tasks
+from utils import config, order_store, outbound
 from utils.clientStorage import load_file
-import os
+from utils.dedupe import TTLDedupe
 
-EXPLOSIVE_ALERT_CHANNEL_ID = 1172556655150506075
+EXPLOSIVE_ALERT_CHANNEL_ID = config.get().explosive_alert_channel_id
 EXPLOSIVE_KEYWORDS = ["40mm Explosive Grenade", "M79", "Plastic Explosives", "Landmines", "Claymores"]
+PAID_STATUSES = ("paid", "stored", "picked_up")  # an order may move past "paid" between two scans
+SELL_TYPES = ("sell", "tradepost_sell", "selltrader")
+ALERT_TTL = 7 * 24 * 3600  # an order is alerted on at most once a week (i.e. once)
+LAST_SCAN_KEY = "explosives_last_scan"  # order store meta: end of the last completed scan
+# Written outside the bot (not imported into the order store, which only holds the bot's
+# own orders); re-read whenever it changes. Its orders are only checked while
+# younger than ALERT_TTL (or of unknown age), so ones whose alert expired are not alerted again.
 TRADER_ORDER_FILE = "sv-persistent-data/data/trader_orders.json"
 
+def _placed_at(order):
+    """When the order was posted, from its message snowflake, or None if it has none."""
+    message_id = order.get("order_message_id") or str(order.get("order_id", "")).removeprefix("msg_")
+    try:
+        return discord.utils.snowflake_time(int(message_id)).timestamp()
+    except (TypeError, ValueError):
+        return None
+
 class ExplosiveScanner:
     def __init__(self, bot):
         self.bot = bot
-        self.already_alerted = set()  # track message_ids already alerted
+        # order_ids already alerted on; bounded, and kept in the order store across restarts
+        self.already_alerted = TTLDedupe(ALERT_TTL, capacity=5000, persist_as="explosive_alerts")
+        # Only orders paid since the last scan (kept across restarts): an index range scan
+        # instead of re-reading every order each pass. A first start begins from now.
+        last_scan = order_store.get_repository().get_meta(LAST_SCAN_KEY)
+        self.paid_since = float(last_scan) if last_scan else time.time()
+        self.file_mtime = None
         self.task = self.scan_explosives.start()
 
     def cog_unload(self):
@@ -22,38 +46,56 @@ class ExplosiveScanner:
 
     @tasks.loop(minutes=5)
     async def scan_explosives(self):
-        if not os.path.exists(TRADER_ORDER_FILE):
-            return
+        channel = config.channel(self.bot, EXPLOSIVE_ALERT_CHANNEL_ID)
 
+        scan_started = time.time() - 5  # small overlap for in-flight writes; already_alerted drops repeats
+        repo = order_store.get_repository()
         try:
-            data = load_file(TRADER_ORDER_FILE)
+            orders = await asyncio.to_thread(repo.with_status, PAID_STATUSES, self.paid_since)
         except Exception as e:
-            print(f"[ExplosiveScanner] Error loading trader_orders.json: {e}")
+            print(f"[ExplosiveScanner] Error querying paid orders: {e}")
             return
+        orders += await self.changed_file_orders()
 
-        channel = self.bot.get_channel(EXPLOSIVE_ALERT_CHANNEL_ID)
-        if not channel:
-            print(f"[ExplosiveScanner] Alert channel {EXPLOSIVE_ALERT_CHANNEL_ID} not found.")
-            return
+        for user_id, order in orders:
+            if order.get("order_id") in self.already_alerted or order.get("type") in SELL_TYPES:
+                continue
+
+            count = 0
+            for item in order.get("items", []):
+                name = item.get("item", "").lower()
+                qty = int(item.get("quantity", 1))
+                if any(keyword.lower() in name for keyword in EXPLOSIVE_KEYWORDS):
+                    count += qty
+
+            if count >= 3 and await self.already_alerted.claim(order.get("order_id")):
+                user = await self.bot.fetch_user(int(user_id))
+                outbound.send(channel, outbound.COSMETIC, content=f"@everyone stay frosty! {user.mention} has just bought enough boom to waltz through your front door! 💥")
+
+        self.paid_since = scan_started
+        try:
+            await asyncio.to_thread(repo.set_meta, LAST_SCAN_KEY, str(scan_started))
+        except Exception as e:
+            print(f"[ExplosiveScanner] Could not record scan time: {e}")
+
+    async def changed_file_orders(self):
+        """Confirmed, paid orders from trader_orders.json, if it changed since the last read."""
+        try:
+            mtime = os.path.getmtime(TRADER_ORDER_FILE)
+        except OSError:
+            return []
+        if mtime == self.file_mtime:
+            return []
+        try:
+            data = await asyncio.to_thread(load_file, TRADER_ORDER_FILE)
+        except Exception as e:
+            print(f"[ExplosiveScanner] Error loading trader_orders.json: {e}")
+            return []
+        self.file_mtime = mtime
 
-        for user_id, orders in data.items():
-            for order in orders:
-                if order.get("order_id") in self.already_alerted:
-                    continue
-                if not order.get("confirmed") or not order.get("paid"):
-                    continue
-
-                count = 0
-                for item in order.get("items", []):
-                    name = item.get("item", "").lower()
-                    qty = int(item.get("quantity", 1))
-                    if any(keyword.lower() in name for keyword in EXPLOSIVE_KEYWORDS):
-                        count += qty
-
-                if count >= 3:
-                    user = await self.bot.fetch_user(int(user_id))
-                    await channel.send(f"@everyone stay frosty! {user.mention} has just bought enough boom to waltz through your front door! 💥")
-                    self.already_alerted.add(order.get("order_id"))
+        cutoff = time.time() - ALERT_TTL
+        return [(user_id, order) for user_id, orders in data.items() for order in orders
+                if order.get("confirmed") and order.get("paid") and (_placed_at(order) or time.time()) > cutoff]
 
     @scan_explosives.before_loop
     async def before_scan(self):
@@ -1,63 +1,175 @@
-import discord
-from discord.ext import tasks
-from datetime import datetime, timezone, timedelta
-import json
-import os
+# tasks/reminder_task.py
+"""
+Reminders for orders staff have not confirmed yet.
+
+Every order opened through utils/order_lifecycle gets a reminder due
+`order_reminder_hours` after it was submitted. Confirming it drops the
+reminder (a dict pop), and anything overdue goes out in one digest in
+the trader orders channel, with a jump link and the age of each order.
+A digest longer than one message is split across several. An order is
+due again one interval after the message listing it was delivered; if
+the send fails it is retried after RETRY_DELAY.
+One task sleeps until the next reminder is due; no channel history is
+read. Orders still waiting at startup are picked up from the lifecycle.
+"""
 
-# Load config
-config = json.loads(os.environ.get("CONFIG_JSON"))
+import asyncio
+import heapq
+import os
+import time
+from typing import Dict, List, Optional, Tuple
 
-TRADER_ORDERS_CHANNEL_ID = config["trader_orders_channel_id"]
-MENTION_ROLES = " ".join(config["mention_roles"])
-ORDER_REMINDER_HOURS = config.get("order_reminder_hours", 6)  # Fallback to 6 hours if not set
+from utils import config, log_sink, order_lifecycle, outbound
 
 LOG_DIR = "data/logs"
 REMINDER_LOG_FILE = os.path.join(LOG_DIR, "reminder_events.log")
 
+DIGEST_WINDOW = 60    # seconds; reminders due this soon after the first join its digest
+DIGEST_MAX_CHARS = 1900  # per message, under Discord's 2000-character limit
+RETRY_DELAY = 300  # seconds before a failed digest is sent again
 
-def ensure_log_dir():
-    os.makedirs(LOG_DIR, exist_ok=True)
+# order_id -> time its current reminder interval started (submission, then the last digest)
+_ARMED: Dict[str, float] = {}
+# (due_at, order_id, armed_at), soonest first; entries whose armed_at no longer matches are stale
+_HEAP: List[Tuple[float, str, float]] = []
+# order_ids taken for a digest that has not been delivered yet
+_SENDING: set = set()
+_wake: Optional[asyncio.Event] = None
+_runner: Optional[asyncio.Task] = None
 
 
 def log_reminder_event(message):
-    ensure_log_dir()
-    with open(REMINDER_LOG_FILE, "a") as log_file:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_file.write(f"[{timestamp}] {message}\n")
+    log_sink.write(REMINDER_LOG_FILE, message)
+
+
+def _interval() -> float:
+    return config.get().order_reminder_hours * 3600
+
+
+def _arm(order_id: str, armed_at: float):
+    _ARMED[order_id] = armed_at
+    heapq.heappush(_HEAP, (armed_at + _interval(), order_id, armed_at))
+    if _wake is not None:
+        _wake.set()
+
+
+def _track(order: dict):
+    """Lifecycle listener: arm a reminder on submission, drop it on any later state."""
+    if order["status"] == order_lifecycle.SUBMITTED:
+        if order["order_id"] not in _ARMED:
+            _arm(order["order_id"], order.get("submitted_at") or time.time())
+    else:
+        _ARMED.pop(order["order_id"], None)
+
+
+def _reschedule(settings):
+    """Rebuild the heap after a config reload changed the interval."""
+    _HEAP[:] = [(armed_at + settings.order_reminder_hours * 3600, order_id, armed_at)
+                for order_id, armed_at in _ARMED.items() if order_id not in _SENDING]
+    heapq.heapify(_HEAP)
+    if _wake is not None:
+        _wake.set()
+
+
+def pending() -> int:
+    return len(_ARMED)
+
+
+def _age(seconds: float) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
+
+
+def _digest(due: List[Tuple[dict, float]], now: float) -> List[Tuple[str, List[Tuple[dict, float]]]]:
+    """Splits the digest into (content, entries listed) messages of at most DIGEST_MAX_CHARS."""
+    settings = config.get()
+    header = f"{' '.join(settings.mention_roles)}\n⏰ **{len(due)} order(s) still waiting for confirmation:**"
+    messages = []
+    content, listed = header, []
+    for entry in due:
+        order = entry[0]
+        channel_id, message_id = order["messages"][order_lifecycle.ORDER_POST]
+        link = f"https://discord.com/channels/{settings.guild_id}/{channel_id}/{message_id}"
+        line = f"• <@{order['user_id']}> — {link} ({_age(now - order.get('submitted_at', now))} old)"
+        if listed and len(content) + 1 + len(line) > DIGEST_MAX_CHARS:
+            messages.append((content, listed))
+            content, listed = "⏰ **(continued)**", []
+        content += "\n" + line
+        listed.append(entry)
+    if listed:
+        messages.append((content, listed))
+    return messages
+
+
+def _take_due(now: float) -> List[Tuple[dict, float]]:
+    """Pops every live reminder due by now + DIGEST_WINDOW, as (order, armed_at), oldest order first."""
+    due = []
+    while _HEAP and _HEAP[0][0] <= now + DIGEST_WINDOW:
+        _, order_id, armed_at = heapq.heappop(_HEAP)
+        if _ARMED.get(order_id) != armed_at or order_id in _SENDING:
+            continue  # confirmed, re-armed since, or already in this digest
+        order = order_lifecycle.get(order_id)
+        if order is None or order["status"] != order_lifecycle.SUBMITTED:
+            _ARMED.pop(order_id, None)
+            continue
+        due.append((order, armed_at))
+        _SENDING.add(order_id)
+    return sorted(due, key=lambda entry: entry[0].get("submitted_at", now))
+
+
+def _settle(listed: List[Tuple[dict, float]], delivered: bool):
+    """Re-arms delivered orders from now; failed ones are due again after RETRY_DELAY."""
+    now = time.time()
+    for order, armed_at in listed:
+        order_id = order["order_id"]
+        _SENDING.discard(order_id)
+        if _ARMED.get(order_id) != armed_at:
+            continue  # confirmed while the digest was being sent
+        if delivered:
+            _arm(order_id, now)
+        else:
+            heapq.heappush(_HEAP, (now + RETRY_DELAY, order_id, armed_at))
+
+
+async def _run(bot):
+    await bot.wait_until_ready()
+    while True:
+        _wake.clear()
+        delay = _HEAP[0][0] - time.time() if _HEAP else None
+        if delay is None or delay > 0:
+            try:
+                await asyncio.wait_for(_wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        now = time.time()
+        due = _take_due(now)
+        if not due:
+            continue
+        channel = config.channel(bot, config.get().trader_orders_channel_id)
+        for content, listed in _digest(due, now):
+            order_ids = ", ".join(order["order_id"] for order, _ in listed)
+            try:
+                await outbound.send(channel, outbound.NORMAL, content=content)
+            except Exception as e:
+                _settle(listed, delivered=False)
+                error_message = f"Reminder digest failed for {len(listed)} order(s), retrying in {RETRY_DELAY}s: {e}"
+                print(f"[TraderBot] {error_message}")
+                log_reminder_event(error_message)
+                continue
+            _settle(listed, delivered=True)
+            log_reminder_event(f"Reminder digest sent for {len(listed)} order(s): {order_ids}")
 
 
 def start_reminder_task(bot):
-    @tasks.loop(hours=ORDER_REMINDER_HOURS)
-    async def scan_for_incomplete_orders():
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [TraderBot] Scanning for unconfirmed orders...")
-
-        try:
-            channel = await bot.fetch_channel(TRADER_ORDERS_CHANNEL_ID)
-        except Exception as e:
-            print(f"[Reminder] Failed to fetch trader_orders_channel: {e}")
-            log_reminder_event("Trader orders channel not found during reminder scan.")
-            return
-
-        try:
-            async for message in channel.history(limit=100):
-                if any(reaction.emoji == "🔴" and reaction.me for reaction in message.reactions):
-                    message_age = datetime.now(timezone.utc) - message.created_at
-                    if message_age > timedelta(hours=ORDER_REMINDER_HOURS):
-                        await channel.send(
-                            f"{MENTION_ROLES}\nPlease check for any incomplete trader orders!"
-                        )
-                        log_reminder_event("Reminder sent for incomplete trader orders.")
-                        break
-        except Exception as e:
-            error_message = f"Reminder scan failed: {e}"
-            print(f"[TraderBot] {error_message}")
-            log_reminder_event(error_message)
-
-    @scan_for_incomplete_orders.before_loop
-    async def before_first_scan():
-        await bot.wait_until_ready()
-        await scan_for_incomplete_orders()  # 🔥 Run first scan immediately on startup
-
-    if not scan_for_incomplete_orders.is_running():
-        scan_for_incomplete_orders.start()
+    global _wake, _runner
+    if _runner is not None and not _runner.done():
+        return
+    order_lifecycle.on_change(_track)
+    config.on_reload(_reschedule)
+    for order in order_lifecycle.in_state(order_lifecycle.SUBMITTED):
+        _track(order)
+    _wake = asyncio.Event()
+    _runner = asyncio.create_task(_run(bot))
+    print(f"[Reminder] Watching {pending()} unconfirmed order(s).")
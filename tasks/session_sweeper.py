@@ -0,0 +1,40 @@
+# tasks/session_sweeper.py
+
+import discord
+from discord.ext import tasks
+
+from utils import session_manager
+
+SWEEP_INTERVAL_SECONDS = 5
+
+EXPIRY_NOTICE = "⌛ Your session expired after {minutes} minutes of inactivity and your cart was cleared. Start a new one any time!"
+
+
+async def _tear_down(view):
+    """Stops an expired session's view, strips its buttons and posts one expiry notice."""
+    view.stop()
+    message = getattr(view, "ui_message", None) or getattr(view, "msg", None)
+    if message is None:
+        return
+    try:
+        await message.edit(view=None)
+        await message.channel.send(EXPIRY_NOTICE.format(minutes=session_manager.session_timeout() // 60))
+    except discord.HTTPException as e:
+        print(f"[SessionSweeper] Could not close expired session message: {e}")
+
+
+def start_session_sweeper(bot):
+    """One background loop evicts expired sessions and writes changed ones behind to the store."""
+    @tasks.loop(seconds=SWEEP_INTERVAL_SECONDS)
+    async def sweep_sessions():
+        for user_id, view in session_manager.pop_expired():
+            if view is not None:
+                await _tear_down(view)
+        await session_manager.flush()
+
+    @sweep_sessions.before_loop
+    async def before_sweep():
+        await bot.wait_until_ready()
+
+    if not sweep_sessions.is_running():
+        sweep_sessions.start()
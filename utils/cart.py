@@ -0,0 +1,122 @@
+# utils/cart.py
+"""
+Session cart: one line per (category, subcategory, item, variant).
+
+Adding an item that is already in the cart merges into its line, the
+running total is kept as lines change, and rendered summaries are cached
+until the next change, so a cart edit does not rebuild every line. Each
+add is also remembered on its own, so remove_last() undoes just the last
+add rather than the whole merged line.
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+LineKey = Tuple[str, Optional[str], str, str]
+
+
+class CartLine:
+    __slots__ = ("category", "subcategory", "item", "variant", "quantity", "subtotal")
+
+    def __init__(self, category, subcategory, item, variant, quantity, subtotal):
+        self.category = category
+        self.subcategory = subcategory
+        self.item = item
+        self.variant = variant
+        self.quantity = quantity
+        self.subtotal = subtotal
+
+    @property
+    def key(self) -> LineKey:
+        return (self.category, self.subcategory, self.item, self.variant)
+
+    def as_dict(self) -> dict:
+        """The session/order item schema used before carts existed (and in orders.json)."""
+        return {
+            "category": self.category,
+            "subcategory": self.subcategory,
+            "item": self.item,
+            "variant": self.variant,
+            "quantity": self.quantity,
+            "subtotal": self.subtotal
+        }
+
+
+class Cart:
+    __slots__ = ("_lines", "_adds", "total", "_rendered")
+
+    def __init__(self):
+        self._lines: Dict[LineKey, CartLine] = {}  # insertion order = display order
+        self._adds: List[Tuple[LineKey, int, float]] = []  # (key, quantity, subtotal) per add, oldest first
+        self.total = 0
+        self._rendered: Dict[Callable, str] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict]) -> "Cart":
+        """Builds a cart from stored item dicts (trader schema, or the old Trade Post qty/unit/total one)."""
+        cart = cls()
+        for it in items:
+            cart.add_item(it)
+        return cart
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[CartLine]:
+        return iter(self._lines.values())
+
+    def add(self, category, subcategory, item, variant, quantity, subtotal) -> CartLine:
+        """Adds `quantity` of a line, merging with an existing line for the same variant."""
+        key = (category, subcategory or None, item, variant)
+        line = self._lines.get(key)
+        if line is None:
+            line = self._lines[key] = CartLine(category, subcategory or None, item, variant, 0, 0)
+        line.quantity += quantity
+        line.subtotal += subtotal
+        self._adds.append((key, quantity, subtotal))
+        self.total += subtotal
+        self._rendered.clear()
+        return line
+
+    def add_item(self, it: dict) -> CartLine:
+        if "subtotal" in it:
+            quantity, subtotal = it.get("quantity", 1), it["subtotal"]
+        else:  # legacy Trade Post schema
+            quantity = it.get("qty", 1)
+            subtotal = it.get("total", it.get("unit", 0) * quantity)
+        return self.add(it.get("category"), it.get("subcategory"), it["item"],
+                        it.get("variant", "Default"), quantity, subtotal)
+
+    def remove(self, key: LineKey) -> Optional[CartLine]:
+        line = self._lines.pop(key, None)
+        if line is not None:
+            self._adds = [add for add in self._adds if add[0] != key]
+            self.total -= line.subtotal
+            self._rendered.clear()
+        return line
+
+    def remove_last(self) -> Optional[CartLine]:
+        """
+        Undoes the most recent add. Returns what was taken off as a CartLine
+        (that add's quantity and subtotal); the line itself goes once it is empty.
+        """
+        if not self._adds:
+            return None
+        key, quantity, subtotal = self._adds.pop()
+        line = self._lines[key]
+        line.quantity -= quantity
+        line.subtotal -= subtotal
+        if line.quantity <= 0:
+            del self._lines[key]
+        self.total -= subtotal
+        self._rendered.clear()
+        return CartLine(*key, quantity, subtotal)
+
+    def render(self, fmt_line: Callable[[CartLine], str]) -> str:
+        """The lines formatted with `fmt_line` and joined by newlines, cached per formatter until the cart changes."""
+        text = self._rendered.get(fmt_line)
+        if text is None:
+            text = self._rendered[fmt_line] = "\n".join(fmt_line(line) for line in self._lines.values())
+        return text
+
+    def to_items(self) -> list:
+        return [line.as_dict() for line in self._lines.values()]
@@ -0,0 +1,67 @@
+# utils/cart_render.py
+"""
+Debounced cart-message updates for the DM session views.
+
+Cart changes call schedule(); the first call in a quiet period starts a
+short timer, and when it fires the cart is rendered once from its latest
+state and written with a single edit. If the text matches what was last
+written, no request is made at all.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+CART_EDIT_DELAY = 0.75  # seconds to gather further clicks before editing
+
+# Totals across every session since startup, to compare requested renders with REST calls made.
+_TOTALS: Dict[str, int] = {"requested": 0, "sent": 0, "skipped": 0, "failed": 0}
+
+
+def stats() -> Dict[str, int]:
+    return dict(_TOTALS)
+
+
+class CartMessageScheduler:
+    def __init__(self, render: Callable[[], str], write: Callable[[str], Awaitable[None]], delay: float = CART_EDIT_DELAY):
+        self._render = render  # returns the cart text for the current session state
+        self._write = write    # edits (or first sends) the cart message
+        self._delay = delay
+        self._task = None
+        self._lock = asyncio.Lock()  # one write in flight, so edits land in order
+        self._last_text = None
+        self.requested = self.sent = self.skipped = 0
+
+    def schedule(self):
+        """Request a cart refresh. Calls inside the delay window share one edit."""
+        self.requested += 1
+        _TOTALS["requested"] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def cancel(self):
+        """Drop a pending refresh (the session is being submitted or closed)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def summary(self) -> str:
+        return f"{self.requested} requested, {self.sent} sent, {self.skipped} unchanged"
+
+    async def _run(self):
+        await asyncio.sleep(self._delay)
+        self._task = None  # further clicks from here on schedule a new edit
+        async with self._lock:
+            text = self._render()
+            if text == self._last_text:
+                self.skipped += 1
+                _TOTALS["skipped"] += 1
+                return
+            try:
+                await self._write(text)
+            except Exception as e:
+                _TOTALS["failed"] += 1
+                print(f"[Cart Render] Failed to update cart message: {e}")
+                return
+            self._last_text = text
+            self.sent += 1
+            _TOTALS["sent"] += 1
@@ -0,0 +1,293 @@
+# utils/catalog.py
+"""
+Compiled, read-only index over "Final price list.json" and the Trade Post catalog.
+
+The raw price list nests items either directly under a category
+(Category > Item > {variant: price}) or one level deeper under a
+subcategory (Clothes > Backpacks > Assault Bag > {variant: price}).
+Walking that on every dropdown render is wasteful, so it is compiled
+once into flat dicts keyed by (category, subcategory, item, variant).
+
+Each compiled Catalog is an immutable snapshot with a version number.
+Reloading publishes a new snapshot; anything still holding the old one
+(open carts, modals) keeps pricing against it.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils.variant_utils import normalize_variant
+
+PRICE_FILE = os.path.join("data", "Final price list.json")
+SELL_DIVISOR = 3  # trader pays a third of the list price when buying back
+
+PRICE_LIST = "price_list"
+TRADEPOST = "tradepost"
+
+_EMOJI_RE = re.compile(r"<a?:\w*:\d+>")
+
+
+class PriceEntry(NamedTuple):
+    category: str
+    subcategory: Optional[str]
+    item: str
+    variant: str
+    buy: Optional[float]
+    sell: Optional[float]
+
+
+def strip_emoji(text: str) -> str:
+    return _EMOJI_RE.sub("", text)
+
+
+def normalize_label(text: Optional[str]) -> str:
+    """Lowercase a category/item name and drop any custom emoji markup."""
+    if not text:
+        return ""
+    return " ".join(_EMOJI_RE.sub("", text).split()).lower()
+
+
+def _is_price_map(val: Any) -> bool:
+    return isinstance(val, dict) and all(isinstance(v, (int, float)) for v in val.values())
+
+
+# Pricing rules: turn an item's raw {key: number} map into (variant, buy, sell) rows.
+PricingFn = Callable[[Dict[str, float]], Iterable[Tuple[str, Optional[float], Optional[float]]]]
+
+
+def price_list_pricing(prices: Dict[str, float]):
+    """Final price list: every key is a variant, sell-back is a third of the list price."""
+    return [(variant, price, price / SELL_DIVISOR) for variant, price in prices.items()]
+
+
+def tradepost_pricing(prices: Dict[str, float]):
+    """Trade Post catalog: one row per item with explicit Buy/Sell (or a shared Default)."""
+    default = prices.get("Default")
+    return [("Default", prices.get("Buy", default), prices.get("Sell", default))]
+
+
+class Catalog:
+    """Flat lookup tables built once from a nested category dict. Treat as read-only."""
+
+    def __init__(self, categories: Dict[str, Any], pricing: PricingFn = price_list_pricing, version: int = 0):
+        self.version = version
+        self._categories: List[str] = []
+        self._subcategories: Dict[str, List[str]] = {}
+        self._items: Dict[Tuple[str, Optional[str]], List[str]] = {}
+        self._variants: Dict[Tuple[str, Optional[str], str], List[str]] = {}
+        self._entries: Dict[Tuple[str, Optional[str], str, str], PriceEntry] = {}
+        self._variant_lookup: Dict[Tuple[str, Optional[str], str, str], str] = {}
+        self._category_lookup: Dict[str, str] = {}
+        self._item_lookup: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
+        self._any_item_lookup: Dict[str, Tuple[str, Optional[str], str]] = {}
+        self._memo: Dict[Any, Any] = {}
+
+        for category, cat_data in categories.items():
+            if not isinstance(cat_data, dict):
+                continue
+            self._categories.append(category)
+            self._category_lookup.setdefault(normalize_label(category), category)
+            subcats = []
+            for key, val in cat_data.items():
+                if _is_price_map(val):
+                    self._add_item(category, None, key, pricing(val))
+                elif isinstance(val, dict):
+                    subcats.append(key)
+                    for item, prices in val.items():
+                        if _is_price_map(prices):
+                            self._add_item(category, key, item, pricing(prices))
+            self._subcategories[category] = subcats
+
+        # Freeze the navigation lists so holders of a snapshot cannot mutate it.
+        self._categories = tuple(self._categories)
+        self._subcategories = {k: tuple(v) for k, v in self._subcategories.items()}
+        self._items = {k: tuple(v) for k, v in self._items.items()}
+        self._variants = {k: tuple(v) for k, v in self._variants.items()}
+
+    def _add_item(self, category, subcategory, item, rows):
+        # Nested items are also reachable without their subcategory, matching
+        # how the dropdowns list them when a category is opened directly.
+        keys = [subcategory] if subcategory is None else [subcategory, None]
+        for sub in keys:
+            if (category, sub, item) in self._variants:
+                continue
+            self._items.setdefault((category, sub), []).append(item)
+            self._variants[(category, sub, item)] = [row[0] for row in rows]
+            for variant, buy, sell in rows:
+                self._entries[(category, sub, item, variant)] = PriceEntry(
+                    category, subcategory, item, variant, buy, sell
+                )
+                self._variant_lookup.setdefault((category, sub, item, normalize_variant(variant)), variant)
+                self._variant_lookup.setdefault((category, sub, item, normalize_label(variant)), variant)
+        self._item_lookup.setdefault((category, normalize_label(item)), (subcategory, item))
+        self._any_item_lookup.setdefault(normalize_label(item), (category, subcategory, item))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cached(self, key: Any, build: Callable[[], Any]) -> Any:
+        """
+        Memoises derived data (e.g. prebuilt dropdown options) on this snapshot.
+        A reload publishes a fresh Catalog, so the cache is invalidated with it.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = build()
+            return value
+
+    # --- Navigation ---
+    def categories(self) -> Sequence[str]:
+        return self._categories
+
+    def subcategories(self, category: str) -> Sequence[str]:
+        return self._subcategories.get(category, ())
+
+    def items(self, category: str, subcategory: Optional[str] = None) -> Sequence[str]:
+        return self._items.get((category, subcategory or None), ())
+
+    def variants(self, category: str, subcategory: Optional[str], item: str) -> Sequence[str]:
+        return self._variants.get((category, subcategory or None, item), ())
+
+    # --- Prices ---
+    def entries(self) -> List[PriceEntry]:
+        """Every priced row once, under its real subcategory."""
+        return [e for key, e in self._entries.items() if key[1] == e.subcategory]
+
+    def entry(self, category: str, subcategory: Optional[str], item: str, variant: str) -> Optional[PriceEntry]:
+        return self._entries.get((category, subcategory or None, item, variant))
+
+    def buy_price(self, category, subcategory, item, variant) -> Optional[float]:
+        entry = self.entry(category, subcategory, item, variant)
+        return entry.buy if entry else None
+
+    def sell_price(self, category, subcategory, item, variant) -> Optional[float]:
+        entry = self.entry(category, subcategory, item, variant)
+        return entry.sell if entry else None
+
+    # --- Case-insensitive resolution (typed input) ---
+    def resolve_variant(self, category: str, subcategory: Optional[str], item: str, choice: Optional[str]) -> Optional[str]:
+        """Returns the stored variant key matching `choice`, ignoring case, whitespace and emoji."""
+        key = (category, subcategory or None, item)
+        return (self._variant_lookup.get(key + (normalize_variant(choice),))
+                or self._variant_lookup.get(key + (normalize_label(choice),)))
+
+    def resolve_category(self, text: str) -> Optional[str]:
+        """Matches a typed category name against the stored keys, ignoring case and emoji."""
+        if text in self._subcategories:
+            return text
+        return self._category_lookup.get(normalize_label(text))
+
+    def resolve_item(self, category: str, text: str) -> Optional[Tuple[Optional[str], str]]:
+        """Returns (subcategory, item) for a typed item name within a category."""
+        return self._item_lookup.get((category, normalize_label(text)))
+
+    def find_item(self, text: str) -> Optional[Tuple[str, Optional[str], str]]:
+        """Returns (category, subcategory, item) for a typed item name in any category."""
+        return self._any_item_lookup.get(normalize_label(text))
+
+
+# --- Versioned snapshots ---
+_SOURCES: Dict[str, Tuple[str, PricingFn]] = {PRICE_LIST: (PRICE_FILE, price_list_pricing)}
+_CURRENT: Dict[str, Catalog] = {}
+_MTIMES: Dict[str, float] = {}
+_VERSIONS = itertools.count(1)
+
+
+def register_source(name: str, path: str, pricing: PricingFn):
+    """Registers another catalog file to be compiled, served and watched under `name`."""
+    _SOURCES[name] = (path, pricing)
+
+
+def sources() -> List[str]:
+    return list(_SOURCES)
+
+
+def load_catalog(name: str = PRICE_LIST) -> Catalog:
+    """
+    Reads, validates and compiles a catalog file. Blocking; call off the event loop
+    when reloading. Raises ValueError if the file is not a usable catalog.
+    """
+    path, pricing = _SOURCES[name]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("categories"), dict):
+        raise ValueError(f"{path}: missing 'categories' root")
+    compiled = Catalog(data["categories"], pricing, version=next(_VERSIONS))
+    if not len(compiled):
+        raise ValueError(f"{path}: no priced items found")
+    for entry in compiled._entries.values():
+        for price in (entry.buy, entry.sell):
+            if price is not None and price < 0:
+                raise ValueError(f"{path}: negative price for {entry.item} ({entry.variant})")
+    return compiled
+
+
+def _publish(name: str, compiled: Catalog, mtime: float):
+    # A single dict assignment: readers see either the old snapshot or the new one.
+    _CURRENT[name] = compiled
+    _MTIMES[name] = mtime
+
+
+async def preload():
+    """
+    Compiles every registered catalog off the event loop. Called once at startup,
+    after the command modules have registered their sources, so no interaction
+    ever waits for a first compile.
+    """
+    for name in sources():
+        if name in _CURRENT:
+            continue
+        path = _SOURCES[name][0]
+        try:
+            mtime = os.path.getmtime(path)
+            compiled = await asyncio.to_thread(load_catalog, name)
+        except Exception as e:
+            print(f"[Catalog] Could not compile {path}: {type(e).__name__} - {e}")
+            continue
+        _publish(name, compiled, mtime)
+        print(f"[Catalog] Compiled {name} as version {compiled.version} ({len(compiled)} prices).")
+
+
+def get_catalog(name: str = PRICE_LIST) -> Catalog:
+    """
+    Returns the current snapshot for `name`. preload() has normally compiled it
+    already; a source it could not load is compiled here, blocking, on first use.
+    """
+    current = _CURRENT.get(name)
+    if current is None:
+        path = _SOURCES[name][0]
+        mtime = os.path.getmtime(path)
+        current = load_catalog(name)
+        _publish(name, current, mtime)
+    return current
+
+
+async def reload_if_changed(name: str) -> Optional[Catalog]:
+    """
+    Recompiles `name` if its file changed since the last load and swaps it in.
+    Returns the new snapshot, or None if nothing changed or the new file was rejected
+    (the previous snapshot stays live in that case).
+    """
+    path = _SOURCES[name][0]
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as e:
+        print(f"[Catalog] Cannot stat {path}: {e}")
+        return None
+    if _MTIMES.get(name) == mtime:
+        return None
+    try:
+        compiled = await asyncio.to_thread(load_catalog, name)
+    except Exception as e:
+        # Remember the bad mtime so a broken file is reported once, not every poll.
+        _MTIMES[name] = mtime
+        print(f"[Catalog] Rejected reload of {path}: {type(e).__name__} - {e}")
+        return None
+    _publish(name, compiled, mtime)
+    print(f"[Catalog] Reloaded {name} as version {compiled.version} ({len(compiled)} prices).")
+    return compiled
@@ -0,0 +1,48 @@
+# utils/command_sync.py
+"""
+Slash-command sync gated on a hash of the command tree.
+
+The global and guild command payloads are serialised and hashed, and
+the hash of the last successful sync is kept in the order store's meta
+table. A start with an unchanged tree makes no sync calls at all.
+/forcesync still syncs unconditionally.
+"""
+
+import asyncio
+import hashlib
+import json
+
+import discord
+
+from utils import order_store
+
+META_KEY = "command_tree_hash"
+
+
+def tree_hash(bot, guild: discord.abc.Snowflake) -> str:
+    payload = {
+        "application_id": bot.application_id,
+        "global": sorted((c.to_dict() for c in bot.tree.get_commands()), key=lambda c: (c.get("type", 1), c["name"])),
+        "guild": sorted((c.to_dict() for c in bot.tree.get_commands(guild=guild)), key=lambda c: (c.get("type", 1), c["name"]))
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def sync(bot, guild: discord.abc.Snowflake):
+    """Syncs global and guild commands and records the tree hash. Returns (global, guild) counts."""
+    synced = await bot.tree.sync()
+    guild_synced = await bot.tree.sync(guild=guild)
+    await asyncio.to_thread(order_store.get_repository().set_meta, META_KEY, tree_hash(bot, guild))
+    return len(synced), len(guild_synced)
+
+
+async def sync_if_changed(bot, guild: discord.abc.Snowflake) -> bool:
+    """Syncs only when the tree differs from the one last synced. True if it synced."""
+    current = tree_hash(bot, guild)
+    stored = await asyncio.to_thread(order_store.get_repository().get_meta, META_KEY)
+    if stored == current:
+        print(f"[TraderBot] Command tree unchanged ({current[:12]}), skipping sync.")
+        return False
+    synced, guild_synced = await sync(bot, guild)
+    print(f"[TraderBot] Command tree changed, synced {synced} global and {guild_synced} guild slash command(s).")
+    return True
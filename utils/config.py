@@ -0,0 +1,209 @@
+# utils/config.py
+"""
+Bot settings, parsed and validated once into a frozen, typed Settings.
+
+Settings come from the CONFIG_JSON environment variable, or from
+config.json when it is unset. Every module reads them from here through
+get(), so the source is parsed once and a bad value fails at startup
+with every problem listed, rather than later as a KeyError in a handler.
+
+reload() re-reads the source and applies only RELOADABLE keys (timings
+and mentions). Channel, role and path changes need a restart and are
+reported as such. Callbacks registered with on_reload() run after a
+successful reload. channel() and role() hand out cached handles without
+an API call; both caches are dropped on reload.
+"""
+
+import json
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import discord
+
+CONFIG_FILE = "config.json"
+
+# Keys reload() may change on a running bot
+RELOADABLE = ("session_timeout_minutes", "order_reminder_hours", "mention_roles")
+
+# Previously hard-coded in the modules that used them
+DEFAULT_GUILD_ID = 1166441420643639348
+DEFAULT_EXPLOSIVE_ALERT_CHANNEL_ID = 1172556655150506075
+DEFAULT_TRADEPOST_ORDERS_CHANNEL_ID = 1417541688133419118
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Settings(NamedTuple):
+    token: str
+    guild_id: int
+    trader_orders_channel_id: int
+    economy_channel_id: int
+    trader_of_the_week_channel_id: Optional[int]
+    explosive_alert_channel_id: int
+    tradepost_orders_channel_id: int
+    payouts_channel_id: int
+    trader_role_id: Optional[int]
+    admin_role_ids: frozenset
+    mention_roles: Tuple[str, ...]
+    session_timeout_minutes: int
+    order_reminder_hours: float
+    session_db_path: Optional[str]
+    order_db_path: str
+    tradepost_catalog_path: str
+
+    @property
+    def session_timeout(self) -> int:
+        """Session inactivity timeout in seconds."""
+        return self.session_timeout_minutes * 60
+
+
+def _read_source() -> dict:
+    raw = os.environ.get("CONFIG_JSON")
+    if raw:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ConfigError(f"CONFIG_JSON is not valid JSON: {e}")
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ConfigError(f"CONFIG_JSON is not set and {CONFIG_FILE} does not exist")
+
+
+def parse(raw: dict) -> Settings:
+    """Validates `raw` into Settings. Raises ConfigError listing every problem found."""
+    errors: List[str] = []
+
+    def value(key, convert, default=None, required=False):
+        if raw.get(key) in (None, ""):
+            if required:
+                errors.append(f"{key} is required")
+            return default
+        try:
+            return convert(raw[key])
+        except (TypeError, ValueError):
+            errors.append(f"{key} has an invalid value: {raw[key]!r}")
+            return default
+
+    def number(convert):
+        def check(v):
+            if isinstance(v, bool) or convert(v) <= 0:
+                raise ValueError
+            return convert(v)
+        return check
+
+    snowflake = number(int)
+    tradepost_orders = value("tradepost_orders_channel_id", snowflake) \
+        or value("tradepost_order_channel_id", snowflake, DEFAULT_TRADEPOST_ORDERS_CHANNEL_ID)  # legacy key
+
+    settings = Settings(
+        token=value("token", str, required=True),
+        guild_id=value("guild_id", snowflake, DEFAULT_GUILD_ID),
+        trader_orders_channel_id=value("trader_orders_channel_id", snowflake, required=True),
+        economy_channel_id=value("economy_channel_id", snowflake, required=True),
+        trader_of_the_week_channel_id=value("trader_of_the_week_channel_id", snowflake),
+        explosive_alert_channel_id=value("explosive_alert_channel_id", snowflake, DEFAULT_EXPLOSIVE_ALERT_CHANNEL_ID),
+        tradepost_orders_channel_id=tradepost_orders,
+        payouts_channel_id=value("payouts_channel_id", snowflake, tradepost_orders),
+        trader_role_id=value("trader_role_id", snowflake),
+        admin_role_ids=value("admin_role_ids", lambda ids: frozenset(snowflake(i) for i in ids), frozenset()),
+        mention_roles=value("mention_roles", lambda roles: tuple(str(r) for r in roles), ()),
+        session_timeout_minutes=value("session_timeout_minutes", number(int), 15),
+        order_reminder_hours=value("order_reminder_hours", number(float), 6),
+        session_db_path=value("session_db_path", str),
+        order_db_path=value("order_db_path", str, os.path.join("data", "orders.db")),
+        tradepost_catalog_path=value("tradepost_catalog_path", str, "data/tradepost_catalog.json")
+    )
+    if errors:
+        raise ConfigError("Invalid configuration: " + "; ".join(errors))
+    return settings
+
+
+_SETTINGS: Optional[Settings] = None
+_RELOAD_CALLBACKS: List[Callable[[Settings], None]] = []
+_CHANNELS: Dict[int, discord.abc.Messageable] = {}
+_ROLES: Dict[int, discord.Role] = {}
+
+
+def get() -> Settings:
+    global _SETTINGS
+    if _SETTINGS is None:
+        _SETTINGS = parse(_read_source())
+    return _SETTINGS
+
+
+def on_reload(callback: Callable[[Settings], None]):
+    """Run callback(settings) after every reload that changed something."""
+    _RELOAD_CALLBACKS.append(callback)
+
+
+def reload() -> Tuple[List[str], List[str]]:
+    """
+    Re-reads the source and applies the RELOADABLE keys that changed.
+    Returns (applied, needs_restart) key names. Raises ConfigError, leaving
+    the current settings in place, if the new source does not validate.
+    """
+    global _SETTINGS
+    current = get()
+    fresh = parse(_read_source())
+    changed = [key for key in Settings._fields if getattr(fresh, key) != getattr(current, key)]
+    applied = [key for key in changed if key in RELOADABLE]
+    if applied:
+        _SETTINGS = current._replace(**{key: getattr(fresh, key) for key in applied})
+        for callback in _RELOAD_CALLBACKS:
+            try:
+                callback(_SETTINGS)
+            except Exception as e:
+                print(f"[Config] Reload callback failed: {type(e).__name__} - {e}")
+    return applied, [key for key in changed if key not in RELOADABLE]
+
+
+def channel(bot, channel_id: int) -> discord.abc.Messageable:
+    """
+    A handle for a configured channel, resolved from the cache once and kept.
+    Until the channel is in the cache this is a PartialMessageable, which can
+    still send and edit, so callers never need a fetch_channel fallback.
+    """
+    handle = _CHANNELS.get(channel_id)
+    if handle is None:
+        handle = bot.get_channel(channel_id)
+        if handle is None:
+            return bot.get_partial_messageable(channel_id)
+        _CHANNELS[channel_id] = handle
+    return handle
+
+
+def role(bot, role_id: Optional[int]) -> Optional[discord.Role]:
+    """
+    The configured guild's role, resolved from the cache once and kept.
+    None while the guild or role is not cached (or role_id is unset).
+    """
+    if not role_id:
+        return None
+    handle = _ROLES.get(role_id)
+    if handle is None:
+        guild = bot.get_guild(get().guild_id)
+        handle = guild.get_role(role_id) if guild else None
+        if handle is None:
+            return None
+        _ROLES[role_id] = handle
+    return handle
+
+
+def role_mention(bot, role_id: Optional[int]) -> str:
+    """The role's mention, falling back to the raw <@&id> form until it is cached."""
+    handle = role(bot, role_id)
+    if handle is not None:
+        return handle.mention
+    return f"<@&{role_id}>" if role_id else ""
+
+
+def _drop_handles(_settings: Settings):
+    _CHANNELS.clear()
+    _ROLES.clear()
+
+
+on_reload(_drop_handles)
@@ -0,0 +1,84 @@
+# utils/dedupe.py
+"""
+Bounded "have we already done this?" sets.
+
+A TTLDedupe remembers keys for `ttl` seconds and never holds more than
+`capacity` of them. Keys go into a ring of time buckets (each covering
+ttl / buckets seconds). Expiry drops whole buckets from the old end, and
+past capacity the oldest keys are evicted one at a time, so memory stays
+flat no matter how long the bot runs. A key is remembered for at least
+`ttl` and at most one bucket longer, unless capacity evicts it first.
+
+Given a name, the keys are also written to the order store and loaded
+back on start, so a deploy does not forget what was already handled.
+Persisted keys come back as strings, so use string keys for those.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional, Tuple
+
+from utils import order_store
+
+
+class TTLDedupe:
+    def __init__(self, ttl: float, capacity: int = 10000, buckets: int = 8, persist_as: Optional[str] = None):
+        self.ttl = ttl
+        self.capacity = capacity
+        self._span = ttl / buckets
+        self._ring: Deque[Tuple[float, Dict[Hashable, None]]] = deque()  # (bucket start, keys in insertion order), oldest first
+        self._size = 0
+        self._persist_as = persist_as
+        if persist_as:
+            now = time.time()
+            repo = order_store.get_repository()
+            for key, expires_at in repo.seen_keys(persist_as, now, capacity):
+                self._insert(key, expires_at - ttl)
+            repo.forget_seen(persist_as, now)
+
+    def __len__(self) -> int:
+        self._expire(time.time())
+        return self._size
+
+    def __contains__(self, key: Hashable) -> bool:
+        self._expire(time.time())
+        return any(key in keys for _, keys in self._ring)
+
+    def _insert(self, key: Hashable, at: float):
+        if not self._ring or at >= self._ring[-1][0] + self._span:
+            self._ring.append((at, {}))
+        self._ring[-1][1][key] = None
+        self._size += 1
+        if self._size > self.capacity:
+            keys = self._ring[0][1]
+            del keys[next(iter(keys))]
+            self._size -= 1
+            if not keys:
+                self._ring.popleft()
+
+    def _expire(self, now: float) -> bool:
+        dropped = False
+        while self._ring and self._ring[0][0] + self._span + self.ttl <= now:
+            _, keys = self._ring.popleft()
+            self._size -= len(keys)
+            dropped = True
+        return dropped
+
+    async def claim(self, key: Hashable) -> bool:
+        """
+        True the first time `key` is seen within the TTL, False for a repeat.
+        The key is recorded before anything is awaited, so concurrent claims
+        of the same key cannot both succeed.
+        """
+        now = time.time()
+        expired = self._expire(now)
+        if any(key in keys for _, keys in self._ring):
+            return False
+        self._insert(key, now)
+        if self._persist_as:
+            repo = order_store.get_repository()
+            await asyncio.to_thread(repo.remember, self._persist_as, str(key), now + self.ttl)
+            if expired:
+                await asyncio.to_thread(repo.forget_seen, self._persist_as, now)
+        return True
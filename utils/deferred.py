@@ -0,0 +1,155 @@
+# utils/deferred.py
+"""
+Deferred message deletions and DM cleanups, run by one scheduler task.
+
+Instead of a sleeping task per message, callers record what to do and
+when. Every action is written to the order store and kept in a heap; a
+single task sleeps until the soonest one is due, then runs everything
+due within BATCH_WINDOW of it together. Deletions in one guild channel
+become a single bulk delete. Actions still pending at shutdown are
+loaded back when the runner starts in setup_hook, so after a restart they
+run late rather than never.
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from utils import dm_registry, order_store
+
+DELETE = "delete"          # target is a message in channel_id
+DM_CLEANUP = "dm_cleanup"  # target is a user; see utils/dm_registry
+
+BATCH_WINDOW = 1.0         # seconds; actions due this close together run as one batch
+DELETE_CONCURRENCY = 3     # single deletes in flight per batch
+BULK_MAX = 100             # messages per bulk delete (Discord's limit)
+BULK_MAX_AGE = 14 * 24 * 3600 - 60  # bulk delete refuses messages older than 14 days
+
+# (due_at, action_id, action, channel_id, target_id), soonest first
+_HEAP: List[Tuple[float, int, str, int, int]] = []
+_loaded = False
+_bot = None
+_runner: Optional[asyncio.Task] = None
+_wake: Optional[asyncio.Event] = None
+
+
+def _ensure_loaded():
+    global _loaded
+    if _loaded:
+        return
+    for row in order_store.get_repository().pending_actions():
+        action_id, due_at, action, channel_id, target_id = row
+        heapq.heappush(_HEAP, (due_at, action_id, action, channel_id, target_id))
+    _loaded = True
+
+
+async def _schedule(delay: float, action: str, channel_id: int, target_id: int):
+    _ensure_loaded()
+    due_at = time.time() + delay
+    action_id = await asyncio.to_thread(order_store.get_repository().add_action, due_at, action, channel_id, target_id)
+    heapq.heappush(_HEAP, (due_at, action_id, action, channel_id, target_id))
+    if _wake is not None:
+        _wake.set()
+
+
+async def delete_later(message, delay: float):
+    """Deletes `message` (anything with .id and .channel) after `delay` seconds."""
+    await _schedule(delay, DELETE, message.channel.id, message.id)
+
+
+async def cleanup_dms_later(user_id: int, delay: float):
+    """Runs dm_registry.cleanup() for `user_id` after `delay` seconds."""
+    await _schedule(delay, DM_CLEANUP, 0, user_id)
+
+
+def pending() -> int:
+    _ensure_loaded()
+    return len(_HEAP)
+
+
+def _bulk_eligible(message_id: int, now: float) -> bool:
+    return now - discord.utils.snowflake_time(message_id).timestamp() < BULK_MAX_AGE
+
+
+async def _delete_messages(channel_id: int, message_ids: List[int]):
+    channel = _bot.get_channel(channel_id)
+    now = time.time()
+    singles = message_ids
+    if isinstance(channel, discord.TextChannel) and len(message_ids) > 1:
+        bulk = [m for m in message_ids if _bulk_eligible(m, now)]
+        singles = [m for m in message_ids if not _bulk_eligible(m, now)]
+        for start in range(0, len(bulk), BULK_MAX):
+            chunk = bulk[start:start + BULK_MAX]
+            try:
+                if len(chunk) == 1:
+                    singles.append(chunk[0])
+                else:
+                    await channel.delete_messages([discord.Object(id=m) for m in chunk])
+            except discord.HTTPException as e:
+                print(f"[Deferred] Bulk delete in {channel_id} failed, deleting one by one: {e}")
+                singles.extend(chunk)
+
+    limit = asyncio.Semaphore(DELETE_CONCURRENCY)
+    messageable = _bot.get_partial_messageable(channel_id)
+
+    async def delete(message_id):
+        async with limit:
+            try:
+                await messageable.get_partial_message(message_id).delete()
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                print(f"[Deferred] Could not delete {message_id} in {channel_id}: {e}")
+
+    await asyncio.gather(*(delete(m) for m in singles))
+
+
+async def _run_batch(batch: List[Tuple[float, int, str, int, int]]):
+    deletions: Dict[int, List[int]] = {}
+    cleanups = set()
+    for _, _, action, channel_id, target_id in batch:
+        if action == DELETE:
+            deletions.setdefault(channel_id, []).append(target_id)
+        elif action == DM_CLEANUP:
+            cleanups.add(target_id)
+
+    jobs = [_delete_messages(channel_id, ids) for channel_id, ids in deletions.items()]
+    jobs += [dm_registry.cleanup(_bot, user_id) for user_id in cleanups]
+    for result in await asyncio.gather(*jobs, return_exceptions=True):
+        if isinstance(result, Exception):
+            print(f"[Deferred] Batch step failed: {type(result).__name__} - {result}")
+    await asyncio.to_thread(order_store.get_repository().remove_actions, [row[1] for row in batch])
+
+
+async def _run():
+    while True:
+        _wake.clear()
+        delay = _HEAP[0][0] - time.time() if _HEAP else None
+        if delay is None or delay > 0:
+            try:
+                await asyncio.wait_for(_wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        cutoff = time.time() + BATCH_WINDOW
+        batch = []
+        while _HEAP and _HEAP[0][0] <= cutoff:
+            batch.append(heapq.heappop(_HEAP))
+        try:
+            await _run_batch(batch)
+        except Exception as e:
+            print(f"[Deferred] Batch of {len(batch)} failed: {type(e).__name__} - {e}")
+
+
+def start_deferred_actions(bot):
+    """Starts the runner. Called once from setup_hook, so restored actions run without waiting for READY."""
+    global _bot, _runner, _wake
+    _bot = bot
+    _ensure_loaded()
+    _wake = asyncio.Event()
+    _runner = asyncio.create_task(_run())
+    print(f"[Deferred] Scheduler started with {len(_HEAP)} pending action(s).")
@@ -0,0 +1,103 @@
+# utils/dm_registry.py
+"""
+Per-user registry of the bot's own DM messages, used for DM cleanup.
+
+Every message the bot posts in a DM is recorded by an on_message
+listener, so no send site has to remember to do it. Cleanup deletes
+exactly the recorded IDs, a few at a time (discord.py waits out the
+per-channel delete bucket), with no history fetch. Messages that belong
+to an order still in flight (payment prompt, pickup DM) are kept until
+that order is done. The registry lives in the order store, so messages
+sent before a restart are still cleaned up afterwards.
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+import discord
+
+from utils import order_lifecycle, order_store
+
+CLEANUP_CONCURRENCY = 3  # deletes in flight per cleanup
+MAX_PER_USER = 200       # older messages beyond this are left alone
+
+# user_id -> {message_id: channel_id}, oldest first
+_MESSAGES: Dict[int, Dict[int, int]] = {}
+_loaded = False
+
+
+def _ensure_loaded():
+    global _loaded
+    if _loaded:
+        return
+    for user_id, channel_id, message_id in order_store.get_repository().tracked_dms():
+        _MESSAGES.setdefault(user_id, {})[message_id] = channel_id
+    _loaded = True
+
+
+def _recipient_id(message: discord.Message) -> Optional[int]:
+    recipient = getattr(message.channel, "recipient", None)
+    if recipient is None and message.interaction is not None:
+        recipient = message.interaction.user  # interaction replies in an uncached DM channel
+    return recipient.id if recipient else None
+
+
+async def track(message: discord.Message):
+    """Records one bot message sent in a DM."""
+    user_id = _recipient_id(message)
+    if user_id is None:
+        return
+    _ensure_loaded()
+    tracked = _MESSAGES.setdefault(user_id, {})
+    tracked[message.id] = message.channel.id
+    evicted = []
+    while len(tracked) > MAX_PER_USER:
+        oldest = next(iter(tracked))
+        del tracked[oldest]
+        evicted.append(oldest)
+    repo = order_store.get_repository()
+    await asyncio.to_thread(repo.track_dm, user_id, message.channel.id, message.id)
+    if evicted:
+        await asyncio.to_thread(repo.untrack_dms, evicted)
+
+
+def tracked_count(user_id: int) -> int:
+    _ensure_loaded()
+    return len(_MESSAGES.get(user_id, {}))
+
+
+async def cleanup(bot, user_id: int) -> int:
+    """Deletes the bot's tracked DMs to `user_id`. Returns how many were removed."""
+    _ensure_loaded()
+    tracked = _MESSAGES.get(user_id)
+    if not tracked:
+        return 0
+    doomed = [(message_id, channel_id) for message_id, channel_id in tracked.items()
+              if order_lifecycle.lookup(message_id) is None]
+    for message_id, _ in doomed:
+        del tracked[message_id]
+    if not tracked:
+        del _MESSAGES[user_id]
+
+    limit = asyncio.Semaphore(CLEANUP_CONCURRENCY)
+
+    async def delete(message_id, channel_id):
+        async with limit:
+            try:
+                await bot.get_partial_messageable(channel_id).get_partial_message(message_id).delete()
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                print(f"[DM Cleanup] Could not delete {message_id} for {user_id}: {e}")
+
+    await asyncio.gather(*(delete(message_id, channel_id) for message_id, channel_id in doomed))
+    await asyncio.to_thread(order_store.get_repository().untrack_dms, [message_id for message_id, _ in doomed])
+    return len(doomed)
+
+
+def setup_dm_registry(bot):
+    async def record_dm(message: discord.Message):
+        if message.guild is None and message.author.id == bot.user.id:
+            await track(message)
+
+    bot.add_listener(record_dm, "on_message")
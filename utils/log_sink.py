@@ -0,0 +1,129 @@
+# utils/log_sink.py
+"""
+Shared, non-blocking sink for the bot's plain-text log files.
+
+Callers on the event loop only enqueue a record (no file I/O). A single
+daemon thread drains the queue, groups records by file, appends each batch
+with one open/write per file and rotates files that grow past MAX_BYTES.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+MAX_BYTES = 5 * 1024 * 1024   # rotate a log once it passes 5 MB
+BACKUP_COUNT = 3              # keep file.log.1 .. file.log.3
+MAX_BATCH = 500               # records written per wake-up
+FLUSH_INTERVAL = 0.5          # seconds the writer waits to fill a batch
+QUEUE_SIZE = 10000            # records beyond this are dropped (and counted) rather than block
+
+
+class LogRecord(NamedTuple):
+    created: float
+    path: str
+    message: str
+    prefix: Optional[str]  # e.g. "[SessionManager]"; written before the timestamp
+
+
+# Holds LogRecords, plus threading.Events queued by flush() as "written up to here" markers.
+_QUEUE: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+_STATS = {"enqueued": 0, "written": 0, "batches": 0, "dropped": 0, "rotations": 0, "max_depth": 0}
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def write(path: str, message: str, prefix: Optional[str] = None):
+    """Queue one line for `path`. Never touches the filesystem on the caller's thread."""
+    _ensure_writer()
+    try:
+        _QUEUE.put_nowait(LogRecord(time.time(), path, message, prefix))
+    except queue.Full:
+        _STATS["dropped"] += 1
+        return
+    _STATS["enqueued"] += 1
+    depth = _QUEUE.qsize()
+    if depth > _STATS["max_depth"]:
+        _STATS["max_depth"] = depth
+
+
+def stats() -> Dict[str, int]:
+    """Counters for checking throughput and back-pressure (queue depth, drops)."""
+    return dict(_STATS, depth=_QUEUE.qsize())
+
+
+def flush(timeout: float = 5.0):
+    """Block until everything queued so far is on disk (used at shutdown and in scripts)."""
+    if _writer is None:
+        return
+    done = threading.Event()
+    _QUEUE.put(done)
+    done.wait(timeout)
+
+
+def _format(record: LogRecord) -> str:
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+    if record.prefix:
+        return f"{record.prefix} [{stamp}] {record.message}\n"
+    return f"[{stamp}] {record.message}\n"
+
+
+def _rotate(path: str):
+    for n in range(BACKUP_COUNT - 1, 0, -1):
+        src = f"{path}.{n}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{n + 1}")
+    os.replace(path, f"{path}.1")
+    _STATS["rotations"] += 1
+
+
+def _write_batch(batch: List[LogRecord]):
+    by_path: Dict[str, List[str]] = {}
+    for record in batch:
+        by_path.setdefault(record.path, []).append(_format(record))
+    for path, lines in by_path.items():
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) >= MAX_BYTES:
+                _rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            _STATS["written"] += len(lines)
+        except OSError as e:
+            print(f"[LogSink] Failed to write {path}: {e}")
+    _STATS["batches"] += 1
+
+
+def _run():
+    while True:
+        record = _QUEUE.get()
+        batch, waiters = [], []
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while True:
+            if isinstance(record, threading.Event):
+                waiters.append(record)
+            else:
+                batch.append(record)
+            if len(batch) >= MAX_BATCH:
+                break
+            try:
+                record = _QUEUE.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        if batch:
+            _write_batch(batch)
+        for waiter in waiters:
+            waiter.set()
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_run, name="log-sink", daemon=True)
+            _writer.start()
+            atexit.register(flush)
@@ -0,0 +1,214 @@
+# utils/order_lifecycle.py
+"""
+Order lifecycle: submitted → confirmed → paid → stored → picked_up.
+
+Orders posted by the Trader and Trade Post sessions are tracked from the
+moment they are submitted, together with the Discord messages that belong
+to them (the staff post, the payment DM, the payment notice, the pickup DM).
+State and message IDs live in the order store, and every order that is
+still in flight is loaded back on first use after a restart, so a ✅ or a
+button press on an old message still finds its order. Resolving a message
+to its order is a dict lookup, and the text we last wrote to each message
+is kept with it, so confirmations can edit a message without fetching it.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils import order_store, outbound
+
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+PAID = "paid"
+STORED = "stored"
+PICKED_UP = "picked_up"
+
+STATES = (SUBMITTED, CONFIRMED, PAID, STORED, PICKED_UP)
+TRANSITIONS = {
+    SUBMITTED: (CONFIRMED,),
+    CONFIRMED: (PAID,),
+    PAID: (STORED, PICKED_UP),  # PICKED_UP directly when staff skip the storage unit
+    STORED: (PICKED_UP,),
+}
+_RANK = {state: n for n, state in enumerate(STATES)}
+
+# Message roles recorded against an order
+ORDER_POST = "order_post"          # the staff post in the orders/payouts channel
+PAYMENT_DM = "payment_dm"          # the "please pay" DM the player reacts to
+PAYMENT_NOTICE = "payment_notice"  # the "has confirmed payment" post for staff
+PICKUP_DM = "pickup_dm"            # the DM carrying the storage unit and code
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+# order_id -> order, for orders that have not reached their final state
+_ORDERS: Dict[str, dict] = {}
+# message_id -> (order_id, role)
+_ROUTES: Dict[int, Tuple[str, str]] = {}
+_loaded = False
+# Called with the order after it is opened or changes state (see on_change)
+_LISTENERS: List[Callable[[dict], None]] = []
+
+
+def _index(order: dict):
+    _ORDERS[order["order_id"]] = order
+    for role, (_, message_id) in order.get("messages", {}).items():
+        _ROUTES[message_id] = (order["order_id"], role)
+
+
+def _forget(order: dict):
+    _ORDERS.pop(order["order_id"], None)
+    for _, message_id in order.get("messages", {}).values():
+        _ROUTES.pop(message_id, None)
+
+
+def _read_in_flight() -> List[dict]:
+    """Blocking: every order in the store that has not reached its final state."""
+    orders = []
+    for user_id, order in order_store.get_repository().with_status(TRANSITIONS):
+        # Orders recorded before the lifecycle existed have no messages to route.
+        if order.get("messages") and order.get("status") != order.get("final_status", PICKED_UP):
+            order.setdefault("user_id", int(user_id))
+            orders.append(order)
+    return orders
+
+
+def _apply(orders: List[dict]) -> int:
+    global _loaded
+    _ORDERS.clear()
+    _ROUTES.clear()
+    for order in orders:
+        _index(order)
+    _loaded = True
+    return len(_ORDERS)
+
+
+def load() -> int:
+    """Loads every in-flight order from the order store. Blocking. Returns how many were found."""
+    return _apply(_read_in_flight())
+
+
+async def preload() -> int:
+    """load() with the query off the event loop. Called once at startup, before any handler runs."""
+    return _apply(await asyncio.to_thread(_read_in_flight))
+
+
+def _ensure_loaded():
+    # Only reached if preload() was skipped (scripts, tests)
+    if not _loaded:
+        load()
+
+
+def on_change(callback: Callable[[dict], None]):
+    """Run callback(order) whenever an order is opened or advanced. It must not block."""
+    _LISTENERS.append(callback)
+
+
+def _notify(order: dict):
+    for callback in _LISTENERS:
+        try:
+            callback(order)
+        except Exception as e:
+            print(f"[Lifecycle] Listener failed for {order['order_id']}: {type(e).__name__} - {e}")
+
+
+def in_state(status: str) -> List[dict]:
+    """In-flight orders currently at `status`."""
+    _ensure_loaded()
+    return [order for order in _ORDERS.values() if order["status"] == status]
+
+
+def get(order_id: str) -> Optional[dict]:
+    _ensure_loaded()
+    return _ORDERS.get(order_id)
+
+
+def lookup(message_id: int) -> Optional[Tuple[dict, str]]:
+    """(order, role) for a message that belongs to an in-flight order, else None."""
+    _ensure_loaded()
+    route = _ROUTES.get(message_id)
+    if route is None:
+        return None
+    return _ORDERS[route[0]], route[1]
+
+
+def message_ref(bot, order: dict, role: str):
+    """A PartialMessage for one of the order's messages, or None. Makes no API call."""
+    ref = order.get("messages", {}).get(role)
+    if not ref:
+        return None
+    return bot.get_partial_messageable(ref[0]).get_partial_message(ref[1])
+
+
+async def open_order(user_id: int, order_type: str, message, final_status: str = PICKED_UP, **fields) -> dict:
+    """Starts tracking the order posted as `message` (the staff-facing post)."""
+    _ensure_loaded()
+    order = {
+        "type": order_type,
+        "order_id": f"msg_{message.id}",
+        "user_id": user_id,
+        "status": SUBMITTED,
+        "final_status": final_status,
+        "order_message_id": message.id,
+        "messages": {ORDER_POST: [message.channel.id, message.id]},
+        "texts": {ORDER_POST: message.content},
+        "submitted_at": time.time(),
+        **fields
+    }
+    _index(order)
+    _notify(order)
+    await order_store.add_order(user_id, order)
+    return order
+
+
+async def link(order: dict, role: str, message):
+    """Records another message (DM, notice) as belonging to `order`."""
+    order["messages"][role] = [message.channel.id, message.id]
+    order.setdefault("texts", {})[role] = message.content
+    _ROUTES[message.id] = (order["order_id"], role)
+    await order_store.update_order(order["order_id"], messages=order["messages"], texts=order["texts"])
+
+
+def text(order: dict, role: str) -> str:
+    """The current text of one of the order's messages, as last sent or edited by us."""
+    return order.get("texts", {}).get(role, "")
+
+
+async def append_text(bot, order: dict, role: str, addition: str, priority: int = outbound.NORMAL, **edit_kwargs):
+    """
+    Appends `addition` to one of the order's messages without fetching it first.
+    The stored text is updated before the edit is awaited, so two handlers
+    appending to the same message both land (in one edit, if the first is
+    still queued).
+    """
+    texts = order.setdefault("texts", {})
+    texts[role] = texts.get(role, "") + addition
+    await outbound.edit(message_ref(bot, order, role), priority, content=texts[role], **edit_kwargs)
+    await order_store.update_order(order["order_id"], texts=texts)
+
+
+async def advance(order: dict, status: str, **fields) -> Optional[dict]:
+    """
+    Moves `order` to `status` and persists it. Returns None when the order is
+    already there or further along (a repeated reaction or click), and raises
+    InvalidTransition for a jump the lifecycle does not allow.
+
+    The in-memory state changes before the write is awaited, so a second
+    event arriving meanwhile is already treated as a repeat.
+    """
+    current = order["status"]
+    if _RANK[status] <= _RANK[current]:
+        return None
+    if status not in TRANSITIONS.get(current, ()):
+        raise InvalidTransition(f"{order['order_id']}: {current} -> {status}")
+    order["status"] = status
+    order[f"{status}_at"] = time.time()
+    order.update(fields)
+    if status == order.get("final_status", PICKED_UP):
+        _forget(order)
+    _notify(order)
+    await order_store.update_order(order["order_id"], status=status, **{f"{status}_at": order[f"{status}_at"]}, **fields)
+    return order
@@ -0,0 +1,359 @@
+# utils/order_store.py
+"""
+Indexed SQLite (WAL) repository for confirmed orders.
+
+Replaces data/orders.json. Each order keeps its full dict
+in a JSON column; the fields we query by are mirrored into indexed columns,
+so "latest unpaid order for a user" or "order for this message" is an index
+seek instead of loading every order of every user.
+
+The first time the database is opened, the legacy data/orders.json is
+imported once. sv-persistent-data/data/trader_orders.json is deliberately
+not imported: nothing in this bot writes it, something outside keeps
+adding to it, so the explosives scanner reads it as an external feed.
+The bot's own orders live only here.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import config
+
+ORDER_DB_PATH = config.get().order_db_path
+
+LEGACY_ORDERS_FILE = os.path.join("data", "orders.json")
+
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def _status(order: dict) -> str:
+    if order.get("status"):
+        return order["status"]
+    if order.get("picked_up"):
+        return "picked_up"
+    if order.get("paid"):
+        return "paid"
+    if order.get("confirmed"):
+        return "confirmed"
+    return "submitted"
+
+
+def _snowflake_time(message_id) -> Optional[float]:
+    try:
+        return ((int(message_id) >> 22) + DISCORD_EPOCH_MS) / 1000
+    except (TypeError, ValueError):
+        return None
+
+
+def _row(user_id, order: dict, now: float):
+    # Pinned into the order itself so later updates keep the original value.
+    created_at = order.setdefault("created_at", _snowflake_time(order.get("order_message_id")) or now)
+    return (
+        order["order_id"], str(user_id), order.get("type"), _status(order),
+        order.get("order_message_id"), created_at, now, json.dumps(order)
+    )
+
+
+class OrderRepository:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                " order_id TEXT PRIMARY KEY,"
+                " user_id TEXT NOT NULL,"
+                " type TEXT,"
+                " status TEXT NOT NULL,"
+                " order_message_id INTEGER,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user ON orders (user_id, status, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_message ON orders (order_message_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, updated_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_type ON orders (type, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " name TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (name, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_expiry ON seen (name, expires_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS dm_messages ("
+                " message_id INTEGER PRIMARY KEY,"
+                " user_id INTEGER NOT NULL,"
+                " channel_id INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS external_messages ("
+                " message_id INTEGER PRIMARY KEY,"
+                " channel_id INTEGER NOT NULL,"
+                " record TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_external_created ON external_messages (created_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS deferred_actions ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " due_at REAL NOT NULL,"
+                " action TEXT NOT NULL,"
+                " channel_id INTEGER NOT NULL,"
+                " target_id INTEGER NOT NULL)"
+            )
+
+    def _one(self, sql, params) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _many(self, sql, params) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    # --- Reads ---
+    def get(self, order_id: str) -> Optional[dict]:
+        return self._one("SELECT data FROM orders WHERE order_id = ?", (order_id,))
+
+    def by_message(self, message_id: int) -> Optional[dict]:
+        return self._one("SELECT data FROM orders WHERE order_message_id = ?", (message_id,))
+
+    def latest_unpaid(self, user_id) -> Optional[dict]:
+        """
+        The user's newest confirmed, unpaid order taken by hand (a ✅ on an "Order for"
+        post, or a legacy row). Orders utils/order_lifecycle tracks carry a final_status
+        and take their payment through their own DM, so they are never matched here.
+        """
+        return self._one(
+            "SELECT data FROM orders WHERE user_id = ? AND status = 'confirmed'"
+            " AND json_extract(data, '$.final_status') IS NULL"
+            " ORDER BY created_at DESC LIMIT 1",
+            (str(user_id),)
+        )
+
+    def for_user(self, user_id) -> List[dict]:
+        return self._many("SELECT data FROM orders WHERE user_id = ? ORDER BY created_at", (str(user_id),))
+
+    def with_status(self, statuses: Iterable[str], updated_since: float = 0) -> List[Tuple[str, dict]]:
+        """(user_id, order) pairs in any of `statuses`, changed after `updated_since`."""
+        statuses = list(statuses)
+        marks = ",".join("?" * len(statuses))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT user_id, data FROM orders WHERE status IN ({marks}) AND updated_at > ? ORDER BY updated_at",
+                (*statuses, updated_since)
+            ).fetchall()
+        return [(user_id, json.loads(data)) for user_id, data in rows]
+
+    def all_by_user(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, data FROM orders ORDER BY created_at").fetchall()
+        result: Dict[str, List[dict]] = {}
+        for user_id, data in rows:
+            result.setdefault(user_id, []).append(json.loads(data))
+        return result
+
+    # --- Writes (blocking; module helpers run them in a thread) ---
+    def add(self, user_id, order: dict) -> bool:
+        """Inserts an order; returns False if its order_id already exists."""
+        now = time.time()
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO orders (order_id, user_id, type, status, order_message_id,"
+                " created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _row(user_id, order, now)
+            )
+        return cur.rowcount == 1
+
+    def update(self, order_id: str, **fields) -> Optional[dict]:
+        """Merges `fields` into the stored order. Returns the updated order, or None if it does not exist."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT user_id, data FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+            if row is None:
+                return None
+            user_id, data = row
+            order = json.loads(data)
+            order.update(fields)
+            self._conn.execute(
+                "REPLACE INTO orders (order_id, user_id, type, status, order_message_id,"
+                " created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _row(user_id, order, time.time())
+            )
+        return order
+
+    def import_orders(self, data: Dict[str, List[dict]]) -> int:
+        """Bulk-inserts {user_id: [order, ...]}, skipping order_ids already present. Returns rows added."""
+        now = time.time()
+        rows = [_row(user_id, order, now)
+                for user_id, orders in data.items() for order in orders if order.get("order_id")]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO orders (order_id, user_id, type, status, order_message_id,"
+                " created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return self._conn.total_changes - before
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # --- Dedupe keys (utils/dedupe.TTLDedupe) ---
+    def seen_keys(self, name: str, now: float, limit: int) -> List[Tuple[str, float]]:
+        """Unexpired (key, expires_at) pairs for `name`, newest `limit` of them, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, expires_at FROM seen WHERE name = ? AND expires_at > ?"
+                " ORDER BY expires_at DESC LIMIT ?",
+                (name, now, limit)
+            ).fetchall()
+        return rows[::-1]
+
+    def remember(self, name: str, key: str, expires_at: float):
+        with self._lock, self._conn:
+            self._conn.execute("REPLACE INTO seen (name, key, expires_at) VALUES (?, ?, ?)", (name, key, expires_at))
+
+    def forget_seen(self, name: str, before: float):
+        """Drops keys of `name` that expire at or before `before`."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM seen WHERE name = ? AND expires_at <= ?", (name, before))
+
+    # --- Bot DM messages still to clean up (utils/dm_registry) ---
+    def tracked_dms(self) -> List[Tuple[int, int, int]]:
+        """(user_id, channel_id, message_id) rows, oldest message first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT user_id, channel_id, message_id FROM dm_messages ORDER BY message_id"
+            ).fetchall()
+
+    def track_dm(self, user_id: int, channel_id: int, message_id: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO dm_messages (message_id, user_id, channel_id) VALUES (?, ?, ?)",
+                (message_id, user_id, channel_id)
+            )
+
+    def untrack_dms(self, message_ids: Iterable[int]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM dm_messages WHERE message_id = ?", [(m,) for m in message_ids])
+
+    # --- Order messages posted by others (handlers/reaction_handler) ---
+    def external_message(self, message_id: int) -> Optional[dict]:
+        """The stored routing record, {} if the message was seen and needs nothing, None if never seen."""
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM external_messages WHERE message_id = ?", (message_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_external_message(self, message_id: int, channel_id: int, record: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "REPLACE INTO external_messages (message_id, channel_id, record, created_at) VALUES (?, ?, ?, ?)",
+                (message_id, channel_id, json.dumps(record), time.time())
+            )
+
+    def forget_external_messages(self, before: float):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM external_messages WHERE created_at <= ?", (before,))
+
+    # --- Deferred deletions and cleanups (utils/deferred) ---
+    def pending_actions(self) -> List[Tuple[int, float, str, int, int]]:
+        """(id, due_at, action, channel_id, target_id) rows, soonest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, due_at, action, channel_id, target_id FROM deferred_actions ORDER BY due_at"
+            ).fetchall()
+
+    def add_action(self, due_at: float, action: str, channel_id: int, target_id: int) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "INSERT INTO deferred_actions (due_at, action, channel_id, target_id) VALUES (?, ?, ?, ?)",
+                (due_at, action, channel_id, target_id)
+            ).lastrowid
+
+    def remove_actions(self, action_ids: Iterable[int]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM deferred_actions WHERE id = ?", [(i,) for i in action_ids])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- Legacy import ---
+def _read_json(path) -> Dict[str, List[dict]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def import_legacy(repo: OrderRepository) -> int:
+    """One-shot import of orders.json. Recorded in meta so it runs once."""
+    if repo.get_meta("legacy_import"):
+        return 0
+    try:
+        added = repo.import_orders(_read_json(LEGACY_ORDERS_FILE))
+    except (OSError, ValueError) as e:
+        # Leave the marker unset so the import is retried on the next start.
+        print(f"[OrderStore] Legacy import failed: {type(e).__name__} - {e}")
+        return 0
+    repo.set_meta("legacy_import", str(time.time()))
+    print(f"[OrderStore] Imported {added} legacy order(s) into {ORDER_DB_PATH}.")
+    return added
+
+
+# --- Module API used by the handlers ---
+_REPO: Optional[OrderRepository] = None
+
+
+def get_repository() -> OrderRepository:
+    global _REPO
+    if _REPO is None:
+        _REPO = OrderRepository(ORDER_DB_PATH)
+        import_legacy(_REPO)
+    return _REPO
+
+
+async def get_order(order_id: str) -> Optional[dict]:
+    return await asyncio.to_thread(get_repository().get, order_id)
+
+
+async def find_by_message(message_id: int) -> Optional[dict]:
+    return await asyncio.to_thread(get_repository().by_message, message_id)
+
+
+async def latest_unpaid(user_id) -> Optional[dict]:
+    return await asyncio.to_thread(get_repository().latest_unpaid, user_id)
+
+
+async def orders_for(user_id) -> List[dict]:
+    return await asyncio.to_thread(get_repository().for_user, user_id)
+
+
+async def add_order(user_id, order: dict) -> bool:
+    """Record a new order. `order` must carry a unique "order_id"."""
+    return await asyncio.to_thread(get_repository().add, user_id, order)
+
+
+async def update_order(order_id: str, **fields) -> Optional[dict]:
+    """Set fields on an existing order (e.g. paid=True)."""
+    return await asyncio.to_thread(get_repository().update, order_id, **fields)
@@ -1,88 +1,117 @@
-import json
 import os
-from datetime import datetime
-from utils import variant_utils
+from utils import catalog, log_sink
+from utils.search_index import get_search_index
 
-PRICE_FILE = os.path.join("data", "Final price list .json")
 LOG_DIR = os.path.join("data", "logs")
 FAILED_LOG_FILE = os.path.join(LOG_DIR, "failed_orders.log")
 SUCCESS_LOG_FILE = os.path.join(LOG_DIR, "successful_orders.log")
-
-
-def ensure_log_dir():
-    os.makedirs(LOG_DIR, exist_ok=True)
+MAX_SUGGESTIONS = 3
 
 
 def log_event(log_file, message):
-    ensure_log_dir()
-    with open(log_file, "a") as f:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"[{timestamp}] {message}\n")
-
-
-def load_price_data():
-    if not os.path.exists(PRICE_FILE):
-        raise FileNotFoundError("Price list file not found.")
-    with open(PRICE_FILE, "r") as f:
-        return json.load(f)["categories"]
-
-
-def parse_order_lines(order_text, mode="buy"):
-    data = load_price_data()
+    log_sink.write(log_file, message)
+
+
+def _parse_line(cat, line):
+    """
+    Parses one 'category:item:variant xQuantity' line. The category and variant may be
+    left out ('item xN', 'item:variant xN', 'category:item xN') when the item name is enough.
+    Returns (category, subcategory, item, variant, quantity) or raises ValueError.
+    """
+    if " x" not in line:
+        raise ValueError("Missing 'x' quantity format. Use 'category:item:variant xQuantity'.")
+
+    left, quantity_str = line.rsplit(" x", 1)
+    try:
+        quantity = int(quantity_str.strip())
+    except ValueError:
+        raise ValueError(f"'{quantity_str.strip()}' is not a quantity.")
+    if quantity <= 0:
+        raise ValueError("Quantity must be at least 1.")
+
+    parts = [p.strip() for p in catalog.strip_emoji(left).split(":")]
+    if len(parts) > 3:
+        raise ValueError("Too many ':' separators.")
+    if len(parts) == 3:
+        category, item, variant = parts
+    elif len(parts) == 2 and cat.resolve_category(parts[0]) and cat.resolve_item(cat.resolve_category(parts[0]), parts[1]):
+        category, item, variant = parts[0], parts[1], ""  # category:item
+    elif len(parts) == 2:
+        category, item, variant = None, parts[0], parts[1]  # item:variant
+    else:
+        category, item, variant = None, parts[0], ""
+    variant = variant or "Default"
+
+    if category:
+        category_key = cat.resolve_category(category)
+        if not category_key:
+            raise ValueError(f"Unknown category '{category}'.")
+        found = cat.resolve_item(category_key, item)
+        if not found:
+            raise ValueError(f"Unknown item '{item}' in category '{category}'.")
+        subcategory, item = found
+    else:
+        found = cat.find_item(item)
+        if not found:
+            raise ValueError(f"Unknown item '{item}'.")
+        category_key, subcategory, item = found
+
+    variant_key = cat.resolve_variant(category_key, subcategory, item, variant)
+    if not variant_key:
+        options = ", ".join(v.split("<")[0].strip() for v in cat.variants(category_key, subcategory, item))
+        raise ValueError(f"Unknown variant '{variant}' for item '{item}' (choose from: {options}).")
+    return category_key, subcategory, item, variant_key, quantity
+
+
+def parse_order_lines(order_text, mode="buy", cat=None):
+    """
+    Validates every line of a pasted order against the compiled catalog in one pass.
+
+    Returns (result, errors): result is {"items": [...], "total": N} for the lines that
+    parsed, errors is a list of messages (with close-match suggestions) for the rest.
+    `cat` lets a session parse against the catalog snapshot its cart is pinned to.
+    """
+    cat = cat or catalog.get_catalog()
     parsed_items = []
+    errors = []
     total = 0
 
     if not order_text.strip():
-        return None, "No items provided in the order."
+        return None, ["No items provided in the order."]
 
     for line_num, line in enumerate(order_text.strip().splitlines(), start=1):
+        if not line.strip():
+            continue
         try:
-            if " x" not in line:
-                raise ValueError("Missing 'x' quantity format. Use 'item:variant xQuantity'.")
-
-            left, quantity_str = line.rsplit(" x", 1)
-            category, item, variant = map(str.strip, left.split(":"))
-            quantity = int(quantity_str.strip())
-
-            variant = variant or "Default"
-
-            if category not in data:
-                raise ValueError(f"Unknown category '{category}'.")
-
-            if item not in data[category]:
-                raise ValueError(f"Unknown item '{item}' in category '{category}'.")
-
-            item_data = data[category][item]
-
-            if isinstance(item_data, dict):
-                variants = variant_utils.get_variants(item_data)
-                if not variant_utils.variant_exists(variants, variant):
-                    raise ValueError(f"Unknown variant '{variant}' for item '{item}'.")
-                variant = next(v for v in variants if v.lower() == variant.lower())
-                base_price = item_data[variant]
-            else:
-                if variant.lower() != "default":
-                    raise ValueError(f"Item '{item}' does not support variants.")
-                base_price = item_data
-
-            price = round(base_price / 3) if mode == "sell" else base_price
-            subtotal = price * quantity
-
-            parsed_items.append({
-                "category": category,
-                "item": item,
-                "variant": variant,
-                "quantity": quantity,
-                "price": price,
-                "subtotal": subtotal
-            })
-            total += subtotal
-
-        except Exception as e:
-            log_event(FAILED_LOG_FILE, f"Line {line_num}: '{line}' — {type(e).__name__}: {e}")
-            return None, f"Error on line {line_num}: '{line}' — {e}"
-
-    items_summary = ", ".join(f"{i['quantity']}x {i['item']} ({i['variant']})" for i in parsed_items)
-    log_event(SUCCESS_LOG_FILE, f"Order Parsed - Total: ${total:,} | Items: {items_summary}")
-
-    return {"items": parsed_items, "total": total}, None
+            category, subcategory, item, variant, quantity = _parse_line(cat, line.strip())
+        except ValueError as e:
+            message = f"Line {line_num}: '{line.strip()}' — {e}"
+            guess_from = catalog.strip_emoji(line.rsplit(" x", 1)[0]).split(":")
+            suggestions = get_search_index(cat).suggestions(guess_from[1] if len(guess_from) == 3 else guess_from[0], MAX_SUGGESTIONS)
+            if suggestions:
+                message += f" Did you mean: {', '.join(suggestions)}?"
+            errors.append(message)
+            continue
+
+        entry = cat.entry(category, subcategory, item, variant)
+        price = round(entry.sell) if mode == "sell" else entry.buy
+        subtotal = price * quantity
+
+        parsed_items.append({
+            "category": category,
+            "subcategory": subcategory,
+            "item": item,
+            "variant": variant,
+            "quantity": quantity,
+            "price": price,
+            "subtotal": subtotal
+        })
+        total += subtotal
+
+    if errors:
+        log_event(FAILED_LOG_FILE, f"Order Parse - {len(errors)} bad line(s): " + " | ".join(errors))
+    if parsed_items:
+        items_summary = ", ".join(f"{i['quantity']}x {i['item']} ({i['variant']})" for i in parsed_items)
+        log_event(SUCCESS_LOG_FILE, f"Order Parsed - Total: ${total:,} | Items: {items_summary}")
+
+    return {"items": parsed_items, "total": total}, errors
@@ -0,0 +1,245 @@
+# utils/outbound.py
+"""
+Prioritised, rate-limit-aware queue for the bot's busiest outbound calls.
+
+Sends, edits and reaction changes on the same channel go into one lane
+per (route, channel), matching how Discord buckets them. Each lane hands
+its jobs to discord.py highest priority first, and never has more in
+flight than the bucket has requests left, so discord.py's own FIFO wait
+is never where a payment prompt ends up stuck behind a GIF. Bucket sizes
+come from the X-RateLimit headers of every response (see trace_config()),
+and a lane keeps the last request of a window for non-cosmetic jobs.
+
+An edit to a message that already has an edit waiting is merged into it:
+the later content wins and both callers get the same result.
+
+Every helper returns a future. Await it for the result, or leave it for
+fire-and-forget traffic; failures are logged either way.
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import aiohttp
+
+CRITICAL = 0  # order posts, payment prompts and notices staff act on
+NORMAL = 1    # confirmations, status edits, reactions
+COSMETIC = 2  # GIFs and celebration messages
+PRIORITY_NAMES = {CRITICAL: "critical", NORMAL: "normal", COSMETIC: "cosmetic"}
+
+MAX_IN_FLIGHT = 5     # per lane, whatever the bucket allows
+COSMETIC_RESERVE = 1  # requests per window a cosmetic job may not use
+MAX_LANES = 256       # idle lanes past this are dropped
+
+# Message sends, edits and reactions only; anchored so sub-routes such as
+# /messages/bulk-delete, which Discord buckets separately, match no lane.
+_CHANNEL_ROUTE = re.compile(r"/channels/(\d+)/messages(?:(/\d+)(/reactions(?:/[^/]+){0,2})?)?$")
+
+_SEQUENCE = itertools.count()
+_STATS: Dict[str, Dict[str, float]] = {
+    name: {"queued": 0, "sent": 0, "failed": 0, "coalesced": 0, "max_wait_ms": 0.0}
+    for name in PRIORITY_NAMES.values()
+}
+
+
+class _Job:
+    __slots__ = ("priority", "call", "kwargs", "future", "key", "queued_at")
+
+    def __init__(self, priority: int, call: Callable[..., Awaitable[Any]], kwargs: dict, key: Optional[Hashable]):
+        self.priority = priority
+        self.call = call
+        self.kwargs = kwargs
+        self.future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(_consume_exception)
+        self.key = key
+        self.queued_at = time.perf_counter()
+
+
+def _consume_exception(future: asyncio.Future):
+    # The failure is already logged; this keeps unawaited futures quiet.
+    if not future.cancelled():
+        future.exception()
+
+
+class _Lane:
+    def __init__(self, name: str):
+        self.name = name
+        self.queue: List[Tuple[int, int, _Job]] = []
+        self.pending: Dict[Hashable, _Job] = {}  # coalescing key -> queued job
+        self.in_flight = 0
+        self.limit: Optional[int] = None  # requests per window, once a response has told us
+        self.remaining = 1
+        self.reset_at = 0.0
+        self.worker: Optional[asyncio.Task] = None
+        self.wake = asyncio.Event()
+
+    def observe(self, limit: int, remaining: int, reset_after: float):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = time.monotonic() + reset_after
+        self.wake.set()
+
+    def throttle(self, retry_after: float):
+        self.remaining = 0
+        self.reset_at = time.monotonic() + retry_after
+
+    def _available(self, now: float) -> int:
+        if self.limit is not None and now >= self.reset_at:
+            self.remaining = self.limit  # the window has rolled over
+        return self.remaining
+
+    def submit(self, job: _Job):
+        heapq.heappush(self.queue, (job.priority, next(_SEQUENCE), job))
+        if job.key is not None:
+            self.pending[job.key] = job
+        _STATS[PRIORITY_NAMES[job.priority]]["queued"] += 1
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._drain())
+        else:
+            self.wake.set()
+
+    async def _drain(self):
+        while self.queue:
+            now = time.monotonic()
+            job = self.queue[0][2]
+            reserve = COSMETIC_RESERVE if job.priority == COSMETIC else 0
+            if self._available(now) <= reserve and self.reset_at > now:
+                await self._wait(self.reset_at - now)
+                continue
+            if self.in_flight >= min(MAX_IN_FLIGHT, max(1, self.remaining)):
+                await self._wait(None)
+                continue
+            heapq.heappop(self.queue)
+            if job.key is not None:
+                self.pending.pop(job.key, None)
+            self.in_flight += 1
+            self.remaining -= 1  # the response headers correct this
+            asyncio.create_task(self._run(job))
+        self.worker = None
+        _drop_idle_lanes()
+
+    async def _wait(self, timeout: Optional[float]):
+        self.wake.clear()
+        try:
+            await asyncio.wait_for(self.wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, job: _Job):
+        stats = _STATS[PRIORITY_NAMES[job.priority]]
+        waited = (time.perf_counter() - job.queued_at) * 1000
+        if waited > stats["max_wait_ms"]:
+            stats["max_wait_ms"] = round(waited, 2)
+        try:
+            result = await job.call(**job.kwargs)
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"[Outbound] {self.name} ({PRIORITY_NAMES[job.priority]}) failed: {type(e).__name__} - {e}")
+            job.future.set_exception(e)
+        else:
+            stats["sent"] += 1
+            job.future.set_result(result)
+        finally:
+            self.in_flight -= 1
+            self.wake.set()
+
+
+# (route, channel_id) -> lane
+_LANES: Dict[Tuple[str, int], _Lane] = {}
+
+
+def _lane(route: str, channel_id: int) -> _Lane:
+    lane = _LANES.get((route, channel_id))
+    if lane is None:
+        lane = _LANES[(route, channel_id)] = _Lane(f"{route}:{channel_id}")
+    return lane
+
+
+def _drop_idle_lanes():
+    if len(_LANES) <= MAX_LANES:
+        return
+    now = time.monotonic()
+    for key in [key for key, lane in _LANES.items()
+                if lane.worker is None and not lane.in_flight and lane.reset_at <= now]:
+        del _LANES[key]
+
+
+def _enqueue(route: str, channel_id: int, priority: int, call, key: Optional[Hashable] = None, **kwargs) -> asyncio.Future:
+    lane = _lane(route, channel_id)
+    if key is not None and key in lane.pending:
+        job = lane.pending[key]
+        job.kwargs.update(kwargs)
+        if priority < job.priority:
+            job.priority = priority
+            lane.queue = [(queued.priority, sequence, queued) for _, sequence, queued in lane.queue]
+            heapq.heapify(lane.queue)
+        _STATS[PRIORITY_NAMES[priority]]["coalesced"] += 1
+        return job.future
+    job = _Job(priority, call, kwargs, key)
+    lane.submit(job)
+    return job.future
+
+
+def send(channel, priority: int = NORMAL, **kwargs) -> asyncio.Future:
+    """channel.send(**kwargs) through the channel's send lane."""
+    return _enqueue("send", channel.id, priority, channel.send, **kwargs)
+
+
+def edit(message, priority: int = NORMAL, **kwargs) -> asyncio.Future:
+    """message.edit(**kwargs), merged with any edit of the same message still waiting."""
+    return _enqueue("edit", message.channel.id, priority, message.edit, key=message.id, **kwargs)
+
+
+def add_reaction(message, emoji: str, priority: int = NORMAL) -> asyncio.Future:
+    return _enqueue("reaction", message.channel.id, priority, message.add_reaction, emoji=emoji)
+
+
+def clear_reaction(message, emoji: str, priority: int = NORMAL) -> asyncio.Future:
+    return _enqueue("reaction", message.channel.id, priority, message.clear_reaction, emoji=emoji)
+
+
+def stats() -> Dict[str, dict]:
+    """Per-priority counters, plus the current depth of every busy lane."""
+    result = {name: dict(values) for name, values in _STATS.items()}
+    result["_lanes"] = {lane.name: len(lane.queue) + lane.in_flight for lane in _LANES.values()
+                        if lane.queue or lane.in_flight}
+    return result
+
+
+def _route_of(method: str, path: str) -> Optional[Tuple[str, int]]:
+    match = _CHANNEL_ROUTE.search(path)
+    if match is None:
+        return None
+    channel_id = int(match.group(1))
+    if match.group(3):
+        return "reaction", channel_id
+    if match.group(2):
+        return ("edit", channel_id) if method == "PATCH" else None
+    return ("send", channel_id) if method == "POST" else None
+
+
+async def _on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+    route = _route_of(params.method, params.url.path)
+    if route is None or route not in _LANES:
+        return
+    headers = params.response.headers
+    lane = _LANES[route]
+    if params.response.status == 429:
+        lane.throttle(float(headers.get("Retry-After", 1)))
+    elif "X-RateLimit-Limit" in headers:
+        lane.observe(
+            int(headers["X-RateLimit-Limit"]),
+            int(headers.get("X-RateLimit-Remaining", 0)),
+            float(headers.get("X-RateLimit-Reset-After", 0))
+        )
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Pass as the bot's http_trace so lanes learn bucket sizes from responses."""
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(_on_request_end)
+    return trace
@@ -0,0 +1,140 @@
+# utils/search_index.py
+"""
+In-memory item search for slash-command autocomplete.
+
+Built once per catalog snapshot (see get_search_index) from every
+item/variant row. Queries are answered from a token-prefix map first
+("ass ba" -> Assault Bag) and fall back to trigram overlap for typos
+("asault bag"), so lookups never scan the raw price list.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from utils.catalog import Catalog, PriceEntry, normalize_label
+
+MAX_PREFIX = 12
+MAX_RESULTS = 25  # Discord's cap on autocomplete choices
+
+# Autocomplete values are "#<entry index>@<catalog version>", so text a user
+# typed without picking a suggestion (e.g. "22") is never read as an index.
+_CHOICE_RE = re.compile(r"#(\d+)@(\d+)")
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def entry_label(entry: PriceEntry) -> str:
+    """Human-readable "Item (Variant)" name, without emoji markup."""
+    variant = normalize_label(entry.variant)
+    if not variant or variant == "default":
+        return entry.item
+    return f"{entry.item} ({entry.variant.split('<')[0].strip()})"
+
+
+class SearchIndex:
+    def __init__(self, catalog: Catalog):
+        self.version = catalog.version
+        self.entries: List[PriceEntry] = catalog.entries()
+        self._names: List[str] = []
+        self._gram_counts: List[int] = []
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._exact: Dict[str, List[int]] = {}  # full label or bare item name -> entry indexes
+
+        for idx, entry in enumerate(self.entries):
+            name = normalize_label(entry_label(entry))
+            self._names.append(name)
+            self._exact.setdefault(name, []).append(idx)
+            item = normalize_label(entry.item)
+            if item != name:
+                self._exact.setdefault(item, []).append(idx)
+            for token in name.split():
+                for n in range(1, min(len(token), MAX_PREFIX) + 1):
+                    self._prefixes.setdefault(token[:n], set()).add(idx)
+            grams = _trigrams(name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(idx)
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[int]:
+        """Returns entry indexes best matching `query`, most relevant first."""
+        q = normalize_label(query)
+        if not q:
+            return list(range(min(limit, len(self.entries))))
+
+        # 1) every query token is a prefix of some token in the name
+        hits: Optional[Set[int]] = None
+        for token in q.split():
+            ids = self._prefixes.get(token[:MAX_PREFIX], set())
+            hits = ids if hits is None else hits & ids
+            if not hits:
+                break
+        if hits:
+            return sorted(hits, key=lambda i: (not self._names[i].startswith(q), len(self._names[i]), self._names[i]))[:limit]
+
+        # 2) fuzzy: rank by shared trigrams (Jaccard)
+        grams = _trigrams(q)
+        scores: Dict[int, int] = {}
+        for gram in grams:
+            for idx in self._trigrams.get(gram, ()):
+                scores[idx] = scores.get(idx, 0) + 1
+        ranked = sorted(
+            scores,
+            key=lambda i: -scores[i] / (len(grams) + self._gram_counts[i] - scores[i]),
+        )
+        return [i for i in ranked if scores[i] * 3 >= len(grams)][:limit]
+
+    def choice_value(self, idx: int) -> str:
+        """The autocomplete value for entry `idx` of this snapshot."""
+        return f"#{idx}@{self.version}"
+
+    def resolve(self, value: str) -> Optional[PriceEntry]:
+        """
+        Maps an autocomplete value (see choice_value) back to its entry. Typed text only
+        resolves when it names exactly one entry ("Assault Bag (Camo)", or an item with a
+        single variant); anything else returns None, so a near miss is never added.
+        """
+        choice = _CHOICE_RE.fullmatch(value)
+        if choice:
+            idx, version = int(choice.group(1)), int(choice.group(2))
+            # A value from another snapshot's index may point at a different row
+            return self.entries[idx] if version == self.version and idx < len(self.entries) else None
+        found = self._exact.get(normalize_label(value), ())
+        return self.entries[found[0]] if len(found) == 1 else None
+
+    def suggestions(self, text: str, limit: int = 3) -> List[str]:
+        """Distinct "Item (Variant)" names best matching `text`, for did-you-mean replies."""
+        names = []
+        for idx in self.search(text, limit=limit * 3):
+            name = entry_label(self.entries[idx])
+            if name not in names:
+                names.append(name)
+        return names[:limit]
+
+    def no_match(self, text: str) -> str:
+        """Reply for typed text that resolve() could not pin to one entry."""
+        names = self.suggestions(text)
+        hint = f" Did you mean: {', '.join(f'**{n}**' for n in names)}? Pick one from the list." if names else ""
+        return f"No single item matches **{text}**.{hint}"
+
+
+def get_search_index(catalog: Catalog) -> SearchIndex:
+    return catalog.cached("search_index", lambda: SearchIndex(catalog))
+
+
+def suggest(catalog: Catalog, query: str, price_of: Callable[[PriceEntry], Optional[float]]) -> List[Tuple[str, str]]:
+    """
+    Autocomplete rows as (display name, value) pairs. The value encodes the entry's
+    index and the snapshot version; pass it back to SearchIndex.resolve.
+    """
+    index = get_search_index(catalog)
+    rows = []
+    for idx in index.search(query):
+        entry = index.entries[idx]
+        price = price_of(entry)
+        name = entry_label(entry) if price is None else f"{entry_label(entry)} — ${round(price):,}"
+        rows.append((name[:100], index.choice_value(idx)))
+    return rows
@@ -1,35 +1,60 @@
+import asyncio
+import heapq
 import json
 import os
 import time
+import uuid
+import weakref
 
-# Load config
-config = json.loads(os.environ.get("CONFIG_JSON"))
-SESSION_TIMEOUT = config.get("session_timeout_minutes", 15) * 60  # Defaults to 15 minutes
+from utils import config, log_sink, order_store
+from utils.cart import Cart
+from utils.session_store import SessionStore
+
+def session_timeout():
+    """Inactivity timeout in seconds; read on each use, so a config reload applies to live sessions."""
+    return config.get().session_timeout
 
-ORDERS_FILE = "data/orders.json"
 LOG_DIR = "data/logs"
 LOG_FILE = os.path.join(LOG_DIR, "session_activity.log")
 SESSION_CACHE = {}
+SESSION_VIEWS = {}  # user_id -> the live DM view driving that session (never persisted)
+# Min-heap of (expires_at, user_id). Entries go stale when a session is touched again or
+# ended; pop_expired() skips those, so every touch and eviction is O(log n).
+_EXPIRY_HEAP = []
+
+# Optional durable backend: with "session_db_path" set, changed sessions are written
+# behind to SQLite by flush() and restored at startup, so carts survive restarts.
+SESSION_DB_PATH = config.get().session_db_path
+_STORE = None
+_DIRTY = set()
 
-def ensure_log_dir():
-    """Ensure that the log directory exists."""
-    os.makedirs(LOG_DIR, exist_ok=True)
+# Per-user locks serialising cart mutations. Views hold a strong reference (plus whoever is
+# waiting on it), so an entry disappears on its own once the session's view is gone.
+_LOCKS = weakref.WeakValueDictionary()
 
 def log(message):
-    """Write a timestamped log entry to the session log file."""
-    ensure_log_dir()
-    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-    full_message = f"[SessionManager] [{timestamp}] {message}"
-    print(full_message)
-    with open(LOG_FILE, "a") as log_file:
-        log_file.write(full_message + "\n")
-
-def start_session(user_id):
-    """Start a new session for a user."""
+    """Queue a timestamped entry for the session log file (written off the event loop)."""
+    log_sink.write(LOG_FILE, message, prefix="[SessionManager]")
+
+def _mark_dirty(user_id):
+    if _STORE is not None:
+        _DIRTY.add(user_id)
+
+def _touch(user_id, now=None):
+    """Mark a session active and (re)schedule its expiry."""
+    now = now or time.time()
+    SESSION_CACHE[user_id]["last_active"] = now
+    heapq.heappush(_EXPIRY_HEAP, (now + session_timeout(), user_id))
+    _mark_dirty(user_id)
+
+def start_session(user_id, kind=None):
+    """Start a new session for a user. `kind` names the view that owns it (trader, selltrader, tradepost)."""
     SESSION_CACHE[user_id] = {
-        "items": [],
-        "last_active": time.time()
+        "items": Cart(),
+        "kind": kind,
+        "submit_token": uuid.uuid4().hex
     }
+    _touch(user_id)
     log(f"Session started for user {user_id}.")
 
 def get_session(user_id):
@@ -42,92 +67,249 @@ def add_item(user_id, item):
     """Add an item to the user's session."""
     if user_id not in SESSION_CACHE:
         start_session(user_id)
-    SESSION_CACHE[user_id]["items"].append(item)
-    SESSION_CACHE[user_id]["last_active"] = time.time()
-    log(f"Added item to session for user {user_id}: {item}.")
+    SESSION_CACHE[user_id]["items"].add_item(item)
+    _touch(user_id)
+    log(f"Added item to session for user {user_id}: {item.get('item')} x{item.get('quantity', 1)}.")
+
+def add_items(user_id, items):
+    """Add several items to the user's session in one update."""
+    if user_id not in SESSION_CACHE:
+        start_session(user_id)
+    cart = SESSION_CACHE[user_id]["items"]
+    for item in items:
+        cart.add_item(item)
+    _touch(user_id)
+    log(f"Added {len(items)} item(s) to session for user {user_id}.")
 
 def get_session_items(user_id):
-    """Get the list of items in the user's session, clearing expired sessions."""
+    """Get the Cart for the user's session (empty if there is none), clearing expired sessions."""
     session = SESSION_CACHE.get(user_id)
     if not session or not is_session_active(user_id):
         clear_session(user_id)
-        return []
+        return Cart()
     return session["items"]
 
 def set_session_items(user_id, items):
-    """Replace the list of items in a user's session."""
+    """Replace the items in a user's session (a Cart, or a list of item dicts)."""
     if user_id not in SESSION_CACHE:
         start_session(user_id)
-    SESSION_CACHE[user_id]["items"] = items
-    SESSION_CACHE[user_id]["last_active"] = time.time()
+    SESSION_CACHE[user_id]["items"] = items if isinstance(items, Cart) else Cart.from_items(items)
+    _touch(user_id)
     log(f"Session items replaced for user {user_id}.")
 
+def remove_last_item(user_id):
+    """Undo the last add to the user's cart. Returns what was removed as a CartLine, or None if the cart was empty."""
+    session = SESSION_CACHE.get(user_id)
+    if not session:
+        return None
+    removed = session["items"].remove_last()
+    if removed is not None:
+        _touch(user_id)
+        log(f"Removed item from session for user {user_id}: {removed.item} x{removed.quantity}.")
+    return removed
+
 def update_session(user_id, updates: dict):
     """Update arbitrary keys in the user's session (e.g., start_msg_id, cart_messages)."""
     if user_id not in SESSION_CACHE:
         start_session(user_id)
     SESSION_CACHE[user_id].update(updates)
-    SESSION_CACHE[user_id]["last_active"] = time.time()
-    log(f"Session for user {user_id} updated with: {updates}")
+    _touch(user_id)
+    log(f"Session for user {user_id} updated keys: {', '.join(updates)}")
+
+def session_lock(user_id):
+    """The asyncio.Lock to hold around any read-modify-write of this user's session."""
+    lock = _LOCKS.get(user_id)
+    if lock is None:
+        lock = _LOCKS[user_id] = asyncio.Lock()
+    return lock
+
+def claim_submission(user_id):
+    """
+    Take the cart's one-time submit token. Returns the token the first time it is
+    called for a cart and None afterwards, so a cart can only be posted once.
+    """
+    session = SESSION_CACHE.get(user_id)
+    if not session or session.get("submitted"):
+        return None
+    session["submitted"] = True
+    _mark_dirty(user_id)
+    # Sessions restored from before tokens existed get one on first claim.
+    return session.setdefault("submit_token", uuid.uuid4().hex)
+
+def release_submission(user_id):
+    """Hand the token back after a failed post so the user can retry the submit."""
+    session = SESSION_CACHE.get(user_id)
+    if session and session.pop("submitted", None):
+        _mark_dirty(user_id)
+
+def attach_view(user_id, view):
+    """Remember the DM view for a user's session so slash commands can drive the same cart."""
+    SESSION_VIEWS[user_id] = view
+
+def get_view(user_id):
+    """Return the view attached to a user's active session, or None."""
+    if not is_session_active(user_id):
+        return None
+    return SESSION_VIEWS.get(user_id)
+
+def remember_message(user_id, name, message):
+    """Record the channel/ID of a DM message owned by the session's view (for reattaching after a restart)."""
+    session = SESSION_CACHE.get(user_id)
+    if session is None or message is None:
+        return
+    session.setdefault("messages", {})[name] = [message.channel.id, message.id]
+    _mark_dirty(user_id)
+
+class TracksSessionMessages:
+    """
+    Mixin for the DM session views. Assigning any attribute named in `tracked_messages`
+    records that message in the session via remember_message().
+    """
+    tracked_messages = ("ui_message", "cart_message")
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if value is not None and name in self.tracked_messages:
+            remember_message(self.user_id, name, value)
+
+def restored_sessions(kind):
+    """Sessions of `kind` loaded from the store that have no live view yet."""
+    return [(user_id, session) for user_id, session in list(SESSION_CACHE.items())
+            if session.get("kind") == kind and user_id not in SESSION_VIEWS]
+
+def message_ref(bot, session, name):
+    """A PartialMessage for a remembered session message, or None. Makes no API call."""
+    ref = session.get("messages", {}).get(name)
+    if not ref:
+        return None
+    return bot.get_partial_messageable(ref[0]).get_partial_message(ref[1])
+
+def _drop_view(user_id):
+    view = SESSION_VIEWS.pop(user_id, None)
+    updates = getattr(view, "cart_updates", None)
+    if updates is not None and updates.requested:
+        log(f"Cart message updates for user {user_id}: {updates.summary()}.")
 
 def clear_session(user_id, force_clear=False):
     """Clear a user's session, with optional force override."""
     if user_id in SESSION_CACHE or force_clear:
         log(f"Session cleared for user {user_id}.")
     SESSION_CACHE.pop(user_id, None)
+    _drop_view(user_id)
+    _mark_dirty(user_id)
 
 def end_session(user_id):
     """End the user's session and remove from cache."""
     if user_id in SESSION_CACHE:
         log(f"Session ended for user {user_id}.")
         del SESSION_CACHE[user_id]
+    _drop_view(user_id)
+    _mark_dirty(user_id)
 
 def is_session_active(user_id):
-    """Check if a session is active and hasn't timed out."""
+    """Check if a session is active and hasn't timed out (the timeout is logged when pop_expired evicts it)."""
     session = SESSION_CACHE.get(user_id)
     if not session:
         return False
-    if (time.time() - session["last_active"]) >= SESSION_TIMEOUT:
-        log(f"Session for user {user_id} timed out.")
-        return False
-    return True
+    return (time.time() - session["last_active"]) < session_timeout()
 
 def remove_item(user_id, item_index):
     """Remove an item from a user's session by its index."""
     if user_id in SESSION_CACHE and 0 <= item_index < len(SESSION_CACHE[user_id]["items"]):
-        removed_item = SESSION_CACHE[user_id]["items"].pop(item_index)
-        SESSION_CACHE[user_id]["last_active"] = time.time()
-        log(f"Removed item from session for user {user_id}: {removed_item}.")
+        cart = SESSION_CACHE[user_id]["items"]
+        removed_item = cart.remove(list(cart)[item_index].key)
+        _touch(user_id)
+        log(f"Removed item from session for user {user_id}: {removed_item.item} x{removed_item.quantity}.")
 
 def load_orders():
-    """Load existing orders from the orders file."""
-    if not os.path.exists(ORDERS_FILE):
-        log("Orders file not found. Returning empty orders.")
-        return {}
-    with open(ORDERS_FILE, "r") as f:
-        return json.load(f)
-
-def save_orders(data):
-    """Save current orders to the orders file."""
-    ensure_log_dir()
-    with open(ORDERS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-    log("Orders file saved successfully.")
+    """Full order history as {user_id: [order, ...]}, read from the order store."""
+    return order_store.get_repository().all_by_user()
 
 def validate_session(user_id):
     """Ensure the session is active and reset timeout if still valid."""
     current_time = time.time()
     session = SESSION_CACHE.get(user_id)
-    if session and (current_time - session["last_active"] < SESSION_TIMEOUT):
-        SESSION_CACHE[user_id]["last_active"] = current_time
+    if session and (current_time - session["last_active"] < session_timeout()):
+        _touch(user_id, current_time)
         return True
     end_session(user_id)
     return False
 
-def cleanup_inactive_sessions():
-    """Periodically call this to clean up expired sessions."""
-    current_time = time.time()
-    expired_users = [user_id for user_id, session in SESSION_CACHE.items()
-                     if current_time - session["last_active"] >= SESSION_TIMEOUT]
-    for user_id in expired_users:
+def next_expiry():
+    """Timestamp of the earliest scheduled expiry, or None when no sessions are tracked."""
+    return _EXPIRY_HEAP[0][0] if _EXPIRY_HEAP else None
+
+def pop_expired(now=None):
+    """
+    Evict every session whose timeout has passed.
+    Returns [(user_id, view)] so the caller can tear down the views and notify users.
+    """
+    now = now or time.time()
+    expired = []
+    while _EXPIRY_HEAP and _EXPIRY_HEAP[0][0] <= now:
+        expires_at, user_id = heapq.heappop(_EXPIRY_HEAP)
+        session = SESSION_CACHE.get(user_id)
+        if not session or session["last_active"] + session_timeout() > now:
+            continue  # stale entry: session ended or was touched again
+        view = SESSION_VIEWS.get(user_id)
+        log(f"Session for user {user_id} timed out.")
         end_session(user_id)
+        expired.append((user_id, view))
+    return expired
+
+def _reschedule(settings):
+    """Rebuild the expiry heap after a config reload changed the timeout."""
+    _EXPIRY_HEAP[:] = [(session["last_active"] + settings.session_timeout, user_id)
+                       for user_id, session in SESSION_CACHE.items()]
+    heapq.heapify(_EXPIRY_HEAP)
+
+config.on_reload(_reschedule)
+
+def cleanup_inactive_sessions():
+    """Evict expired sessions; returns the user IDs that were removed."""
+    return [user_id for user_id, _ in pop_expired()]
+
+async def flush():
+    """Write every session changed since the last flush to the store in one batch."""
+    if _STORE is None or not _DIRTY:
+        return
+    dirty = list(_DIRTY)
+    _DIRTY.clear()
+    upserts, deletes = {}, []
+    for user_id in dirty:
+        session = SESSION_CACHE.get(user_id)
+        if session is None:
+            deletes.append(user_id)
+            continue
+        try:
+            upserts[user_id] = json.dumps(session, default=_encode)
+        except (TypeError, ValueError) as e:
+            log(f"Session for user {user_id} is not serializable, not persisted: {e}")
+    try:
+        await asyncio.to_thread(_STORE.write, upserts, deletes)
+    except Exception as e:
+        _DIRTY.update(dirty)  # retry on the next flush
+        log(f"Session flush failed: {type(e).__name__} - {e}")
+
+def _encode(value):
+    if isinstance(value, Cart):
+        return value.to_items()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _restore():
+    """Load unexpired sessions from the store into memory (called once at import)."""
+    now = time.time()
+    restored = 0
+    for user_id, session in _STORE.load().items():
+        if now - session.get("last_active", 0) >= session_timeout():
+            _DIRTY.add(user_id)  # expired while we were down; deleted on the next flush
+            continue
+        session["items"] = Cart.from_items(session.get("items", []))
+        SESSION_CACHE[user_id] = session
+        heapq.heappush(_EXPIRY_HEAP, (session["last_active"] + session_timeout(), user_id))
+        restored += 1
+    log(f"Restored {restored} session(s) from {SESSION_DB_PATH}.")
+
+if SESSION_DB_PATH:
+    _STORE = SessionStore(SESSION_DB_PATH)
+    _restore()
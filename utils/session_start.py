@@ -0,0 +1,78 @@
+# utils/session_start.py
+"""
+Single-message start for the /trader and /selltrader DM sessions.
+
+The slash command is deferred first, so Discord has its acknowledgement
+after one round trip. The session then opens with one DM: an embed with
+the GIF as its image and the session banner as its text, carrying the
+view. The old flow sent the GIF, the banner and the view as three DMs
+before answering the interaction.
+
+Each start records how long the acknowledgement and the DM took, so the
+numbers can be compared with the old flow from the session log.
+"""
+
+import time
+from typing import Dict
+
+import discord
+
+from utils import session_manager
+
+SESSION_GIF = "https://cdn.discordapp.com/attachments/1371698983604326440/1373359533304582237/ezgif.com-optimize.gif"
+
+_TOTALS: Dict[str, float] = {"started": 0, "failed": 0, "ack_ms": 0.0, "ready_ms": 0.0, "max_ready_ms": 0.0}
+
+
+def stats() -> Dict[str, float]:
+    """Session starts so far, with the average time to acknowledge and to have the DM up."""
+    started = _TOTALS["started"]
+    return {
+        "started": started,
+        "failed": _TOTALS["failed"],
+        "avg_ack_ms": round(_TOTALS["ack_ms"] / started, 2) if started else 0.0,
+        "avg_ready_ms": round(_TOTALS["ready_ms"] / started, 2) if started else 0.0,
+        "max_ready_ms": _TOTALS["max_ready_ms"]
+    }
+
+
+def banner(title: str, hint: str) -> str:
+    return (
+        "┏━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+        f"{title}\n"
+        "┗━━━━━━━━━━━━━━━━━━━━━━━┛\n"
+        f"{hint}"
+    )
+
+
+async def open_dm(interaction: discord.Interaction, title: str, hint: str, view: discord.ui.View) -> discord.Message:
+    """Defers `interaction` and sends the session message. Reply afterwards with reply()."""
+    started = time.perf_counter()
+    await interaction.response.defer()
+    acked = time.perf_counter()
+
+    embed = discord.Embed(description=banner(title, hint))
+    embed.set_image(url=SESSION_GIF)
+    try:
+        message = await interaction.user.send(embed=embed, view=view)
+    except Exception:
+        _TOTALS["failed"] += 1
+        raise
+    ready = time.perf_counter()
+
+    ack_ms = (acked - started) * 1000
+    ready_ms = (ready - started) * 1000
+    _TOTALS["started"] += 1
+    _TOTALS["ack_ms"] += ack_ms
+    _TOTALS["ready_ms"] += ready_ms
+    _TOTALS["max_ready_ms"] = max(_TOTALS["max_ready_ms"], round(ready_ms, 2))
+    session_manager.log(f"Session start for user {interaction.user.id}: acknowledged in {ack_ms:.0f} ms, DM ready in {ready_ms:.0f} ms.")
+    return message
+
+
+async def reply(interaction: discord.Interaction, content: str, **kwargs):
+    """Answers the slash command, whether or not open_dm() got as far as deferring it."""
+    if interaction.response.is_done():
+        await interaction.followup.send(content, **kwargs)
+    else:
+        await interaction.response.send_message(content, **kwargs)
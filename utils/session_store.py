@@ -0,0 +1,51 @@
+# utils/session_store.py
+"""
+SQLite (WAL) backing store for session_manager.
+
+Only session_manager talks to this. It keeps the live sessions in memory and
+hands over batches of changed/removed sessions (write-behind), so the store
+does one short transaction per flush instead of a write per cart click.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable
+
+
+class SessionStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Flushes run in a worker thread (asyncio.to_thread), so allow cross-thread use
+        # and serialise access ourselves.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " user_id INTEGER PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " last_active REAL NOT NULL)"
+            )
+
+    def load(self) -> Dict[int, dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, data FROM sessions").fetchall()
+        return {user_id: json.loads(data) for user_id, data in rows}
+
+    def write(self, upserts: Dict[int, str], deletes: Iterable[int]):
+        """Applies one batch: `upserts` maps user_id -> serialized session JSON."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO sessions (user_id, data, last_active) VALUES (?, ?, json_extract(?, '$.last_active'))"
+                " ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, last_active = excluded.last_active",
+                [(user_id, data, data) for user_id, data in upserts.items()]
+            )
+            self._conn.executemany("DELETE FROM sessions WHERE user_id = ?", [(user_id,) for user_id in deletes])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()